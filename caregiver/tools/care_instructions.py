@@ -1,8 +1,30 @@
 import asyncio
 from google.cloud import firestore
 
+try:
+    # Share one channel per database with the other agents in this process
+    from team29.client_pool import get_client_pool
+except ImportError:  # caregiver deployed on its own
+    get_client_pool = None
+
+# AsyncClient channels are bound to the event loop that uses them: one client per loop
+_db_by_loop = {}
+
+
+def _get_db():
+    """Async Firestore client for the running event loop (call from inside a coroutine)."""
+    if get_client_pool is not None:
+        return get_client_pool().firestore_async(database="default")
+    loop = asyncio.get_running_loop()
+    for stale in [l for l in _db_by_loop if l.is_closed()]:
+        del _db_by_loop[stale]
+    if loop not in _db_by_loop:
+        _db_by_loop[loop] = firestore.AsyncClient(database="default")
+    return _db_by_loop[loop]
+
+
 async def get_care_instructions(patient_name: str):
-    db = firestore.AsyncClient(database="default")
+    db = _get_db()
     doc_ref = db.collection("care-instructions").document(patient_name)
     doc = await doc_ref.get()
     if doc.exists:
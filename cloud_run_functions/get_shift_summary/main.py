@@ -4,6 +4,15 @@ from typing import Dict, Any, List
 
 from google.cloud import firestore
 
+# One client per function instance, reused across requests
+_db = None
+
+def get_db() -> firestore.Client:
+    global _db
+    if _db is None:
+        _db = firestore.Client()
+    return _db
+
 # ---------- Helpers
 
 def parse_iso8601(dt_str: str) -> datetime:
@@ -196,7 +205,7 @@ def get_shift_start_summary(request):
 
         prev_doc_id = f"{patient_name}-shift-{prev_shift}"
 
-        db = firestore.Client()
+        db = get_db()
 
         # Pull collections for previous shift
         collections = [
@@ -243,7 +252,7 @@ def get_shift_start_summary(request):
 
         # Try to fetch pronouns field specifically if it exists
         # (If caregiver_in_charge doc was a dict string, we can't see inside; try a second read as dict)
-        cg_snap = firestore.Client().collection("caregiver_in_charge").document(prev_doc_id).get()
+        cg_snap = db.collection("caregiver_in_charge").document(prev_doc_id).get()
         if cg_snap.exists and isinstance(cg_snap.to_dict(), dict):
             pron = cg_snap.to_dict().get("caregiver_in_charge_pronouns")
             if pron:
@@ -276,7 +285,7 @@ def create_sample_data_http(request):
     headers = {"Access-Control-Allow-Origin": "*", "Content-Type": "application/json"}
 
     try:
-        db = firestore.Client()
+        db = get_db()
 
         patient_name = "John"
         caregiver_name = "Alice"
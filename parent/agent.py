@@ -6,6 +6,7 @@ care management for workshops and elderly care.
 """
 
 import logging
+import os
 
 # Enable detailed logging for Firestore operations
 logging.basicConfig(
@@ -21,10 +22,13 @@ from team29.parent_tools import (
     route_to_doctor,
     route_to_data_collector,
     get_daily_summary,
+    get_range_summary,
     get_upcoming_appointments,
     check_irregularities,
     get_medical_summary,
     analyze_trends,
+    check_medication_adherence,
+    analyze_daily_rhythm,
     answer_common_question
 )
 
@@ -33,17 +37,15 @@ from team29.firestore_agent_tools import (
     save_patient_food_preferences,
     get_patient_food_preferences,
     add_patient_care_instruction,
+    add_patient_care_instructions,
     get_patient_care_instructions,
     save_patient_food_intake,
+    save_patient_updates,
 )
+from team29.memory_ingest import ingest_session_to_memory_callback
+from team29.tool_output import output_mode_callbacks
 
-
-# Callback to automatically save sessions to memory after each interaction
-async def auto_save_session_to_memory_callback(callback_context):
-    """Automatically save completed sessions to memory for long-term recall."""
-    await callback_context._invocation_context.memory_service.add_session_to_memory(
-        callback_context._invocation_context.session
-    )
+_before_tool_output, _after_tool_output = output_mode_callbacks(os.getenv('PARENT_TOOL_OUTPUT_MODE', 'text'))
 
 
 # Create the root (parent) agent with comprehensive instructions, tools, and memory
@@ -82,6 +84,11 @@ specialized agents while providing comprehensive oversight.
    - Action: `save_patient_food_intake(patient_id='John', shift_id='current-shift', meals='Breakfast: oatmeal; Snack: yogurt')`
    - ✅ Then confirm: "I've recorded John's food intake to Firestore."
 
+4. **Several Facts at Once** - One message with a list or a mix of the above
+   - Several instructions: `add_patient_care_instructions(patient_id='John', instructions=['Take medication with food', 'Walk after lunch'])`
+   - Mixed facts: `save_patient_updates(patient_id='John', likes='soup', allergies='peanuts', instructions=['No coffee after 4pm'])`
+   - Use ONE of these calls instead of calling the single-item tools repeatedly
+
 **🚨 NEVER ROUTE THESE TO CAREGIVER AGENT - SAVE DIRECTLY! 🚨**
 
 ## YOUR KEY RESPONSIBILITIES:
@@ -130,8 +137,11 @@ specialized agents while providing comprehensive oversight.
 
 **For Overview Questions** (summaries, status):
 - Use `get_daily_summary()` for comprehensive daily reports
+- Use `get_range_summary()` for several days at once ("How was this week?") instead of one get_daily_summary() per day
 - Use `check_irregularities()` to identify concerning patterns
 - Use `analyze_trends()` for weekly/monthly trend analysis
+- Use `check_medication_adherence()` for on-time/late/missed medication doses
+- Use `analyze_daily_rhythm()` for "is his daily rhythm changing?" (sleep timing, regularity of days)
 
 ## COMMUNICATION STYLE:
 
@@ -218,8 +228,10 @@ and provide personalized, context-aware assistance.
         FunctionTool(func=save_patient_food_preferences),
         FunctionTool(func=get_patient_food_preferences),
         FunctionTool(func=add_patient_care_instruction),
+        FunctionTool(func=add_patient_care_instructions),
         FunctionTool(func=get_patient_care_instructions),
         FunctionTool(func=save_patient_food_intake),
+        FunctionTool(func=save_patient_updates),
 
         # Routing tools - delegate to specialist agents
         FunctionTool(func=route_to_caregiver),
@@ -228,13 +240,20 @@ and provide personalized, context-aware assistance.
 
         # Direct information tools - provide data without routing
         FunctionTool(func=get_daily_summary),
+        FunctionTool(func=get_range_summary),
         FunctionTool(func=get_upcoming_appointments),
         FunctionTool(func=check_irregularities),
         FunctionTool(func=get_medical_summary),
         FunctionTool(func=analyze_trends),
+        FunctionTool(func=check_medication_adherence),
+        FunctionTool(func=analyze_daily_rhythm),
         FunctionTool(func=answer_common_question),
     ],
 
-    # Callback to automatically save sessions to memory after each turn
-    after_agent_callback=auto_save_session_to_memory_callback
+    # Tool output: 'text' (default) or 'compact' JSON; sessions can override via state['tool_output_mode'].
+    before_tool_callback=_before_tool_output,
+    after_tool_callback=_after_tool_output,
+
+    # Save each turn's new events to memory in the background (debounced, incremental)
+    after_agent_callback=ingest_session_to_memory_callback
 )
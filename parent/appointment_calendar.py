@@ -0,0 +1,285 @@
+"""Per-patient appointment calendar index.
+
+One-off appointments are kept sorted by start time in parallel NumPy
+datetime64 arrays (start, end), so a range query is two binary searches:
+any appointment overlapping [start, end) starts in
+[start - longest duration, end). Recurring rules ("Physical Therapy every
+Tuesday at 10:00") are stored once and expanded only over the queried
+range.
+
+A calendar can also be given a `source` of one-off appointments (the
+seeded mock engine for the shared calendars). Days are loaded from it
+lazily, the first time a query touches them, so the schedule follows the
+queried range forward instead of stopping where an up-front fill ended,
+and the same day always yields the same appointments.
+
+`conflicts()` sorts the occurrences of a range and compares each one with
+the latest-ending appointment before it:
+- overlap       - it starts before that appointment ends
+- travel_buffer - it starts less than `travel_buffer_minutes` after it, at
+                  a different (or unknown) location
+
+`time_until()` turns a batch of start times into the "N minutes / hours /
+days" labels of `calculate_time_until_appointment()` with one array
+subtraction.
+
+Appointment dicts use the mock generator's shape: {'id', 'title', 'type',
+'time': 'YYYY-MM-DD HH:MM:SS', 'duration_minutes', 'notes'} plus an
+optional 'location'.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Any, Optional
+
+import numpy as np
+
+from team29.mock_data import generate_appointments, generate_recurring_appointments
+from team29.mock_engine import DEFAULT_PATIENT_ID, get_mock_engine, parse_date
+
+TRAVEL_BUFFER_MINUTES = 30
+DEFAULT_DURATION_MINUTES = 60
+# (start_date 'YYYY-MM-DD', days) -> one-off appointments on those days
+AppointmentSource = Callable[[str, int], List[Dict[str, Any]]]
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def _to_minutes(value: Any) -> np.datetime64:
+    if isinstance(value, datetime):
+        return np.datetime64(value, 'm')
+    return np.datetime64(str(value).replace(' ', 'T'), 'm')
+
+
+def _format(value: np.datetime64) -> str:
+    return str(value.astype('datetime64[s]')).replace('T', ' ')
+
+
+def time_until(times: np.ndarray, now: Optional[datetime] = None) -> List[str]:
+    """
+    Labels for a batch of appointment start times, relative to now.
+
+    Args:
+        times: datetime64 array of start times
+
+    Returns:
+        'Past appointment', 'N minutes', 'N hours' or 'N days' per time
+    """
+    now = np.datetime64(now or datetime.now(), 's')
+    seconds = (np.asarray(times).astype('datetime64[s]') - now).astype(np.int64)
+    labels = []
+    for s in seconds.tolist():
+        if s < 0:
+            labels.append("Past appointment")
+        elif s < 3600:
+            labels.append(f"{s // 60} minutes")
+        elif s < 86400:
+            labels.append(f"{s // 3600} hours")
+        else:
+            labels.append(f"{s // 86400} days")
+    return labels
+
+
+class AppointmentCalendar:
+    """Sorted interval index of one patient's appointments plus recurring rules."""
+
+    def __init__(self, patient_id: str = DEFAULT_PATIENT_ID, source: Optional[AppointmentSource] = None):
+        self.patient_id = patient_id
+        self.source = source
+        # Days [from, to) already loaded from source
+        self._loaded_from: Optional[np.datetime64] = None
+        self._loaded_to: Optional[np.datetime64] = None
+        self._load_lock = threading.Lock()
+        self._items: List[Dict[str, Any]] = []
+        self._starts = np.array([], dtype='datetime64[m]')
+        self._ends = np.array([], dtype='datetime64[m]')
+        self._max_duration = np.timedelta64(0, 'm')
+        self._rules: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    # ========== UPDATES ==========
+
+    def add_many(self, appointments: List[Dict[str, Any]]) -> None:
+        """Index one-off appointments."""
+        if not appointments:
+            return
+        starts = np.array([_to_minutes(a['time']) for a in appointments], dtype='datetime64[m]')
+        durations = np.array([a.get('duration_minutes') or DEFAULT_DURATION_MINUTES for a in appointments],
+                             dtype='timedelta64[m]')
+        with self._lock:
+            items = self._items + list(appointments)
+            all_starts = np.concatenate([self._starts, starts])
+            all_ends = np.concatenate([self._ends, starts + durations])
+            order = np.argsort(all_starts, kind='stable')
+            self._items = [items[i] for i in order]
+            self._starts = all_starts[order]
+            self._ends = all_ends[order]
+            self._max_duration = max(self._max_duration, durations.max())
+
+    def add(self, appointment: Dict[str, Any]) -> None:
+        self.add_many([appointment])
+
+    def add_recurring(self, rule: Dict[str, Any]) -> None:
+        """
+        Add a recurring appointment.
+
+        Args:
+            rule: {'id', 'title', 'type', 'time': 'HH:MM', 'duration_minutes'} plus
+                either 'weekday' (name or 0-6, weekly) or 'interval_days', and
+                optional 'start_date', 'until' ('YYYY-MM-DD'), 'location', 'notes'
+        """
+        weekday = rule.get('weekday')
+        if isinstance(weekday, str):
+            weekday = WEEKDAYS.index(weekday.lower())
+        if weekday is None and not rule.get('interval_days'):
+            raise ValueError("Recurring appointments need a 'weekday' or 'interval_days'")
+        rule = dict(rule, weekday=weekday)
+        rule.setdefault('id', f"rule_{len(self._rules) + 1}")
+        with self._lock:
+            self._rules.append(rule)
+            self._max_duration = max(self._max_duration, np.timedelta64(
+                rule.get('duration_minutes') or DEFAULT_DURATION_MINUTES, 'm'))
+
+    def _load(self, lo: np.datetime64, hi: np.datetime64) -> None:
+        """Load the source's appointments for the days of [lo, hi) not loaded yet."""
+        if self.source is None:
+            return
+        first = lo.astype('datetime64[D]')
+        last = hi.astype('datetime64[D]') + np.timedelta64(1, 'D')
+        with self._load_lock:
+            if self._loaded_from is None:
+                missing = [(first, last)]
+                self._loaded_from, self._loaded_to = first, last
+            else:
+                # The loaded days stay one contiguous range
+                missing = [(first, self._loaded_from), (self._loaded_to, last)]
+                self._loaded_from = min(self._loaded_from, first)
+                self._loaded_to = max(self._loaded_to, last)
+            for start, stop in missing:
+                if start < stop:
+                    self.add_many(self.source(str(start), int((stop - start).astype(np.int64))))
+
+    # ========== QUERIES ==========
+
+    def _expand(self, rule: Dict[str, Any], lo: np.datetime64, hi: np.datetime64) -> List[Dict[str, Any]]:
+        """Occurrences of a rule starting in [lo, hi)."""
+        offset = np.timedelta64(int(rule['time'][:2]) * 60 + int(rule['time'][3:5]), 'm')
+        first = lo.astype('datetime64[D]')
+        if rule.get('start_date'):
+            first = max(first, np.datetime64(parse_date(rule['start_date'])))
+        last = hi.astype('datetime64[D]') + np.timedelta64(1, 'D')
+        if rule.get('until'):
+            last = min(last, np.datetime64(parse_date(rule['until'])) + np.timedelta64(1, 'D'))
+        if first >= last:
+            return []
+
+        if rule['weekday'] is not None:
+            # 1970-01-01 was a Thursday (weekday 3)
+            shift = (rule['weekday'] - (first.astype(np.int64) + 3)) % 7
+            days = np.arange(first + np.timedelta64(int(shift), 'D'), last, np.timedelta64(7, 'D'))
+        else:
+            anchor = np.datetime64(parse_date(rule.get('start_date') or str(first)))
+            interval = int(rule['interval_days'])
+            skip = (-(first - anchor).astype(np.int64)) % interval
+            days = np.arange(first + np.timedelta64(int(skip), 'D'), last, np.timedelta64(interval, 'D'))
+
+        starts = days.astype('datetime64[m]') + offset
+        starts = starts[(starts >= lo) & (starts < hi)]
+        template = {k: v for k, v in rule.items()
+                    if k not in ('weekday', 'interval_days', 'start_date', 'until', 'time')}
+        return [
+            dict(template, id=f"{rule['id']}@{str(s)[:10]}", time=_format(s), recurring=True)
+            for s in starts
+        ]
+
+    def between(self, start: Any, end: Any) -> List[Dict[str, Any]]:
+        """Appointments (including recurring occurrences) overlapping [start, end), by start time."""
+        lo, hi = _to_minutes(start), _to_minutes(end)
+        # From the day before, so appointments running into the range are loaded
+        self._load(lo - np.timedelta64(1, 'D'), hi)
+        i = np.searchsorted(self._starts, lo - self._max_duration)
+        j = np.searchsorted(self._starts, hi)
+        keep = np.flatnonzero(self._ends[i:j] > lo) + i
+        occurrences = [(self._starts[k], self._items[k]) for k in keep]
+
+        for rule in self._rules:
+            duration = np.timedelta64(rule.get('duration_minutes') or DEFAULT_DURATION_MINUTES, 'm')
+            for occurrence in self._expand(rule, lo - duration, hi):
+                occurrence_start = _to_minutes(occurrence['time'])
+                if occurrence_start + duration > lo:
+                    occurrences.append((occurrence_start, occurrence))
+
+        occurrences.sort(key=lambda pair: pair[0])
+        return [appointment for _, appointment in occurrences]
+
+    def upcoming(self, days: int, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Appointments from now through the next `days` days."""
+        now = now or datetime.now()
+        return self.between(now, now + timedelta(days=days))
+
+    def conflicts(self, start: Any, end: Any,
+                  travel_buffer_minutes: int = TRAVEL_BUFFER_MINUTES) -> List[Dict[str, Any]]:
+        """
+        Overlapping or too-tightly-packed appointments in a range.
+
+        Returns:
+            {'kind': 'overlap' | 'travel_buffer', 'first', 'second', 'gap_minutes'}
+            dicts, in time order
+        """
+        appointments = self.between(start, end)
+        if len(appointments) < 2:
+            return []
+
+        starts = np.array([_to_minutes(a['time']) for a in appointments], dtype='datetime64[m]')
+        ends = starts + np.array([a.get('duration_minutes') or DEFAULT_DURATION_MINUTES for a in appointments],
+                                 dtype='timedelta64[m]')
+        index = np.arange(len(appointments))
+        running_end = np.maximum.accumulate(ends)
+        # Index of the appointment that ends latest among those up to i
+        holder = np.maximum.accumulate(np.where(ends == running_end, index, 0))
+        gaps = (starts[1:] - running_end[:-1]).astype(np.int64)
+
+        conflicts = []
+        for i in np.flatnonzero(gaps < travel_buffer_minutes):
+            first = appointments[holder[i]]
+            second = appointments[i + 1]
+            gap = int(gaps[i])
+            if gap >= 0:
+                location = first.get('location')
+                if location and location == second.get('location'):
+                    continue
+            conflicts.append({
+                'kind': 'overlap' if gap < 0 else 'travel_buffer',
+                'first': first,
+                'second': second,
+                'gap_minutes': gap,
+            })
+        return conflicts
+
+
+_calendars: Dict[str, AppointmentCalendar] = {}
+_calendars_lock = threading.Lock()
+
+
+def get_appointment_calendar(patient_id: str = DEFAULT_PATIENT_ID) -> AppointmentCalendar:
+    """
+    Get or create the shared calendar of a patient.
+
+    A patient on the mock engine's roster gets the engine's seeded
+    appointments, loaded per queried range, plus the mock recurring rules,
+    so repeated questions see the same schedule however far ahead they look.
+    """
+    with _calendars_lock:
+        calendar = _calendars.get(patient_id)
+        if calendar is None:
+            def mock_appointments(start_date: str, days: int) -> List[Dict[str, Any]]:
+                return generate_appointments(days, start_date, patient_id)
+
+            on_roster = patient_id in get_mock_engine().patient_ids
+            calendar = AppointmentCalendar(patient_id, mock_appointments if on_roster else None)
+            for rule in generate_recurring_appointments():
+                calendar.add_recurring(rule)
+            _calendars[patient_id] = calendar
+        return calendar
@@ -0,0 +1,234 @@
+"""Bulk JSONL importer for Firestore.
+
+Streams a JSONL file where every line is a record like:
+
+    {"collection": "caregiver-notes", "document_id": "John", "data": {"notes": [...]}}
+
+Each record is validated, grouped into batches and written by a pool of
+parallel writers (one atomic batch per write, merge semantics, retried
+with exponential backoff). A batch that still fails is retried record by
+record so every failure can be reported against its line number.
+
+Records are routed to a writer by a hash of (collection, document_id) and
+each writer commits its batches in order, so all writes to one document
+land in file order (the last line for a document wins).
+
+Usage:
+    python -m team29.bulk_import history.jsonl --batch-size 200 --workers 4
+"""
+
+import argparse
+import json
+import logging
+import random
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+from team29.firestore_native_service import FirestoreNativeService, get_firestore_native_service
+from team29.storage_backends import MAX_BATCH_WRITES
+
+logger = logging.getLogger('BulkImport')
+
+# A validated record: (line_number, collection, document_id, data)
+ImportRecord = Tuple[int, str, str, Dict[str, Any]]
+
+
+def validate_record(record: Any) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Check that a parsed JSONL record can be written.
+
+    Returns:
+        (collection, document_id, data)
+
+    Raises:
+        ValueError: If the record is malformed
+    """
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+
+    collection = record.get('collection')
+    document_id = record.get('document_id')
+    data = record.get('data')
+
+    for field, value in (('collection', collection), ('document_id', document_id)):
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"'{field}' must be a non-empty string")
+        if '/' in value:
+            raise ValueError(f"'{field}' must not contain '/'")
+    if not isinstance(data, dict) or not data:
+        raise ValueError("'data' must be a non-empty JSON object")
+
+    unknown = set(record) - {'collection', 'document_id', 'data'}
+    if unknown:
+        raise ValueError(f"unknown fields: {sorted(unknown)}")
+
+    return collection, document_id, data
+
+
+def read_records(path: str, failures: List[Dict[str, Any]]) -> Iterator[ImportRecord]:
+    """Yield valid records from a JSONL file, appending invalid lines to failures."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                collection, document_id, data = validate_record(json.loads(line))
+            except (json.JSONDecodeError, ValueError) as e:
+                failures.append({'line': line_number, 'error': f"invalid record: {e}"})
+                continue
+            yield line_number, collection, document_id, data
+
+
+def writer_for(collection: str, document_id: str, workers: int) -> int:
+    """Writer index for a document; stable across runs so a document always has one writer."""
+    return zlib.crc32(f"{collection}/{document_id}".encode('utf-8')) % workers
+
+
+def _with_retry(func, max_attempts: int, base_delay: float):
+    """Call func, retrying with jittered exponential backoff."""
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return func()
+        except Exception:
+            if attempt == max_attempts:
+                raise
+            delay = base_delay * (2 ** (attempt - 1))
+            time.sleep(random.uniform(0, delay))
+
+
+def _write_batch(service: FirestoreNativeService, batch: List[ImportRecord],
+                 max_attempts: int, base_delay: float) -> List[Dict[str, Any]]:
+    """Write one batch; return per-record failures (empty on success)."""
+    writes = [(collection, document_id, data) for _, collection, document_id, data in batch]
+    try:
+        _with_retry(lambda: service.save_many_to_collection(writes), max_attempts, base_delay)
+        return []
+    except Exception as e:
+        logger.warning(f"⚠️  Batch of {len(batch)} failed ({e}), retrying record by record")
+
+    failures = []
+    for line_number, collection, document_id, data in batch:
+        try:
+            _with_retry(lambda: service.save_to_collection(collection, document_id, data),
+                        max_attempts, base_delay)
+        except Exception as e:
+            failures.append({'line': line_number, 'error': str(e),
+                             'path': f"{collection}/{document_id}"})
+    return failures
+
+
+def import_jsonl(
+    path: str,
+    service: Optional[FirestoreNativeService] = None,
+    batch_size: int = 200,
+    workers: int = 4,
+    max_attempts: int = 3,
+    base_delay: float = 0.5
+) -> Dict[str, Any]:
+    """
+    Import a JSONL file of {collection, document_id, data} records.
+
+    Args:
+        path: Path to the JSONL file
+        service: Service to write through (default: the shared singleton)
+        batch_size: Records per atomic batch (max 500)
+        workers: Number of parallel batch writers
+        max_attempts: Attempts per batch / record before giving up
+        base_delay: Initial backoff delay in seconds
+
+    Returns:
+        Report dict with counts, throughput and per-record failures
+    """
+    if not 1 <= batch_size <= MAX_BATCH_WRITES:
+        raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_WRITES}")
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if service is None:
+        service = get_firestore_native_service()
+
+    logger.info(f"📥 IMPORTING {path} (batch size {batch_size}, {workers} writers)")
+
+    failures: List[Dict[str, Any]] = []
+    submitted = 0
+    started = time.monotonic()
+
+    # One single-threaded writer per shard: batches of a shard commit in submission order.
+    # Keep at most 2 batches per writer in flight so memory stays bounded.
+    max_in_flight = 2
+    executors = [ThreadPoolExecutor(max_workers=1) for _ in range(workers)]
+    batches: List[List[ImportRecord]] = [[] for _ in range(workers)]
+    in_flight: List[deque] = [deque() for _ in range(workers)]
+
+    def submit(shard: int) -> None:
+        nonlocal submitted
+        queue = in_flight[shard]
+        if len(queue) >= max_in_flight:
+            failures.extend(queue.popleft().result())
+        queue.append(executors[shard].submit(_write_batch, service, batches[shard], max_attempts, base_delay))
+        submitted += len(batches[shard])
+        batches[shard] = []
+
+    try:
+        for record in read_records(path, failures):
+            shard = writer_for(record[1], record[2], workers)
+            batches[shard].append(record)
+            if len(batches[shard]) >= batch_size:
+                submit(shard)
+
+        for shard in range(workers):
+            if batches[shard]:
+                submit(shard)
+
+        for queue in in_flight:
+            while queue:
+                failures.extend(queue.popleft().result())
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=True)
+
+    elapsed = time.monotonic() - started
+    write_failures = sum(1 for failure in failures if 'path' in failure)
+    written = submitted - write_failures
+    failures.sort(key=lambda failure: failure['line'])
+
+    report = {
+        'file': path,
+        'records_read': submitted + len(failures) - write_failures,
+        'written': written,
+        'failed': len(failures),
+        'elapsed_seconds': round(elapsed, 3),
+        'records_per_second': round(written / elapsed, 1) if elapsed > 0 else 0.0,
+        'failures': failures,
+    }
+
+    logger.info(f"✅ IMPORT COMPLETE: {written} written, {len(failures)} failed "
+                f"in {report['elapsed_seconds']}s ({report['records_per_second']} records/s)")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import a JSONL file into Firestore")
+    parser.add_argument('path', help="JSONL file of {collection, document_id, data} records")
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--max-attempts', type=int, default=3)
+    args = parser.parse_args()
+
+    result = import_jsonl(args.path, batch_size=args.batch_size, workers=args.workers,
+                          max_attempts=args.max_attempts)
+
+    print("\n" + "=" * 80)
+    print("📥 BULK IMPORT REPORT")
+    print("=" * 80)
+    print(f"Records read: {result['records_read']}")
+    print(f"Written:      {result['written']}")
+    print(f"Failed:       {result['failed']}")
+    print(f"Elapsed:      {result['elapsed_seconds']}s ({result['records_per_second']} records/s)")
+    for failure in result['failures'][:50]:
+        print(f"   ❌ line {failure['line']}: {failure['error']}")
+    if result['failed'] > 50:
+        print(f"   ... and {result['failed'] - 50} more")
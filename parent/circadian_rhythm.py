@@ -0,0 +1,248 @@
+"""Circadian activity profile from hourly movement data.
+
+A patient's hourly step counts form a days x 24 activity matrix. The
+metrics below are computed over the whole matrix with array operations
+(no per-day Python loops):
+
+- interdaily stability (IS)   - how closely each day follows the average
+                                24-hour profile (0 = no pattern, 1 = the
+                                same every day)
+- intradaily variability (IV) - hour-to-hour fragmentation of activity
+                                (~0 for one smooth wave, ~2 for noise)
+- relative amplitude (RA)     - contrast between the most active 10 hours
+                                (M10) and the least active 5 hours (L5) of
+                                the average profile
+- sleep onset / offset        - per night (18:00 to 12:00 next day), the
+                                least active 5-hour window, widened over
+                                the adjacent hours below REST_FRACTION of
+                                that day's mean activity
+
+A window only has a detectable rhythm when its days are regular enough
+(IS >= MIN_INTERDAILY_STABILITY) and its days and nights differ enough
+(RA >= MIN_RELATIVE_AMPLITUDE); otherwise sleep timing and the most
+active hours are noise and should not be reported.
+
+Matrices are built per calendar month; completed months never change and
+stay cached. `CircadianAnalyzer.compare()` sets the metrics of the latest
+complete days against the same number of days before them and flags a
+changing rhythm when sleep timing shifts (both windows must have a
+rhythm) or the day structure of a window that had one weakens.
+"""
+
+import threading
+from datetime import date as date_cls, datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from team29.irregularity_detector import HOURS, load_day_features
+from team29.mock_engine import DEFAULT_PATIENT_ID, parse_date
+
+L5_HOURS = 5
+M10_HOURS = 10
+# Nights are searched from 18:00 for 18 hours (to 12:00 the next day)
+NIGHT_START = 18
+NIGHT_HOURS = 18
+# Hours below this fraction of the day's mean activity count as rest
+REST_FRACTION = 0.5
+
+# A rhythm is "changing" when any of these is exceeded between the windows
+SHIFT_THRESHOLD_HOURS = 1.0
+IS_DROP_THRESHOLD = 0.1
+IV_RISE_THRESHOLD = 0.2
+RA_DROP_THRESHOLD = 0.1
+
+# Below these a window has no detectable daily rhythm (random hourly activity
+# gives IS ~0.05 and RA ~0.1; a typical day/night pattern IS > 0.4, RA > 0.8)
+MIN_INTERDAILY_STABILITY = 0.2
+MIN_RELATIVE_AMPLITUDE = 0.3
+
+
+def _rolling_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Sums of every `window`-long run along the last axis."""
+    padded = np.concatenate([np.zeros(values.shape[:-1] + (1,)), np.cumsum(values, axis=-1)], axis=-1)
+    return padded[..., window:] - padded[..., :-window]
+
+
+def circular_mean_hour(hours: np.ndarray) -> float:
+    """Mean clock time of hours-of-day (23:00 and 01:00 average to midnight)."""
+    angles = np.asarray(hours, dtype=float) * (2 * np.pi / HOURS)
+    mean = np.arctan2(np.sin(angles).mean(), np.cos(angles).mean())
+    return float(mean * HOURS / (2 * np.pi) % HOURS)
+
+
+def hour_difference(a: float, b: float) -> float:
+    """Signed clock-time difference a - b in hours, within [-12, 12)."""
+    return (a - b + HOURS / 2) % HOURS - HOURS / 2
+
+
+def circadian_metrics(activity: np.ndarray) -> Dict[str, Any]:
+    """
+    Circadian metrics of an activity matrix.
+
+    Args:
+        activity: (days, 24) hourly activity, at least 2 days
+
+    Returns:
+        Dict with 'days', 'profile' (24,), 'interdaily_stability',
+        'intradaily_variability', 'relative_amplitude', 'l5_start',
+        'm10_start', per-night 'sleep_onset' / 'sleep_offset' (hour of day)
+        and 'rest_hours' arrays, and their typical values 'onset',
+        'offset' and 'rest_duration', and 'rhythm_detected' (whether the
+        rhythm is strong enough for the timing values to mean anything)
+    """
+    activity = np.asarray(activity, dtype=float)
+    days = activity.shape[0]
+    flat = activity.ravel()
+    overall = flat.mean()
+    variance = ((flat - overall) ** 2).mean()
+    profile = activity.mean(axis=0)
+
+    if variance > 0:
+        interdaily_stability = ((profile - overall) ** 2).mean() / variance
+        intradaily_variability = (np.diff(flat) ** 2).mean() / variance
+    else:
+        interdaily_stability = intradaily_variability = 0.0
+
+    # L5 / M10 on the average day, wrapping around midnight
+    wrapped = np.concatenate([profile, profile[:M10_HOURS - 1]])
+    l5 = _rolling_sums(wrapped[:HOURS + L5_HOURS - 1], L5_HOURS) / L5_HOURS
+    m10 = _rolling_sums(wrapped, M10_HOURS) / M10_HOURS
+    l5_start, m10_start = int(np.argmin(l5)), int(np.argmax(m10))
+    contrast = m10[m10_start] + l5[l5_start]
+    relative_amplitude = (m10[m10_start] - l5[l5_start]) / contrast if contrast > 0 else 0.0
+
+    # Nights: evening of day d through the morning of day d + 1
+    starts = HOURS * np.arange(days - 1) + NIGHT_START
+    nights = flat[starts[:, None] + np.arange(NIGHT_HOURS)]
+    rest_start = np.argmin(_rolling_sums(nights, L5_HOURS), axis=1)[:, None]
+    active = nights >= REST_FRACTION * activity[:-1].mean(axis=1, keepdims=True)
+    position = np.arange(NIGHT_HOURS)
+    # Widen the L5 window to the last active hour before it and the first one after it
+    onset = np.where(active & (position < rest_start), position, -1).max(axis=1) + 1
+    offset = np.where(active & (position >= rest_start + L5_HOURS), position, NIGHT_HOURS).min(axis=1)
+    sleep_onset = (NIGHT_START + onset) % HOURS
+    sleep_offset = (NIGHT_START + offset) % HOURS
+
+    return {
+        'days': days,
+        'profile': profile,
+        'interdaily_stability': float(interdaily_stability),
+        'intradaily_variability': float(intradaily_variability),
+        'relative_amplitude': float(relative_amplitude),
+        'l5_start': l5_start,
+        'm10_start': m10_start,
+        'sleep_onset': sleep_onset,
+        'sleep_offset': sleep_offset,
+        'rest_hours': offset - onset,
+        'onset': circular_mean_hour(sleep_onset),
+        'offset': circular_mean_hour(sleep_offset),
+        'rest_duration': float((offset - onset).mean()),
+        'rhythm_detected': bool(interdaily_stability >= MIN_INTERDAILY_STABILITY
+                                and relative_amplitude >= MIN_RELATIVE_AMPLITUDE),
+    }
+
+
+class CircadianAnalyzer:
+    """Per-patient activity matrices (cached per month) and rhythm comparisons."""
+
+    def __init__(self, patient_id: str = DEFAULT_PATIENT_ID):
+        self.patient_id = patient_id
+        self._months: Dict[Tuple[int, int], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _month_matrix(self, year: int, month: int, today: date_cls) -> np.ndarray:
+        """(days_in_month, 24) activity of one month; complete months are cached."""
+        key = (year, month)
+        with self._lock:
+            matrix = self._months.get(key)
+        if matrix is not None:
+            return matrix
+
+        first = date_cls(year, month, 1)
+        following = date_cls(year + month // 12, month % 12 + 1, 1)
+        matrix = load_day_features(self.patient_id, first, (following - first).days)[:, :HOURS]
+        if following <= today:
+            with self._lock:
+                self._months[key] = matrix
+        return matrix
+
+    def activity_matrix(self, start: Any, days: int) -> np.ndarray:
+        """(days, 24) hourly activity for a date range."""
+        first = parse_date(start)
+        end = first + timedelta(days=days)
+        today = datetime.now().date()
+
+        pieces = []
+        current = first
+        while current < end:
+            matrix = self._month_matrix(current.year, current.month, today)
+            stop = min(end, current + timedelta(days=len(matrix) - current.day + 1))
+            pieces.append(matrix[current.day - 1:current.day - 1 + (stop - current).days])
+            current = stop
+        return np.concatenate(pieces)
+
+    def profile(self, days: int = 28, end: Optional[Any] = None) -> Dict[str, Any]:
+        """Circadian metrics of the `days` days ending on `end` (default: yesterday)."""
+        last = parse_date(end) if end is not None else datetime.now().date() - timedelta(days=1)
+        metrics = circadian_metrics(self.activity_matrix(last - timedelta(days=days - 1), days))
+        metrics['end_date'] = str(last)
+        return metrics
+
+    def compare(self, days: int = 14, end: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        Compare the latest `days` days with the `days` days before them.
+
+        Returns:
+            Dict with 'recent' and 'previous' metrics, 'onset_shift' and
+            'offset_shift' in hours, 'rhythm_detected' (in the recent window),
+            'changing' and the list of 'reasons'
+        """
+        last = parse_date(end) if end is not None else datetime.now().date() - timedelta(days=1)
+        first = last - timedelta(days=2 * days - 1)
+        metrics = [circadian_metrics(window) for window in np.split(self.activity_matrix(first, 2 * days), 2)]
+        previous, recent = metrics
+
+        onset_shift = hour_difference(recent['onset'], previous['onset'])
+        offset_shift = hour_difference(recent['offset'], previous['offset'])
+        reasons: List[str] = []
+        # Sleep timing is only meaningful when both windows have a rhythm
+        if recent['rhythm_detected'] and previous['rhythm_detected']:
+            if abs(onset_shift) >= SHIFT_THRESHOLD_HOURS:
+                reasons.append(f"falls asleep {abs(onset_shift):.1f} h {'later' if onset_shift > 0 else 'earlier'}")
+            if abs(offset_shift) >= SHIFT_THRESHOLD_HOURS:
+                reasons.append(f"wakes up {abs(offset_shift):.1f} h {'later' if offset_shift > 0 else 'earlier'}")
+        # A weakening structure only matters if there was one to lose
+        if previous['rhythm_detected']:
+            if not recent['rhythm_detected']:
+                reasons.append("no clear daily rhythm any more")
+            if previous['interdaily_stability'] - recent['interdaily_stability'] >= IS_DROP_THRESHOLD:
+                reasons.append("days are less regular")
+            if recent['intradaily_variability'] - previous['intradaily_variability'] >= IV_RISE_THRESHOLD:
+                reasons.append("activity is more fragmented")
+            if previous['relative_amplitude'] - recent['relative_amplitude'] >= RA_DROP_THRESHOLD:
+                reasons.append("less contrast between day and night")
+
+        return {
+            'days': days,
+            'end_date': str(last),
+            'recent': recent,
+            'previous': previous,
+            'onset_shift': onset_shift,
+            'offset_shift': offset_shift,
+            'rhythm_detected': recent['rhythm_detected'],
+            'changing': bool(reasons),
+            'reasons': reasons,
+        }
+
+
+_analyzers: Dict[str, CircadianAnalyzer] = {}
+_analyzers_lock = threading.Lock()
+
+
+def get_circadian_analyzer(patient_id: str = DEFAULT_PATIENT_ID) -> CircadianAnalyzer:
+    """Get or create the shared analyzer for a patient."""
+    with _analyzers_lock:
+        if patient_id not in _analyzers:
+            _analyzers[patient_id] = CircadianAnalyzer(patient_id)
+        return _analyzers[patient_id]
@@ -0,0 +1,266 @@
+"""Process-wide pool of Google Cloud database clients.
+
+Every client owns its own gRPC channel, so building one per call (or one
+per app) multiplies connection setup and open channels. The pool creates
+each client lazily on first use and then shares it, keyed by
+(kind, project, database):
+
+- 'firestore'       - google.cloud.firestore.Client
+- 'firestore_async' - google.cloud.firestore.AsyncClient
+- 'datastore'       - google.cloud.datastore.Client
+
+An async client's gRPC channel is bound to the event loop that first used
+it, so async clients are also keyed by the running loop: each loop (the
+ADK runner's, a scenario replay's, a test's) gets its own, and fetching
+one outside a running loop is an error.
+
+The parent agent, the caregiver tools and the patient_logger tools all
+fetch their clients from here, so one process holds one channel per
+database (and per loop for async clients). Shutdown:
+
+- `await aclose()` on a loop runs the async shutdown hooks registered
+  from that loop, then closes that loop's async clients. Call it before
+  the loop ends (e.g. when the runner shuts down).
+- `close_all()` runs at interpreter exit. It runs the sync hooks, closes
+  the sync clients, and finishes whatever async work is left on its own
+  loop when that loop is idle. Work on a closed loop cannot be finished
+  any more and is logged, never run on a new loop.
+"""
+
+import asyncio
+import atexit
+import inspect
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('ClientPool')
+
+ClientKey = Tuple[str, Optional[str], str]
+# Seconds close_all() waits for async work on a loop running in another thread
+SHUTDOWN_TIMEOUT_SECONDS = 10.0
+
+
+def _create_firestore(project: Optional[str], database: str) -> Any:
+    from google.cloud import firestore
+    return firestore.Client(project=project, database=database)
+
+
+def _create_firestore_async(project: Optional[str], database: str) -> Any:
+    from google.cloud import firestore
+    return firestore.AsyncClient(project=project, database=database)
+
+
+def _create_datastore(project: Optional[str], database: str) -> Any:
+    from google.cloud import datastore
+    return datastore.Client(project=project, database=database or None)
+
+
+CLIENT_FACTORIES: Dict[str, Callable[[Optional[str], str], Any]] = {
+    'firestore': _create_firestore,
+    'firestore_async': _create_firestore_async,
+    'datastore': _create_datastore,
+}
+# Kinds whose clients are bound to the event loop that uses them
+ASYNC_KINDS = ('firestore_async',)
+
+
+class ClientPool:
+    """Lazily created, shared database clients keyed by (kind, project, database) and, if async, loop."""
+
+    def __init__(self):
+        self._clients: Dict[ClientKey, Any] = {}
+        self._loop_clients: Dict[Tuple[ClientKey, asyncio.AbstractEventLoop], Any] = {}
+        # (hook, loop it must run on; None for sync hooks)
+        self._shutdown_hooks: List[Tuple[Callable[[], Any], Optional[asyncio.AbstractEventLoop]]] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(kind: str, project: Optional[str], database: str) -> ClientKey:
+        """Normalize a pool key so the default project maps to one entry."""
+        if kind not in CLIENT_FACTORIES:
+            raise ValueError(f"Unknown client kind: {kind!r} (expected one of {sorted(CLIENT_FACTORIES)})")
+        if project is None:
+            project = os.getenv('GOOGLE_CLOUD_PROJECT')
+        return kind, project, database
+
+    def get(self, kind: str, project: Optional[str] = None, database: str = 'default') -> Any:
+        """
+        Return the shared client for (kind, project, database), creating it on first use.
+
+        Raises:
+            RuntimeError: For an async kind outside a running event loop
+        """
+        key = self.make_key(kind, project, database)
+        if kind in ASYNC_KINDS:
+            return self._get_for_loop(key)
+
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                logger.info(f"🔌 Creating {kind} client (project={key[1]}, database={database})")
+                client = CLIENT_FACTORIES[kind](key[1], database)
+                self._clients[key] = client
+            return client
+
+    def _get_for_loop(self, key: ClientKey) -> Any:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            raise RuntimeError(f"{key[0]} clients must be fetched inside a running event loop") from None
+
+        with self._lock:
+            # Clients of closed loops can't be used or closed any more
+            for stale in [k for k in self._loop_clients if k[1].is_closed()]:
+                del self._loop_clients[stale]
+            client = self._loop_clients.get((key, loop))
+            if client is None:
+                logger.info(f"🔌 Creating {key[0]} client (project={key[1]}, database={key[2]}) for loop {id(loop):#x}")
+                client = CLIENT_FACTORIES[key[0]](key[1], key[2])
+                self._loop_clients[(key, loop)] = client
+            return client
+
+    def firestore(self, project: Optional[str] = None, database: str = 'default') -> Any:
+        """Shared synchronous Firestore client."""
+        return self.get('firestore', project, database)
+
+    def firestore_async(self, project: Optional[str] = None, database: str = 'default') -> Any:
+        """Asynchronous Firestore client shared within the running event loop."""
+        return self.get('firestore_async', project, database)
+
+    def datastore(self, project: Optional[str] = None, database: str = '') -> Any:
+        """Shared Datastore client ('' is the Datastore default database)."""
+        return self.get('datastore', project, database)
+
+    def keys(self) -> List[ClientKey]:
+        """Keys of all clients created so far (an async key once per loop)."""
+        with self._lock:
+            return list(self._clients) + [key for key, _ in self._loop_clients]
+
+    def register_shutdown_hook(self, hook: Callable[[], Any]) -> None:
+        """
+        Run hook at shutdown, before clients are closed.
+
+        A coroutine function is bound to the running loop it was registered
+        from and runs there, in `aclose()` or an idle-loop `close_all()`.
+
+        Raises:
+            RuntimeError: For a coroutine function registered outside a running loop
+        """
+        loop = None
+        if inspect.iscoroutinefunction(hook):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                raise RuntimeError("async shutdown hooks must be registered from their event loop") from None
+        with self._lock:
+            self._shutdown_hooks.append((hook, loop))
+
+    async def aclose(self) -> None:
+        """Run this loop's async shutdown hooks, then close this loop's async clients."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            hooks = [hook for hook, owner in self._shutdown_hooks if owner is loop]
+            self._shutdown_hooks = [(hook, owner) for hook, owner in self._shutdown_hooks if owner is not loop]
+            clients = {key: client for (key, owner), client in self._loop_clients.items() if owner is loop}
+            for key in clients:
+                del self._loop_clients[(key, loop)]
+
+        for hook in hooks:
+            await self._await(hook, 'shutdown hook')
+        for key, client in clients.items():
+            await self._await(client.close, f"{key[0]} client {key[1]}/{key[2]}")
+        if clients:
+            logger.info(f"🔌 Closed {len(clients)} async clients of loop {id(loop):#x}")
+
+    def close_all(self) -> None:
+        """Run shutdown hooks, then close and forget every pooled client."""
+        with self._lock:
+            hooks, self._shutdown_hooks = self._shutdown_hooks, []
+            clients, self._clients = self._clients, {}
+            loop_clients, self._loop_clients = self._loop_clients, {}
+
+        # Async work per owning loop: hooks first, then the loop's clients
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Tuple[Callable[[], Any], str]]] = {}
+        for hook, loop in hooks:
+            if loop is None:
+                self._run(hook, 'shutdown hook')
+            else:
+                by_loop.setdefault(loop, []).append((hook, 'shutdown hook'))
+        for (key, loop), client in loop_clients.items():
+            by_loop.setdefault(loop, []).append((client.close, f"{key[0]} client {key[1]}/{key[2]}"))
+        for loop, work in by_loop.items():
+            self._finish_on_loop(loop, work)
+
+        for key, client in clients.items():
+            close = getattr(client, 'close', None)
+            if close is not None:
+                self._run(close, f"{key[0]} client {key[1]}/{key[2]}")
+
+        if clients or loop_clients:
+            logger.info(f"🔌 Closed {len(clients) + len(loop_clients)} pooled clients")
+
+    def _finish_on_loop(self, loop: asyncio.AbstractEventLoop,
+                        work: List[Tuple[Callable[[], Any], str]]) -> None:
+        """Run async shutdown work on the loop that owns it, if that loop can still run it."""
+        async def _all():
+            for func, label in work:
+                await self._await(func, label)
+
+        labels = ', '.join(label for _, label in work)
+        if loop.is_closed():
+            logger.warning(f"⚠️  Event loop already closed, not finishing: {labels} (call aclose() before the loop ends)")
+            return
+        try:
+            if not loop.is_running():
+                loop.run_until_complete(_all())
+            elif not self._in_loop(loop):
+                # Running in another thread: hand the work to it and wait
+                asyncio.run_coroutine_threadsafe(_all(), loop).result(timeout=SHUTDOWN_TIMEOUT_SECONDS)
+            else:
+                logger.warning(f"⚠️  close_all() called inside the owning loop, not finishing: {labels} "
+                               f"(await aclose() instead)")
+        except Exception as e:
+            logger.warning(f"⚠️  Error finishing shutdown work ({labels}): {e}")
+
+    @staticmethod
+    def _in_loop(loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    @staticmethod
+    async def _await(func: Callable[[], Any], label: str) -> None:
+        try:
+            result = func()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.warning(f"⚠️  Error closing {label}: {e}")
+
+    @staticmethod
+    def _run(func: Callable[[], Any], label: str) -> None:
+        """Call a sync hook or close(); a coroutine it returns has no loop to run on and is closed."""
+        try:
+            result = func()
+            if inspect.iscoroutine(result):
+                result.close()
+                logger.warning(f"⚠️  {label} returned a coroutine outside any event loop; register it as "
+                               f"an async hook from its loop instead")
+        except Exception as e:
+            logger.warning(f"⚠️  Error closing {label}: {e}")
+
+
+_client_pool = ClientPool()
+atexit.register(_client_pool.close_all)
+
+
+def get_client_pool() -> ClientPool:
+    """Get the process-wide client pool."""
+    return _client_pool
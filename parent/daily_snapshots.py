@@ -0,0 +1,254 @@
+"""Memoized per-(patient, date) daily snapshots.
+
+A snapshot holds everything the daily summary shows for one patient and
+day: movement, presence, motion sensors, behavior and detected
+irregularities. It is built once and then served from an in-memory LRU
+(and, when SNAPSHOT_DIR is set, from a JSON file per snapshot), so
+repeated questions in one turn or one session see the same numbers and
+don't redo the work.
+
+- Past days are immutable: a snapshot built after the day ended is
+  served forever.
+- Today's (and a future day's) snapshot records the data version it was
+  built from (the row counts of the day's time-series partitions) and is
+  rebuilt only when new samples have arrived. A snapshot built before a
+  day ended is rebuilt once after the day has ended.
+
+`build_range_table()` is the multi-day counterpart: the headline numbers
+of every day in a range, loaded in one pass over the mock engine arrays,
+the time-series rollups and the detector's daily irregularity counts,
+as columns of one array per field.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from team29.irregularity_detector import get_irregularity_detector
+from team29.mock_data import (
+    generate_movement_data,
+    generate_presence_data,
+    generate_motion_sensor_data,
+    generate_daily_behavior_data,
+)
+from team29.mock_engine import DEFAULT_PATIENT_ID, MOODS, get_mock_engine, parse_date
+from team29.timeseries_store import TimeSeriesStore, get_timeseries_store
+
+logger = logging.getLogger('DailySnapshots')
+
+SNAPSHOT_SECTIONS = ('movement', 'presence', 'sensors', 'behavior', 'irregularities')
+MAX_CACHED_SNAPSHOTS = 256
+RANGE_COLUMNS = ('steps', 'active_minutes', 'distance_km', 'home_hours', 'outings', 'sleep_hours',
+                 'meals_eaten', 'medication_taken', 'mood', 'social_interactions',
+                 'overnight_bathroom_visits', 'irregularities')
+
+
+# ========== DAILY DATA ==========
+
+def _store_for(series: str, date: str, patient_id: str) -> Optional[TimeSeriesStore]:
+    """The time-series store if it holds this day of the series, else None."""
+    store = get_timeseries_store()
+    if store is not None and store.has_day(patient_id, series, date):
+        return store
+    return None
+
+
+def load_movement(date: str, patient_id: str = DEFAULT_PATIENT_ID) -> Dict[str, Any]:
+    store = _store_for('movement', date, patient_id)
+    return store.movement_record(patient_id, date) if store else generate_movement_data(date, patient_id)
+
+
+def load_presence(date: str, patient_id: str = DEFAULT_PATIENT_ID) -> Dict[str, Any]:
+    store = _store_for('presence', date, patient_id)
+    return store.presence_record(patient_id, date) if store else generate_presence_data(date, patient_id)
+
+
+def load_sensors(date: str, patient_id: str = DEFAULT_PATIENT_ID) -> Dict[str, Any]:
+    store = _store_for('motion', date, patient_id)
+    return store.motion_sensor_record(patient_id, date) if store else generate_motion_sensor_data(date, patient_id)
+
+
+def data_version(date: str, patient_id: str = DEFAULT_PATIENT_ID) -> List[int]:
+    """Row counts of the day's time-series partitions; changes when samples arrive."""
+    store = get_timeseries_store()
+    if store is None:
+        return []
+    return [store.row_count(patient_id, series, date) if store.has_day(patient_id, series, date) else 0
+            for series in ('movement', 'presence', 'motion', 'daily')]
+
+
+def build_daily_snapshot(date: str, patient_id: str = DEFAULT_PATIENT_ID) -> Dict[str, Any]:
+    """Gather all data for one patient and day."""
+    return {
+        'patient_id': patient_id,
+        'date': date,
+        'movement': load_movement(date, patient_id),
+        'presence': load_presence(date, patient_id),
+        'sensors': load_sensors(date, patient_id),
+        'behavior': generate_daily_behavior_data(date, patient_id),
+        'irregularities': get_irregularity_detector(patient_id).detect(date),
+    }
+
+
+def build_range_table(start_date: str, days: int, patient_id: str = DEFAULT_PATIENT_ID) -> Dict[str, np.ndarray]:
+    """
+    Headline numbers for every day of a range, in one pass.
+
+    Movement, home hours, outings and overnight bathroom visits come from
+    the time-series store's range rollups on the days it has a report or
+    samples for; everything else comes from one mock engine range.
+
+    Returns:
+        Dict with 'dates' and one (days,) array per RANGE_COLUMNS entry
+        ('mood' holds mood names)
+    """
+    start = parse_date(start_date)
+    engine = get_mock_engine()
+    data = engine.generate(start, days)
+    p = engine.patient_index(patient_id)
+
+    table = {
+        'dates': data['dates'],
+        'steps': data['total_steps'][p].astype(np.int64),
+        'active_minutes': data['active_minutes'][p].astype(np.int64),
+        'distance_km': data['distance_km'][p].astype(float),
+        'home_hours': data['home_hours'][p].astype(float),
+        'outings': data['outing_count'][p].astype(np.int64),
+        'sleep_hours': data['sleep_hours'][p].astype(float),
+        'meals_eaten': data['meals_eaten'][p].sum(axis=-1).astype(np.int64),
+        'medication_taken': data['medication_compliance'][p].astype(bool),
+        'mood': np.array(MOODS)[data['mood'][p]],
+        'social_interactions': data['social_interactions'][p].astype(np.int64),
+        'overnight_bathroom_visits': data['overnight_bathroom_visits'][p].astype(np.int64),
+        'irregularities': get_irregularity_detector(patient_id).count_range(start, days).astype(np.int64),
+    }
+
+    store = get_timeseries_store()
+    if store is not None:
+        movement = store.daily_movement(patient_id, start, days)
+        measured = movement['measured']
+        table['steps'] = np.where(measured, movement['steps'], table['steps']).astype(np.int64)
+        table['active_minutes'] = np.where(measured, movement['active_minutes'],
+                                           table['active_minutes']).astype(np.int64)
+        table['distance_km'] = np.where(measured, movement['distance_km'], table['distance_km'])
+        presence = store.daily_presence(patient_id, start, days)
+        table['home_hours'] = np.where(presence['measured'], presence['home_hours'], table['home_hours'])
+        table['outings'] = np.where(presence['measured'], presence['outings'], table['outings']).astype(np.int64)
+        bathroom = store.daily_overnight_bathroom_visits(patient_id, start, days)
+        table['overnight_bathroom_visits'] = np.where(bathroom['measured'], bathroom['visits'],
+                                                      table['overnight_bathroom_visits']).astype(np.int64)
+    return table
+
+
+# ========== CACHE ==========
+
+class DailySnapshotCache:
+    """LRU of daily snapshots, optionally persisted as JSON files."""
+
+    def __init__(self, directory: Optional[str] = None, max_entries: int = MAX_CACHED_SNAPSHOTS):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, str], Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    def _path(self, patient_id: str, date: str) -> str:
+        return os.path.join(self.directory, patient_id, f"{date}.json")
+
+    def _load(self, patient_id: str, date: str) -> Optional[Dict[str, Any]]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(patient_id, date)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  Ignoring unreadable snapshot {patient_id}/{date}: {e}")
+            return None
+
+    def _save(self, entry: Dict[str, Any]) -> None:
+        if not self.directory:
+            return
+        path = self._path(entry['snapshot']['patient_id'], entry['snapshot']['date'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def _is_fresh(self, entry: Dict[str, Any], date: str, today: str) -> bool:
+        if entry['complete']:
+            return True
+        # Built before the day ended: valid until new samples arrive or the day ends
+        return date >= today and entry['version'] == data_version(date, entry['snapshot']['patient_id'])
+
+    def get(self, date: str, patient_id: str = DEFAULT_PATIENT_ID) -> Dict[str, Any]:
+        """The snapshot for (patient, date), building it if missing or stale."""
+        key = (patient_id, date)
+        today = datetime.now().strftime("%Y-%m-%d")
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            entry = self._load(patient_id, date)
+        if entry is not None and self._is_fresh(entry, date, today):
+            self.hits += 1
+            self._remember(key, entry)
+            return entry['snapshot']
+
+        version = data_version(date, patient_id)
+        entry = {
+            'snapshot': build_daily_snapshot(date, patient_id),
+            'version': version,
+            'complete': date < today,
+            'built_at': datetime.now().isoformat(),
+        }
+        self.builds += 1
+        self._remember(key, entry)
+        self._save(entry)
+        return entry['snapshot']
+
+    def _remember(self, key: Tuple[str, str], entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, date: str, patient_id: str = DEFAULT_PATIENT_ID) -> None:
+        """Drop a snapshot so the next get() rebuilds it."""
+        with self._lock:
+            self._entries.pop((patient_id, date), None)
+        if self.directory:
+            try:
+                os.remove(self._path(patient_id, date))
+            except FileNotFoundError:
+                pass
+
+
+_snapshot_cache: Optional[DailySnapshotCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_snapshot_cache() -> DailySnapshotCache:
+    """Get or create the shared snapshot cache (persisted under SNAPSHOT_DIR if set)."""
+    global _snapshot_cache
+    with _cache_lock:
+        if _snapshot_cache is None:
+            _snapshot_cache = DailySnapshotCache(os.getenv('SNAPSHOT_DIR') or None)
+        return _snapshot_cache
+
+
+def get_daily_snapshot(date: str, patient_id: str = DEFAULT_PATIENT_ID) -> Dict[str, Any]:
+    """Shortcut for get_snapshot_cache().get(date, patient_id)."""
+    return get_snapshot_cache().get(date, patient_id)
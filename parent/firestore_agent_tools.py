@@ -4,9 +4,10 @@ These tools can be used by agents to save and retrieve data from Firestore.
 All operations are logged for debugging.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import logging
 from team29.firestore_native_service import get_firestore_native_service
+from team29.tool_output import compact_json, is_compact
 
 logger = logging.getLogger('FirestoreAgentTools')
 
@@ -63,6 +64,10 @@ def save_patient_food_preferences(
     # Save to Firestore
     service.save_food_preferences(patient_id, preferences)
 
+    if is_compact():
+        logger.info(f"✅ Tool completed successfully")
+        return compact_json({'ok': True, 'saved': 'food-preferences/' + patient_id})
+
     result = f"""✅ Food preferences saved for {patient_id}!
 
 Likes: {', '.join(preferences['likes'])}
@@ -95,7 +100,11 @@ def get_patient_food_preferences(patient_id: str) -> str:
     if not preferences:
         result = f"No food preferences found for {patient_id}."
         logger.warning(f"⚠️  No preferences found")
-        return result
+        return compact_json({'found': False}) if is_compact() else result
+
+    if is_compact():
+        logger.info(f"✅ Tool completed successfully")
+        return compact_json({k: preferences.get(k) for k in ('likes', 'dislikes', 'allergies', 'notes')})
 
     result = f"""🍽️ Food Preferences for {patient_id}:
 
@@ -136,6 +145,10 @@ def add_patient_care_instruction(patient_id: str, instruction: str) -> str:
     service = get_firestore_native_service()
     service.add_care_instruction(patient_id, instruction)
 
+    if is_compact():
+        logger.info(f"✅ Tool completed successfully")
+        return compact_json({'ok': True})
+
     result = f"""✅ Care instruction added for {patient_id}!
 
 Instruction: "{instruction}"
@@ -146,6 +159,36 @@ This instruction is now stored in Firestore and visible to all caregivers."""
     return result
 
 
+def add_patient_care_instructions(patient_id: str, instructions: List[str]) -> str:
+    """
+    Add several care instructions for a patient in one call.
+
+    Use this instead of calling add_patient_care_instruction() once per instruction.
+
+    Args:
+        patient_id: Patient identifier
+        instructions: The instructions to add, one per item
+
+    Returns:
+        Confirmation message
+    """
+    logger.info(f"🔧 Tool called: add_patient_care_instructions")
+    logger.info(f"   Patient ID: {patient_id}")
+    logger.info(f"   Instructions: {instructions}")
+
+    instructions = [i.strip() for i in instructions if i and i.strip()]
+    if not instructions:
+        return compact_json({'ok': False, 'error': 'no instructions'}) if is_compact() else "No instructions given."
+
+    service = get_firestore_native_service()
+    service.add_care_instructions(patient_id, instructions)
+
+    logger.info(f"✅ Tool completed successfully")
+    if is_compact():
+        return compact_json({'ok': True, 'added': len(instructions)})
+    return f"✅ Added {len(instructions)} care instructions for {patient_id} to Firestore."
+
+
 def get_patient_care_instructions(patient_id: str) -> str:
     """
     Get all care instructions for a patient.
@@ -165,7 +208,11 @@ def get_patient_care_instructions(patient_id: str) -> str:
     if not instructions:
         result = f"No care instructions found for {patient_id}."
         logger.warning(f"⚠️  No instructions found")
-        return result
+        return compact_json([]) if is_compact() else result
+
+    if is_compact():
+        logger.info(f"✅ Tool completed successfully - Found {len(instructions)} instructions")
+        return compact_json(instructions)
 
     result = f"""📋 Care Instructions for {patient_id}:
 
@@ -203,6 +250,10 @@ def save_patient_food_intake(
     service = get_firestore_native_service()
     doc_id = service.save_food_intake(patient_id, shift_id, meals)
 
+    if is_compact():
+        logger.info(f"✅ Tool completed successfully")
+        return compact_json({'ok': True, 'saved': f"food/{doc_id}"})
+
     result = f"""✅ Food intake recorded for {patient_id}!
 
 Shift: {shift_id}
@@ -214,6 +265,74 @@ Saved to: food/{doc_id}"""
     return result
 
 
+# ========== BULK UPDATES ==========
+
+def save_patient_updates(
+    patient_id: str,
+    likes: str = '',
+    dislikes: str = '',
+    allergies: str = '',
+    notes: str = '',
+    instructions: Optional[List[str]] = None,
+    shift_id: str = '',
+    meals: str = ''
+) -> str:
+    """
+    Save several facts about a patient in one call and one atomic write.
+
+    Use this when one message contains several things to save, e.g. food
+    preferences plus care instructions plus what the patient ate. Only the
+    fields given are changed: likes, dislikes and allergies are added to the
+    stored lists (nothing stored is removed), notes replace the stored notes,
+    and existing preferences not mentioned are kept.
+
+    Args:
+        patient_id: Patient identifier (e.g., 'John')
+        likes: Comma-separated liked foods (optional)
+        dislikes: Comma-separated disliked foods (optional)
+        allergies: Comma-separated allergies (optional)
+        notes: Dietary notes (optional)
+        instructions: Care instructions to add, one per item (optional)
+        shift_id: Shift identifier for the food intake (e.g., 'shift-897')
+        meals: Description of meals consumed during the shift (optional)
+
+    Returns:
+        One confirmation covering everything saved
+    """
+    logger.info(f"🔧 Tool called: save_patient_updates")
+    logger.info(f"   Patient ID: {patient_id}")
+
+    def split(items: str) -> List[str]:
+        return [item.strip() for item in items.split(',') if item.strip()]
+
+    preferences = {field: split(value) for field, value in
+                   (('likes', likes), ('dislikes', dislikes), ('allergies', allergies)) if split(value)}
+    if notes.strip():
+        preferences['notes'] = notes.strip()
+    if preferences:
+        preferences['type'] = 'dietary_preferences'
+    instructions = [i.strip() for i in instructions or [] if i and i.strip()]
+    intake = {'shift_id': shift_id or 'current-shift', 'value': meals.strip()} if meals.strip() else None
+
+    service = get_firestore_native_service()
+    paths = service.save_patient_updates(patient_id, preferences, instructions, intake)
+
+    logger.info(f"✅ Tool completed successfully - {len(paths)} documents")
+    if is_compact():
+        return compact_json({'ok': bool(paths), 'saved': paths})
+    if not paths:
+        return f"Nothing to save for {patient_id}."
+
+    saved = []
+    if preferences:
+        saved.append("food preferences (" + ', '.join(k for k in preferences if k != 'type') + ")")
+    if instructions:
+        saved.append(f"{len(instructions)} care instruction{'s' if len(instructions) != 1 else ''}")
+    if intake:
+        saved.append(f"food intake for {intake['shift_id']}")
+    return f"✅ Saved for {patient_id}: {'; '.join(saved)}."
+
+
 # ========== GENERIC SAVE ==========
 
 def save_to_firestore_collection(
@@ -247,6 +366,10 @@ def save_to_firestore_collection(
     service = get_firestore_native_service()
     service.save_to_collection(collection, document_id, data_dict)
 
+    if is_compact():
+        logger.info(f"✅ Tool completed successfully")
+        return compact_json({'ok': True, 'saved': f"{collection}/{document_id}"})
+
     result = f"""✅ Data saved to Firestore!
 
 Collection: {collection}
@@ -271,6 +394,10 @@ def list_firestore_collections() -> str:
     service = get_firestore_native_service()
     collections = service.list_all_collections()
 
+    if is_compact():
+        logger.info(f"✅ Tool completed successfully")
+        return compact_json(collections)
+
     result = f"""📂 Firestore Collections ({len(collections)} total):
 
 """
@@ -281,6 +408,52 @@ def list_firestore_collections() -> str:
     return result
 
 
+def list_firestore_documents(collection: str, page_size: int = 50, page_token: str = '') -> str:
+    """
+    List one page of document IDs in a Firestore collection.
+
+    Args:
+        collection: Collection name
+        page_size: Number of document IDs per page (default: 50)
+        page_token: Token returned by the previous call to continue listing (optional)
+
+    Returns:
+        Document IDs and the token for the next page
+    """
+    logger.info(f"🔧 Tool called: list_firestore_documents")
+    logger.info(f"   Collection: {collection}")
+    logger.info(f"   Page token: {page_token}")
+
+    if page_size < 1:
+        logger.warning(f"⚠️  Invalid page size: {page_size}")
+        if is_compact():
+            return compact_json({'ok': False, 'error': 'page_size must be at least 1'})
+        return f"❌ Page size must be at least 1 (got {page_size})."
+
+    service = get_firestore_native_service()
+    page = service.list_documents_page(
+        collection, page_size=page_size, start_after=page_token or None
+    )
+
+    if is_compact():
+        logger.info(f"✅ Tool completed successfully")
+        return compact_json({'ids': page['documents'], 'next': page['next_page_token']})
+
+    result = f"""📂 Documents in {collection} ({len(page['documents'])} on this page):
+
+"""
+    for doc_id in page['documents']:
+        result += f"   • {doc_id}\n"
+
+    if page['next_page_token']:
+        result += f"\nMore documents available. Next page token: {page['next_page_token']}"
+    else:
+        result += "\nEnd of collection."
+
+    logger.info(f"✅ Tool completed successfully")
+    return result
+
+
 def check_firestore_document(collection: str, document_id: str) -> str:
     """
     Check if a document exists in Firestore and show its contents.
@@ -302,7 +475,11 @@ def check_firestore_document(collection: str, document_id: str) -> str:
     if not data:
         result = f"❌ Document not found: {collection}/{document_id}"
         logger.warning(f"⚠️  Document not found")
-        return result
+        return compact_json({'found': False}) if is_compact() else result
+
+    if is_compact():
+        logger.info(f"✅ Tool completed successfully")
+        return compact_json(data)
 
     result = f"""✅ Document found: {collection}/{document_id}
 
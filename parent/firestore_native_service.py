@@ -1,14 +1,35 @@
 """Firestore Native Service with detailed logging.
 
 This service connects to the 'default' Firestore Native database
-and logs all read/write operations for debugging.
+and logs all read/write operations for debugging. Storage goes through a
+pluggable backend (see storage_backends.py), so the same service can run
+against an in-memory or SQLite store for offline development.
+
+Read-modify-write operations (appending care instructions) run in backend
+transactions through `run_transaction()`. A transaction that conflicts with
+a concurrent writer is retried with jittered exponential backoff, bounded by
+TRANSACTION_MAX_ATTEMPTS attempts and a TRANSACTION_DEADLINE_SECONDS
+deadline; commits, retries, aborts and backoff time are counted per
+collection (`transaction_stats()`).
 """
 
 import os
 import logging
+import random
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-from google.cloud import firestore
+from typing import Callable, Dict, Iterator, List, Any, Optional, TypeVar, Union
+from team29.storage_backends import (
+    StorageBackend,
+    DocumentWrite,
+    Transaction,
+    TransactionConflict,
+    create_backend,
+    DEFAULT_PROJECT_ID,
+)
+from team29.write_journal import LIST_OPERATIONS, WriteJournal, JournalReplayer, extend_list, overlay_operation
+from team29.client_pool import get_client_pool
 
 # Configure logging
 logging.basicConfig(
@@ -17,25 +38,141 @@ logging.basicConfig(
 )
 logger = logging.getLogger('FirestoreNativeService')
 
+DEFAULT_TRANSACTION_MAX_ATTEMPTS = 5
+DEFAULT_TRANSACTION_DEADLINE_SECONDS = 10.0
+TRANSACTION_BASE_DELAY = 0.05
+TRANSACTION_MAX_DELAY = 2.0
+
+T = TypeVar('T')
+
 
 class FirestoreNativeService:
     """Service for Firestore Native database operations with logging."""
 
-    def __init__(self, project_id: Optional[str] = None, database: str = 'default'):
-        """Initialize Firestore Native client."""
+    def __init__(self, project_id: Optional[str] = None, database: str = 'default',
+                 backend: Union[StorageBackend, str, None] = None,
+                 journal_dir: Optional[str] = None):
+        """
+        Initialize the storage backend.
+
+        Args:
+            project_id: Google Cloud project (default: GOOGLE_CLOUD_PROJECT env var)
+            database: Firestore database id
+            backend: A StorageBackend instance or backend name ('firestore', 'memory',
+                'sqlite'). Defaults to the STORAGE_BACKEND env var, then 'firestore'.
+            journal_dir: Directory for the durable write journal (default: WRITE_JOURNAL_DIR
+                env var). When set, writes go to the local journal and are replayed to the
+                backend in the background; when unset, writes go straight to the backend.
+        """
         if project_id is None:
-            project_id = os.getenv('GOOGLE_CLOUD_PROJECT', 'qwiklabs-gcp-04-b310107eab82')
+            project_id = os.getenv('GOOGLE_CLOUD_PROJECT', DEFAULT_PROJECT_ID)
+
+        if not isinstance(backend, StorageBackend):
+            backend = create_backend(backend, project_id=project_id, database=database)
 
         logger.info(f"🔌 Connecting to Firestore Native...")
         logger.info(f"   Project: {project_id}")
         logger.info(f"   Database: {database}")
+        logger.info(f"   Backend: {backend.name}")
 
-        self.db = firestore.Client(project=project_id, database=database)
+        self.backend = backend
         self.project_id = project_id
         self.database = database
 
+        self.transaction_max_attempts = int(os.getenv('TRANSACTION_MAX_ATTEMPTS', DEFAULT_TRANSACTION_MAX_ATTEMPTS))
+        self.transaction_deadline = float(os.getenv('TRANSACTION_DEADLINE_SECONDS',
+                                                    DEFAULT_TRANSACTION_DEADLINE_SECONDS))
+        self._transaction_stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+
+        if journal_dir is None:
+            journal_dir = os.getenv('WRITE_JOURNAL_DIR')
+        self.journal = None
+        self.replayer = None
+        if journal_dir:
+            os.makedirs(journal_dir, exist_ok=True)
+            journal_path = os.path.join(journal_dir, f"{project_id}-{database}.journal.db")
+            self.journal = WriteJournal(journal_path)
+            # Replayed writes get the same retried, counted transactions as direct ones
+            self.replayer = JournalReplayer(self.journal, backend, run_transaction=self.run_transaction)
+            self.replayer.start()
+            get_client_pool().register_shutdown_hook(self.replayer.stop)
+            logger.info(f"   Write journal: {journal_path}")
+
         logger.info(f"✅ Connected to Firestore Native successfully!")
 
+    # ========== STORAGE HELPERS ==========
+
+    def _write(self, collection: str, doc_id: str, data: Dict[str, Any]) -> None:
+        """Merge-write a document, through the journal when it is enabled."""
+        if self.journal is None:
+            self.backend.set_document(collection, doc_id, data, merge=True)
+        else:
+            self.journal.append('set', collection, doc_id, data)
+            logger.info(f"   📝 Journaled; will be replayed to {collection}/{doc_id}")
+
+    def _read(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Read a document, including journaled writes not yet replayed."""
+        if self.journal is None:
+            return self.backend.get_document(collection, doc_id)
+        # No entry may be applied but not yet marked while backend and journal are read
+        with self.replayer.lock:
+            data = self.backend.get_document(collection, doc_id)
+            for entry in self.journal.pending_for(collection, doc_id):
+                data = overlay_operation(data, entry['op'], entry['payload'])
+        return data
+
+    # ========== TRANSACTIONS ==========
+
+    def _count_transaction(self, collection: str, outcome: str, backoff: float = 0.0) -> None:
+        with self._stats_lock:
+            stats = self._transaction_stats.setdefault(
+                collection, {'commits': 0, 'retries': 0, 'aborts': 0, 'backoff_seconds': 0.0})
+            stats[outcome] += 1
+            stats['backoff_seconds'] += backoff
+
+    def run_transaction(self, collection: str, func: Callable[[Transaction], T]) -> T:
+        """
+        Run a read-modify-write in a backend transaction, retrying on contention.
+
+        func may run several times and must compute its writes from its own reads.
+
+        Args:
+            collection: Collection the metrics are counted under (the contended one)
+            func: Reads through and writes to the Transaction it is given
+
+        Returns:
+            What func returned in the attempt that committed
+
+        Raises:
+            TransactionConflict: Still conflicting after the last attempt or at the deadline
+        """
+        deadline = time.monotonic() + self.transaction_deadline
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = self.backend.run_transaction(func)
+            except TransactionConflict as e:
+                delay = min(TRANSACTION_MAX_DELAY, TRANSACTION_BASE_DELAY * (2 ** (attempt - 1)))
+                delay = random.uniform(delay / 2, delay)
+                if attempt >= self.transaction_max_attempts or time.monotonic() + delay > deadline:
+                    self._count_transaction(collection, 'aborts')
+                    logger.error(f"❌ Transaction on {collection} aborted after {attempt} attempt(s): {e}")
+                    raise
+                self._count_transaction(collection, 'retries', delay)
+                logger.warning(f"⚠️  Transaction conflict on {collection} (attempt {attempt}), "
+                               f"retrying in {delay * 1000:.0f} ms")
+                time.sleep(delay)
+                continue
+            self._count_transaction(collection, 'commits')
+            return result
+
+    def transaction_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-collection transaction commits, retries, aborts and total backoff seconds."""
+        with self._stats_lock:
+            return {collection: dict(stats) for collection, stats in self._transaction_stats.items()}
+
     # ========== FOOD PREFERENCES ==========
 
     def save_food_preferences(self, patient_id: str, preferences: Dict[str, Any]) -> str:
@@ -58,8 +195,7 @@ class FirestoreNativeService:
         logger.info(f"   Data: {preferences}")
 
         try:
-            doc_ref = self.db.collection(collection).document(doc_id)
-            doc_ref.set(preferences, merge=True)
+            self._write(collection, doc_id, preferences)
 
             logger.info(f"✅ SUCCESS! Data saved to: {collection}/{doc_id}")
             logger.info(f"   Firestore path: projects/{self.project_id}/databases/{self.database}/documents/{collection}/{doc_id}")
@@ -80,11 +216,9 @@ class FirestoreNativeService:
         logger.info(f"   Document ID: {doc_id}")
 
         try:
-            doc_ref = self.db.collection(collection).document(doc_id)
-            doc = doc_ref.get()
+            data = self._read(collection, doc_id)
 
-            if doc.exists:
-                data = doc.to_dict()
+            if data is not None:
                 logger.info(f"✅ SUCCESS! Found document with {len(data)} fields")
                 logger.info(f"   Data: {data}")
                 return data
@@ -100,37 +234,54 @@ class FirestoreNativeService:
 
     def add_care_instruction(self, patient_id: str, instruction: str) -> None:
         """Add a care instruction for a patient."""
+        self.add_care_instructions(patient_id, [instruction])
+
+    def add_care_instructions(self, patient_id: str, instructions: List[str]) -> int:
+        """
+        Add several care instructions for a patient with one read-modify-write.
+
+        Returns:
+            Total number of instructions for the patient; when journaled, as
+            readers see it (stored plus pending journaled appends)
+        """
         collection = 'care-instructions'
         doc_id = patient_id
 
-        logger.info(f"💾 ADDING instruction to Firestore...")
+        logger.info(f"💾 ADDING {len(instructions)} instruction(s) to Firestore...")
         logger.info(f"   Collection: {collection}")
         logger.info(f"   Document ID: {doc_id}")
-        logger.info(f"   New instruction: {instruction}")
+        logger.info(f"   New instructions: {instructions}")
 
         try:
-            doc_ref = self.db.collection(collection).document(doc_id)
-
-            # Get existing instructions
-            doc = doc_ref.get()
-            if doc.exists:
-                current_instructions = doc.to_dict().get('instructions', [])
-                logger.info(f"   Found {len(current_instructions)} existing instructions")
-            else:
-                current_instructions = []
-                logger.info(f"   No existing instructions, creating new document")
-
-            # Add new instruction
-            current_instructions.append(instruction)
-
-            # Save back
-            doc_ref.set({'instructions': current_instructions}, merge=True)
-
-            logger.info(f"✅ SUCCESS! Instruction added to: {collection}/{doc_id}")
+            if self.journal is not None:
+                self.journal.append('append', collection, doc_id,
+                                    {'field': 'instructions', 'values': list(instructions)})
+                logger.info(f"✅ SUCCESS! Instructions journaled for: {collection}/{doc_id}")
+                return len((self._read(collection, doc_id) or {}).get('instructions', []))
+
+            def append(transaction: Transaction) -> List[str]:
+                # Get existing instructions
+                existing = transaction.get(collection, doc_id)
+                if existing is not None:
+                    current = existing.get('instructions', [])
+                    logger.info(f"   Found {len(current)} existing instructions")
+                else:
+                    current = []
+                    logger.info(f"   No existing instructions, creating new document")
+
+                # Add new instructions and save back
+                current = current + list(instructions)
+                transaction.set(collection, doc_id, {'instructions': current})
+                return current
+
+            current_instructions = self.run_transaction(collection, append)
+
+            logger.info(f"✅ SUCCESS! Instructions added to: {collection}/{doc_id}")
             logger.info(f"   Total instructions now: {len(current_instructions)}")
+            return len(current_instructions)
 
         except Exception as e:
-            logger.error(f"❌ ERROR adding instruction: {e}")
+            logger.error(f"❌ ERROR adding instructions: {e}")
             raise
 
     def get_care_instructions(self, patient_id: str) -> List[str]:
@@ -143,11 +294,10 @@ class FirestoreNativeService:
         logger.info(f"   Document ID: {doc_id}")
 
         try:
-            doc_ref = self.db.collection(collection).document(doc_id)
-            doc = doc_ref.get()
+            data = self._read(collection, doc_id)
 
-            if doc.exists:
-                instructions = doc.to_dict().get('instructions', [])
+            if data is not None:
+                instructions = data.get('instructions', [])
                 logger.info(f"✅ SUCCESS! Found {len(instructions)} instructions")
                 return instructions
             else:
@@ -171,8 +321,7 @@ class FirestoreNativeService:
         logger.info(f"   Intake: {intake}")
 
         try:
-            doc_ref = self.db.collection(collection).document(doc_id)
-            doc_ref.set({'value': intake, 'timestamp': datetime.utcnow()}, merge=True)
+            self._write(collection, doc_id, {'value': intake, 'timestamp': datetime.utcnow()})
 
             logger.info(f"✅ SUCCESS! Food intake saved to: {collection}/{doc_id}")
 
@@ -182,6 +331,74 @@ class FirestoreNativeService:
             logger.error(f"❌ ERROR saving food intake: {e}")
             raise
 
+    # ========== BULK PATIENT UPDATES ==========
+
+    def save_patient_updates(self, patient_id: str, preferences: Optional[Dict[str, Any]] = None,
+                             instructions: Optional[List[str]] = None,
+                             intake: Optional[Dict[str, str]] = None) -> List[str]:
+        """
+        Save food preferences, new care instructions and food intake in one atomic batch.
+
+        Args:
+            patient_id: Patient identifier
+            preferences: Preference fields to merge (e.g. {'likes': [...], 'allergies': [...]});
+                list values are added to the stored lists, other values replace them
+            instructions: Care instructions to append to the patient's list
+            intake: {'shift_id', 'value'} food intake for a shift
+
+        Returns:
+            Paths of the documents written
+        """
+        logger.info(f"💾 SAVING patient updates for {patient_id} in one batch...")
+
+        entries = []
+        if preferences:
+            scalars = {k: v for k, v in preferences.items() if not isinstance(v, list)}
+            if scalars:
+                entries.append(('set', 'food-preferences', patient_id, scalars))
+            # A merge would replace the whole stored list; add to it instead (ArrayUnion)
+            for field, values in preferences.items():
+                if isinstance(values, list):
+                    entries.append(('union', 'food-preferences', patient_id, {'field': field, 'values': values}))
+        if instructions:
+            entries.append(('append', 'care-instructions', patient_id,
+                            {'field': 'instructions', 'values': list(instructions)}))
+        if intake:
+            entries.append(('set', 'food', f"{patient_id}-{intake['shift_id']}",
+                            {'value': intake['value'], 'timestamp': datetime.utcnow()}))
+        if not entries:
+            return []
+
+        try:
+            if self.journal is not None:
+                self.journal.append_many([(op, collection, doc_id, payload, None)
+                                          for op, collection, doc_id, payload in entries])
+            else:
+                def save(transaction: Transaction) -> None:
+                    # All reads before the writes
+                    existing = {(collection, doc_id): transaction.get(collection, doc_id) or {}
+                                for op, collection, doc_id, _ in entries if op in LIST_OPERATIONS}
+                    for op, collection, doc_id, payload in entries:
+                        if op in LIST_OPERATIONS:
+                            current = existing[(collection, doc_id)].get(payload['field'], [])
+                            payload = {payload['field']: extend_list(op, current, payload['values'])}
+                        transaction.set(collection, doc_id, payload)
+
+                contended = [collection for op, collection, _, _ in entries if op in LIST_OPERATIONS]
+                if contended:
+                    self.run_transaction(contended[-1], save)
+                else:
+                    # Nothing to read: a plain atomic batch
+                    self.backend.set_documents([(c, d, p) for _, c, d, p in entries], merge=True)
+
+            paths = list(dict.fromkeys(f"{collection}/{doc_id}" for _, collection, doc_id, _ in entries))
+            logger.info(f"✅ SUCCESS! Saved {', '.join(paths)}")
+            return paths
+
+        except Exception as e:
+            logger.error(f"❌ ERROR saving patient updates: {e}")
+            raise
+
     # ========== GENERIC OPERATIONS ==========
 
     def save_to_collection(self, collection: str, doc_id: str, data: Dict[str, Any]) -> str:
@@ -192,8 +409,7 @@ class FirestoreNativeService:
         logger.info(f"   Data keys: {list(data.keys())}")
 
         try:
-            doc_ref = self.db.collection(collection).document(doc_id)
-            doc_ref.set(data, merge=True)
+            self._write(collection, doc_id, data)
 
             logger.info(f"✅ SUCCESS! Data saved to: {collection}/{doc_id}")
             logger.info(f"   Full path: projects/{self.project_id}/databases/{self.database}/documents/{collection}/{doc_id}")
@@ -206,6 +422,31 @@ class FirestoreNativeService:
             logger.error(f"   Document ID: {doc_id}")
             raise
 
+    def save_many_to_collection(self, writes: List[DocumentWrite]) -> int:
+        """
+        Save several documents in one atomic batch (merge semantics).
+
+        Args:
+            writes: (collection, doc_id, data) tuples, at most MAX_BATCH_WRITES
+
+        Returns:
+            Number of documents written
+        """
+        logger.info(f"💾 SAVING batch of {len(writes)} documents to Firestore...")
+
+        try:
+            if self.journal is None:
+                self.backend.set_documents(writes, merge=True)
+            else:
+                self.journal.append_many([('set', collection, doc_id, data, None)
+                                          for collection, doc_id, data in writes])
+            logger.info(f"✅ SUCCESS! Batch of {len(writes)} documents saved")
+            return len(writes)
+
+        except Exception as e:
+            logger.error(f"❌ ERROR saving batch to Firestore: {e}")
+            raise
+
     def read_from_collection(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
         """Generic read operation with logging."""
         logger.info(f"📖 READING from Firestore...")
@@ -213,11 +454,9 @@ class FirestoreNativeService:
         logger.info(f"   Document ID: {doc_id}")
 
         try:
-            doc_ref = self.db.collection(collection).document(doc_id)
-            doc = doc_ref.get()
+            data = self._read(collection, doc_id)
 
-            if doc.exists:
-                data = doc.to_dict()
+            if data is not None:
                 logger.info(f"✅ SUCCESS! Document found with {len(data)} fields")
                 return data
             else:
@@ -233,10 +472,10 @@ class FirestoreNativeService:
         logger.info(f"📂 LISTING all collections...")
 
         try:
-            collections = [col.id for col in self.db.collections()]
-            logger.info(f"✅ Found {len(collections)} collections:")
+            collections = self.backend.list_collections()
+            logger.info(f"✅ Found {len(collections)} collections")
             for col in collections:
-                logger.info(f"   - {col}")
+                logger.debug(f"   - {col}")
             return collections
 
         except Exception as e:
@@ -248,12 +487,11 @@ class FirestoreNativeService:
         logger.info(f"📂 LISTING documents in collection: {collection}")
 
         try:
-            docs = self.db.collection(collection).limit(limit).stream()
-            doc_ids = [doc.id for doc in docs]
+            doc_ids = self.backend.list_documents(collection, limit=limit)
 
-            logger.info(f"✅ Found {len(doc_ids)} documents:")
+            logger.info(f"✅ Found {len(doc_ids)} documents")
             for doc_id in doc_ids:
-                logger.info(f"   - {doc_id}")
+                logger.debug(f"   - {doc_id}")
 
             return doc_ids
 
@@ -261,18 +499,122 @@ class FirestoreNativeService:
             logger.error(f"❌ ERROR listing documents: {e}")
             raise
 
+    # ========== PAGINATED LISTINGS ==========
+
+    def list_documents_page(
+        self,
+        collection: str,
+        page_size: int = 100,
+        start_after: Optional[str] = None,
+        keys_only: bool = True,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Read one page of a collection, ordered by document ID.
+
+        Args:
+            collection: Collection name
+            page_size: Maximum number of documents to return
+            start_after: Cursor token from a previous page (the last document ID seen)
+            keys_only: Return only document IDs (cheapest read)
+            fields: Top-level fields to return when keys_only is False (default: all)
+
+        Returns:
+            Dict with 'documents' (IDs, or {'id', 'data'} dicts when keys_only is False)
+            and 'next_page_token' (None when the collection is exhausted)
+
+        Raises:
+            ValueError: If page_size is less than 1
+        """
+        if page_size < 1:
+            raise ValueError(f"page_size must be at least 1, got {page_size}")
+        logger.info(f"📂 LISTING page of collection: {collection}")
+        logger.info(f"   Page size: {page_size} | Start after: {start_after}")
+
+        try:
+            rows = self.backend.query_page(
+                collection, page_size, start_after=start_after, keys_only=keys_only, fields=fields
+            )
+            if keys_only:
+                documents = [doc_id for doc_id, _ in rows]
+            else:
+                documents = [{'id': doc_id, 'data': data} for doc_id, data in rows]
+            next_page_token = rows[-1][0] if len(rows) == page_size else None
 
-# Singleton instance
-_firestore_native_service = None
+            logger.info(f"✅ Page has {len(rows)} documents (more: {next_page_token is not None})")
+            return {'documents': documents, 'next_page_token': next_page_token}
 
+        except Exception as e:
+            logger.error(f"❌ ERROR listing documents page: {e}")
+            raise
 
-def get_firestore_native_service() -> FirestoreNativeService:
-    """Get or create singleton Firestore Native service instance."""
-    global _firestore_native_service
-    if _firestore_native_service is None:
-        logger.info("🔧 Creating new FirestoreNativeService instance...")
-        _firestore_native_service = FirestoreNativeService()
-    return _firestore_native_service
+    def stream_documents(
+        self,
+        collection: str,
+        page_size: int = 500,
+        start_after: Optional[str] = None,
+        keys_only: bool = True,
+        fields: Optional[List[str]] = None
+    ) -> Iterator[Any]:
+        """
+        Walk a whole collection page by page, holding one page in memory at a time.
+
+        Yields document IDs when keys_only is True, otherwise (doc_id, data) tuples.
+
+        Raises:
+            ValueError: If page_size is less than 1 (raised here, not on first iteration)
+        """
+        if page_size < 1:
+            raise ValueError(f"page_size must be at least 1, got {page_size}")
+        return self._stream_pages(collection, page_size, start_after, keys_only, fields)
+
+    def _stream_pages(self, collection: str, page_size: int, start_after: Optional[str],
+                      keys_only: bool, fields: Optional[List[str]]) -> Iterator[Any]:
+        logger.info(f"📂 STREAMING collection: {collection} (page size {page_size})")
+
+        cursor = start_after
+        total = 0
+        while True:
+            rows = self.backend.query_page(
+                collection, page_size, start_after=cursor, keys_only=keys_only, fields=fields
+            )
+            for doc_id, data in rows:
+                yield doc_id if keys_only else (doc_id, data)
+            total += len(rows)
+            if len(rows) < page_size:
+                break
+            cursor = rows[-1][0]
+
+        logger.info(f"✅ Streamed {total} documents from {collection}")
+
+    def stream_collections(self) -> Iterator[str]:
+        """Yield collection IDs lazily instead of materializing the full list."""
+        return self.backend.iter_collections()
+
+
+# Service instances, one per (project, database)
+_firestore_native_services: Dict[tuple, FirestoreNativeService] = {}
+_services_lock = threading.Lock()
+
+
+def get_firestore_native_service(project_id: Optional[str] = None,
+                                 database: str = 'default') -> FirestoreNativeService:
+    """Get or create the shared service for a project and database.
+
+    The underlying Firestore clients are shared through the client pool,
+    so asking for the same database from several places reuses one channel.
+    """
+    if project_id is None:
+        project_id = os.getenv('GOOGLE_CLOUD_PROJECT', DEFAULT_PROJECT_ID)
+    key = (project_id, database)
+
+    with _services_lock:
+        service = _firestore_native_services.get(key)
+        if service is None:
+            logger.info("🔧 Creating new FirestoreNativeService instance...")
+            service = FirestoreNativeService(project_id=project_id, database=database)
+            _firestore_native_services[key] = service
+        return service
 
 
 # Example usage and testing
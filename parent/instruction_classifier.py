@@ -0,0 +1,201 @@
+"""Multi-label classifier for caregiver instructions and care plans.
+
+Every keyword and synonym of the vocabulary is compiled into one
+Aho-Corasick automaton, so each line is scanned once, character by
+character, whatever the size of the vocabulary; a whole care plan is
+classified in time linear in its length. Matches only count on word
+boundaries ("nap" does not match inside "snap"), though a number may
+precede a keyword ("10mg").
+
+A line gets every category whose keywords it contains. Header lines
+set the section for the lines below them and are not returned
+themselves: lines ending in ':' ("Morning routine:"), markdown headings
+("# EVENING"), and short lines of only category keywords and filler
+words ("MEDICATIONS") when the next line is an indented or bulleted
+item. Bulleted lines are never headers, so "- Eye drops" or a lone
+"Insulin" stay instructions. A line without a time-of-day keyword
+inherits the time-of-day of its section, and a line that matches
+nothing goes to the section category or, outside any section, to
+'special_notes'.
+
+The vocabulary maps category -> keywords and can be extended or
+replaced, e.g. to add Dutch synonyms:
+
+    vocabulary = dict(DEFAULT_VOCABULARY, medications=DEFAULT_VOCABULARY['medications'] + ['medicijnen'])
+    InstructionClassifier(vocabulary).parse(text)
+"""
+
+import io
+import re
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+DEFAULT_VOCABULARY: Dict[str, List[str]] = {
+    'morning': ['morning', 'mornings', 'breakfast', 'wake up', 'wakes up', 'waking', 'sunrise', 'a.m.'],
+    'afternoon': ['afternoon', 'afternoons', 'lunch', 'midday', 'noon', 'nap'],
+    'evening': ['evening', 'evenings', 'dinner', 'supper', 'bedtime', 'bed time', 'night', 'nighttime',
+                'tonight', 'overnight', 'p.m.'],
+    'medications': ['medication', 'medications', 'medicine', 'medicines', 'meds', 'pill', 'pills',
+                    'tablet', 'tablets', 'dose', 'doses', 'prescription', 'insulin', 'inhaler',
+                    'eye drops', 'mg'],
+    'special_notes': ['allergy', 'allergic', 'important', 'never', 'always', 'emergency', 'warning',
+                      'do not', "don't", 'avoid', 'note'],
+}
+TIME_OF_DAY = ('morning', 'afternoon', 'evening')
+DEFAULT_CATEGORY = 'special_notes'
+
+HEADER_PREFIX = re.compile(r'^\s*#+\s*')
+# "- item", "* item", "• item", "1. item", "2) item"
+BULLET_PREFIX = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+')
+# Words that may appear in a header next to category keywords
+HEADER_FILLER = {'routine', 'routines', 'schedule', 'care', 'plan', 'tasks', 'section', 'and', 'the', 'list'}
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over lowercase keywords."""
+
+    def __init__(self, keywords: Dict[str, Iterable[str]]):
+        # Trie as parallel lists: transitions, failure link, outputs (label, length)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[str, int]]] = [[]]
+
+        for label, words in keywords.items():
+            for word in words:
+                word = word.lower()
+                if not word:
+                    continue
+                state = 0
+                for char in word:
+                    next_state = self._goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(self._goto)
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._out.append([])
+                        self._goto[state][char] = next_state
+                    state = next_state
+                self._out[state].append((label, len(word)))
+
+        # Breadth-first failure links; outputs inherit those of their failure state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """Yield (label, start, end) for every whole-word keyword in text."""
+        lowered = text.lower()
+        state = 0
+        for i, char in enumerate(lowered):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for label, length in self._out[state]:
+                start = i - length + 1
+                # Letters may not continue the word; digits may precede it ("10mg")
+                if start > 0 and lowered[start - 1].isalpha():
+                    continue
+                if i + 1 < len(lowered) and lowered[i + 1].isalpha():
+                    continue
+                yield label, start, i + 1
+
+    def labels(self, text: str) -> Set[str]:
+        return {label for label, _, _ in self.find(text)}
+
+
+class InstructionClassifier:
+    """Streams instruction lines into multi-label categories."""
+
+    def __init__(self, vocabulary: Dict[str, List[str]] = None):
+        self.vocabulary = vocabulary or DEFAULT_VOCABULARY
+        self.categories = list(self.vocabulary)
+        if DEFAULT_CATEGORY not in self.categories:
+            self.categories.append(DEFAULT_CATEGORY)
+        self._automaton = KeywordAutomaton(self.vocabulary)
+
+    @staticmethod
+    def _is_item(raw: str) -> bool:
+        """An indented or bulleted line (the content of a section)."""
+        return raw[:1].isspace() or bool(BULLET_PREFIX.match(raw))
+
+    def _header_kind(self, raw: str, line: str, matches: List[Tuple[str, int, int]]) -> Optional[str]:
+        """'header', 'candidate' (a header only if items follow) or None."""
+        if BULLET_PREFIX.match(raw):
+            return None
+        if HEADER_PREFIX.match(line) or line.endswith(':'):
+            return 'header'
+        if not matches or len(line.split()) > 4:
+            return None
+        # A short line made only of keywords and filler words, e.g. "MORNING ROUTINE"
+        remainder = list(line.lower())
+        for _, start, end in matches:
+            remainder[start:end] = ' ' * (end - start)
+        words = re.findall(r"[a-z']+", ''.join(remainder))
+        return 'candidate' if all(word in HEADER_FILLER for word in words) else None
+
+    def _categories(self, line: str, labels: Set[str], section: Set[str]) -> Tuple[str, List[str]]:
+        if not labels & set(TIME_OF_DAY):
+            labels = labels | (section & set(TIME_OF_DAY))
+        if not labels:
+            labels = section or {DEFAULT_CATEGORY}
+        return line, [c for c in self.categories if c in labels]
+
+    def classify(self, lines: Iterable[str]) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Yield (line, categories) for every content line, in order.
+
+        Args:
+            lines: Any iterable of lines, e.g. an open file
+        """
+        section: Set[str] = set()
+        # Keyword-only line waiting for the next line to decide whether it is a header
+        candidate: Optional[Tuple[str, Set[str]]] = None
+        for raw in lines:
+            line = raw.strip()
+            if not line:
+                continue
+            if candidate is not None:
+                if self._is_item(raw):
+                    section = candidate[1]
+                else:
+                    yield self._categories(candidate[0], candidate[1], section)
+                candidate = None
+
+            matches = list(self._automaton.find(line))
+            labels = {label for label, _, _ in matches}
+            kind = self._header_kind(raw, line, matches)
+            if kind == 'header':
+                section = labels
+            elif kind == 'candidate':
+                candidate = (line, labels)
+            else:
+                yield self._categories(line, labels, section)
+
+        if candidate is not None:
+            yield self._categories(candidate[0], candidate[1], section)
+
+    def parse(self, instructions: str) -> Dict[str, List[str]]:
+        """Categories -> lines for a whole document (a line may appear under several)."""
+        categories: Dict[str, List[str]] = {c: [] for c in self.categories}
+        for line, labels in self.classify(io.StringIO(instructions)):
+            for label in labels:
+                categories[label].append(line)
+        return categories
+
+
+_default_classifier = None
+
+
+def get_instruction_classifier() -> InstructionClassifier:
+    """Shared classifier compiled from DEFAULT_VOCABULARY."""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = InstructionClassifier()
+    return _default_classifier
@@ -0,0 +1,288 @@
+"""Per-patient statistical irregularity detection.
+
+Each day is reduced to a feature vector (FEATURES): steps per hour of
+the day, daily steps, hours away from home, overnight bathroom visits,
+sleep hours, meals eaten, social interactions and the medication flag.
+`IrregularityDetector` keeps an exponentially weighted mean and variance
+of every feature as the patient's baseline, folding in each completed
+day once, and scores a day with one vectorized z-score over the whole
+vector:
+
+- movement   - daily steps well below baseline, or several usually active
+               hours of the day far below their hourly baseline
+- presence   - hours away far above baseline
+- bathroom   - overnight bathroom visits far above baseline
+- sleep      - sleep hours far from baseline in either direction
+- meals      - meals eaten far below baseline
+- social     - social interactions far below baseline
+- medication - missed dose (threshold check, no baseline needed)
+
+Z-score checks start once MIN_BASELINE_DAYS days have been folded in.
+Detected records keep the {type, severity, description, timestamp, date}
+shape of the mock generator.
+"""
+
+import threading
+from datetime import date as date_cls, timedelta
+from typing import Callable, Dict, List, Any, Optional
+
+import numpy as np
+
+from team29.mock_engine import DEFAULT_PATIENT_ID, get_mock_engine, parse_date
+from team29.timeseries_store import get_timeseries_store
+
+HOURS = 24
+FEATURES = [f'activity_{h:02d}' for h in range(HOURS)] + [
+    'steps', 'away_hours', 'overnight_bathroom_visits', 'sleep_hours',
+    'meals_eaten', 'social_interactions', 'medication_taken',
+]
+F = {name: i for i, name in enumerate(FEATURES)}
+
+# Baseline: EWMA with this half-life; z-checks need this many days folded in
+HALFLIFE_DAYS = 14
+MIN_BASELINE_DAYS = 7
+# History folded in before the first detected day
+WARMUP_DAYS = 28
+
+Z_MEDIUM = 2.0
+Z_HIGH = 3.0
+# Hours of the day in which inactivity is checked, and how many must be low
+ACTIVE_HOURS = np.arange(8, 21)
+LOW_HOURS_REQUIRED = 3
+# Floor on the standard deviation so near-constant features don't alert on noise
+MIN_STD = np.array([25.0] * HOURS + [250.0, 0.5, 0.5, 0.25, 0.25, 0.5, 0.1])
+
+# Time reported for checks that describe the whole day
+REPORT_TIMES = {
+    'presence': '18:00',
+    'bathroom': '06:00',
+    'sleep': '07:00',
+    'meals': '20:00',
+    'social': '20:00',
+    'medication': '09:00',
+}
+
+FeatureLoader = Callable[[str, date_cls, int], np.ndarray]
+
+
+def load_day_features(patient_id: str, start: date_cls, days: int) -> np.ndarray:
+    """
+    Feature vectors for a date range, shaped (days, len(FEATURES)).
+
+    Hourly and daily steps come from the time-series store for days it holds
+    samples or a daily report for (see TimeSeriesStore.daily_movement), and
+    from the mock engine otherwise.
+    """
+    engine = get_mock_engine()
+    data = engine.generate(start, days)
+    p = engine.patient_index(patient_id)
+
+    hourly = data['hourly_activity'][p].astype(float)
+    steps = data['total_steps'][p].astype(float)
+    store = get_timeseries_store()
+    if store is not None:
+        for i in range(days):
+            day = start + timedelta(days=i)
+            if store.has_day(patient_id, 'movement', day):
+                hourly[i] = store.hourly_rollup(patient_id, 'movement', day)['steps']
+        movement = store.daily_movement(patient_id, start, days)
+        steps = np.where(movement['measured'], movement['steps'], steps)
+
+    features = np.empty((days, len(FEATURES)))
+    features[:, :HOURS] = hourly
+    features[:, F['steps']] = steps
+    features[:, F['away_hours']] = data['away_hours'][p]
+    features[:, F['overnight_bathroom_visits']] = data['overnight_bathroom_visits'][p]
+    features[:, F['sleep_hours']] = data['sleep_hours'][p]
+    features[:, F['meals_eaten']] = data['meals_eaten'][p].sum(axis=-1)
+    features[:, F['social_interactions']] = data['social_interactions'][p]
+    features[:, F['medication_taken']] = data['medication_compliance'][p]
+    return features
+
+
+def evaluate(features: np.ndarray, mean: np.ndarray, var: np.ndarray,
+             count: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Score days against their baselines.
+
+    Args:
+        features: (N, F) feature vectors
+        mean, var: (N, F) baseline before each day
+        count: (N,) number of days in each baseline
+
+    Returns:
+        Dict with the (N, F) z-scores under 'z', and per check type an (N,)
+        severity array (0 = none, 1 = low, 2 = medium, 3 = high)
+    """
+    z = (features - mean) / np.maximum(np.sqrt(var), MIN_STD)
+    ready = (count >= MIN_BASELINE_DAYS)
+
+    def level(score: np.ndarray, base: int = 2) -> np.ndarray:
+        """Severity for a one-sided score: base at Z_MEDIUM, base + 1 at Z_HIGH."""
+        return np.where(ready & (score >= Z_HIGH), base + 1,
+                        np.where(ready & (score >= Z_MEDIUM), base, 0))
+
+    low_hours = (z[:, ACTIVE_HOURS] <= -Z_MEDIUM).sum(axis=1)
+    movement = np.maximum(level(-z[:, F['steps']]),
+                          np.where(ready & (low_hours >= LOW_HOURS_REQUIRED), 2, 0))
+
+    return {
+        'z': z,
+        'movement': movement,
+        'presence': np.where(level(z[:, F['away_hours']]) > 0, 3, 0),
+        'bathroom': level(z[:, F['overnight_bathroom_visits']]),
+        'sleep': level(np.abs(z[:, F['sleep_hours']]), base=1),
+        'meals': level(-z[:, F['meals_eaten']]),
+        'social': np.where(level(-z[:, F['social_interactions']]) > 0, 1, 0),
+        'medication': np.where(features[:, F['medication_taken']] < 1, 3, 0),
+    }
+
+
+CHECKS = ('movement', 'presence', 'bathroom', 'sleep', 'meals', 'social', 'medication')
+SEVERITIES = {1: 'low', 2: 'medium', 3: 'high'}
+
+
+class IrregularityDetector:
+    """Incremental per-patient baselines and z-score irregularity checks."""
+
+    def __init__(self, patient_id: str = DEFAULT_PATIENT_ID, loader: FeatureLoader = load_day_features,
+                 halflife_days: float = HALFLIFE_DAYS):
+        self.patient_id = patient_id
+        self.loader = loader
+        self.alpha = 1 - 0.5 ** (1 / halflife_days)
+        self.first_date: Optional[date_cls] = None
+        # Baseline state before each day: index i describes first_date + i
+        self._mean: List[np.ndarray] = []
+        self._var: List[np.ndarray] = []
+        self._count: List[int] = []
+        self._lock = threading.RLock()
+
+    # ========== BASELINES ==========
+
+    def _fold(self, features: np.ndarray) -> None:
+        """Fold completed days, in order, into the baseline."""
+        mean, var, count = self._mean[-1], self._var[-1], self._count[-1]
+        for x in features:
+            if count == 0:
+                mean, var = x.copy(), np.zeros_like(x)
+            else:
+                diff = x - mean
+                increment = self.alpha * diff
+                mean = mean + increment
+                var = (1 - self.alpha) * (var + diff * increment)
+            count += 1
+            self._mean.append(mean)
+            self._var.append(var)
+            self._count.append(count)
+
+    def _ensure_baselines(self, start: date_cls, end: date_cls) -> None:
+        """Have baselines for every day in [start, end]."""
+        with self._lock:
+            if self.first_date is None or start < self.first_date:
+                self.first_date = start - timedelta(days=WARMUP_DAYS)
+                self._mean = [np.zeros(len(FEATURES))]
+                self._var = [np.zeros(len(FEATURES))]
+                self._count = [0]
+            last = self.first_date + timedelta(days=len(self._count) - 1)
+            if end > last:
+                self._fold(self.loader(self.patient_id, last, (end - last).days))
+
+    def _snapshot(self, start: date_cls, days: int) -> Dict[str, np.ndarray]:
+        """
+        Baselines before each day of a range, copied under the lock.
+
+        A query from an earlier date rebuilds the lists, so they are never
+        indexed outside the lock.
+        """
+        with self._lock:
+            self._ensure_baselines(start, start + timedelta(days=days - 1))
+            lo = (start - self.first_date).days
+            return {
+                'mean': np.stack(self._mean[lo:lo + days]),
+                'var': np.stack(self._var[lo:lo + days]),
+                'count': np.array(self._count[lo:lo + days]),
+            }
+
+    def baseline(self, date: Any) -> Dict[str, Any]:
+        """Baseline mean and standard deviation per feature before a day."""
+        snapshot = self._snapshot(parse_date(date), 1)
+        return {
+            'days': int(snapshot['count'][0]),
+            'mean': dict(zip(FEATURES, snapshot['mean'][0].tolist())),
+            'std': dict(zip(FEATURES, np.sqrt(snapshot['var'][0]).tolist())),
+        }
+
+    # ========== DETECTION ==========
+
+    def _score(self, start: date_cls, days: int) -> Dict[str, np.ndarray]:
+        baseline = self._snapshot(start, days)
+        features = self.loader(self.patient_id, start, days)
+        result = evaluate(features, baseline['mean'], baseline['var'], baseline['count'])
+        result['features'] = features
+        result['mean'] = baseline['mean']
+        return result
+
+    def count_range(self, start: Any, days: int) -> np.ndarray:
+        """Number of irregularities detected on each day of a range, shaped (days,)."""
+        scores = self._score(parse_date(start), days)
+        return np.sum([scores[check] > 0 for check in CHECKS], axis=0)
+
+    def detect(self, date: Any) -> List[Dict[str, Any]]:
+        """Irregularity records for one day, most severe first."""
+        day = parse_date(date)
+        date_str = str(day)
+        s = self._score(day, 1)
+        x, mean, z = s['features'][0], s['mean'][0], s['z'][0]
+        records = []
+
+        def add(kind: str, description: str, timestamp: Optional[str] = None):
+            records.append({
+                'type': kind,
+                'severity': SEVERITIES[int(s[kind][0])],
+                'description': description,
+                'timestamp': timestamp or REPORT_TIMES[kind],
+                'date': date_str,
+            })
+
+        if s['movement'][0]:
+            hour = int(ACTIVE_HOURS[np.argmin(z[ACTIVE_HOURS])])
+            if z[F['steps']] <= -Z_MEDIUM:
+                description = (f"Significantly lower activity than usual "
+                               f"({int(x[F['steps']])} steps vs {int(mean[F['steps']])} typical)")
+            else:
+                description = "Inactive during usually active hours"
+            add('movement', description, f"{hour:02d}:00")
+        if s['presence'][0]:
+            add('presence', f"Extended time away from home "
+                            f"({x[F['away_hours']]:.1f} h vs {mean[F['away_hours']]:.1f} h typical)")
+        if s['bathroom'][0]:
+            add('bathroom', f"Unusual number of overnight bathroom visits "
+                            f"({int(x[F['overnight_bathroom_visits']])} vs "
+                            f"{mean[F['overnight_bathroom_visits']]:.1f} typical)")
+        if s['sleep'][0]:
+            add('sleep', f"Sleep {'longer' if z[F['sleep_hours']] > 0 else 'shorter'} than usual "
+                         f"({x[F['sleep_hours']]:.1f} h vs {mean[F['sleep_hours']]:.1f} h typical)")
+        if s['meals'][0]:
+            add('meals', f"Skipped multiple meals ({int(x[F['meals_eaten']])} of 3 eaten)")
+        if s['social'][0]:
+            add('social', "Fewer social interactions than usual "
+                          f"({int(x[F['social_interactions']])} vs "
+                          f"{mean[F['social_interactions']]:.1f} typical)")
+        if s['medication'][0]:
+            add('medication', "Missed medication dose")
+
+        order = {'high': 0, 'medium': 1, 'low': 2}
+        records.sort(key=lambda r: order[r['severity']])
+        return records
+
+
+_detectors: Dict[str, IrregularityDetector] = {}
+_detectors_lock = threading.Lock()
+
+
+def get_irregularity_detector(patient_id: str = DEFAULT_PATIENT_ID) -> IrregularityDetector:
+    """Get or create the shared detector for a patient."""
+    with _detectors_lock:
+        if patient_id not in _detectors:
+            _detectors[patient_id] = IrregularityDetector(patient_id)
+        return _detectors[patient_id]
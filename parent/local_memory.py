@@ -0,0 +1,231 @@
+"""Local, relevance-ranked memory service.
+
+`LocalMemoryService` implements the ADK memory service interface
+(`add_session_to_memory` / `search_memory`) in process, so the memories
+PreloadMemoryTool injects on every turn come from a fast local lookup
+instead of a remote service, and work offline.
+
+- Every text event of a saved session becomes one memory, indexed in an
+  inverted index (term -> {memory: term count}) per (app, user). Events
+  already indexed are skipped, so sessions can be submitted whole or as
+  the incremental deltas of memory_ingest.py.
+- A search scores the memories sharing a term with the query with BM25
+  and weighs the score by recency (RECENCY_HALFLIFE_DAYS), so of two
+  equally relevant memories the newer one wins.
+- Results are cut to a hard token budget (MAX_MEMORY_TOKENS, ~4
+  characters per token), best first, so preloading can never grow the
+  prompt by more than that.
+
+Set LOCAL_MEMORY_PATH to keep memories across restarts in a JSONL file.
+The service is handed to the Runner like any other memory service:
+`runner.create_runner()` uses it when PARENT_MEMORY_SERVICE=local, and
+any Runner can be given `get_local_memory_service()` directly.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from google.adk.memory.base_memory_service import BaseMemoryService, SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+from google.genai import types
+
+logger = logging.getLogger('LocalMemory')
+
+MAX_MEMORY_TOKENS = 800
+MAX_RESULTS = 10
+RECENCY_HALFLIFE_DAYS = 30
+# Share of the score that depends on recency (the rest is pure relevance)
+RECENCY_WEIGHT = 0.3
+BM25_K1 = 1.2
+BM25_B = 0.75
+CHARS_PER_TOKEN = 4
+
+TERM = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'do', 'for', 'from', 'has', 'have', 'he',
+    'her', 'his', 'i', 'in', 'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or', 'she', 'so', 'that',
+    'the', 'their', 'them', 'they', 'this', 'to', 'was', 'we', 'what', 'with', 'you', 'your',
+}
+
+UserKey = Tuple[str, str]
+
+
+def _stem(term: str) -> str:
+    """Strip common English suffixes so 'sleeping' and 'sleep' share a term."""
+    for suffix in ('ing', 'ed', 's'):
+        if term.endswith(suffix) and len(term) - len(suffix) >= 3:
+            return term[:-len(suffix)]
+    return term
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(t) for t in TERM.findall(text.lower()) if t not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def event_text(event: Any) -> str:
+    """Concatenated text parts of an event ('' if it has none)."""
+    content = getattr(event, 'content', None)
+    if not content or not content.parts:
+        return ''
+    return ' '.join(part.text for part in content.parts if getattr(part, 'text', None)).strip()
+
+
+class MemoryIndex:
+    """Inverted index over the memories of one (app, user)."""
+
+    def __init__(self):
+        # Memory i: {'id', 'session_id', 'author', 'timestamp', 'text'}
+        self.memories: List[Dict[str, Any]] = []
+        self.lengths: List[int] = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.ids = set()
+        self.total_length = 0
+
+    def add(self, memory: Dict[str, Any]) -> bool:
+        if memory['id'] in self.ids:
+            return False
+        terms = Counter(tokenize(memory['text']))
+        i = len(self.memories)
+        self.memories.append(memory)
+        self.lengths.append(sum(terms.values()))
+        self.total_length += self.lengths[-1]
+        self.ids.add(memory['id'])
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[i] = count
+        return True
+
+    def search(self, query: str, now: float, limit: int) -> List[Tuple[float, int]]:
+        """(score, memory index) of the best matches, best first."""
+        n = len(self.memories)
+        if not n:
+            return []
+        average_length = self.total_length / n or 1
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for i, count in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[i] / average_length)
+                scores[i] = scores.get(i, 0.0) + idf * count * (BM25_K1 + 1) / (count + norm)
+
+        ranked = []
+        for i, score in scores.items():
+            age_days = max(0.0, now - self.memories[i]['timestamp']) / 86400
+            recency = 0.5 ** (age_days / RECENCY_HALFLIFE_DAYS)
+            ranked.append((score * (1 - RECENCY_WEIGHT + RECENCY_WEIGHT * recency), i))
+        ranked.sort(reverse=True)
+        return ranked[:limit]
+
+
+class LocalMemoryService(BaseMemoryService):
+    """In-process memory service with relevance + recency ranking and a token budget."""
+
+    def __init__(self, path: Optional[str] = None, max_tokens: int = MAX_MEMORY_TOKENS,
+                 max_results: int = MAX_RESULTS):
+        self.path = path
+        self.max_tokens = max_tokens
+        self.max_results = max_results
+        self._indexes: Dict[UserKey, MemoryIndex] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def _load(self, path: str) -> None:
+        loaded = 0
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"⚠️  Skipping unreadable memory line in {path}")
+                    continue
+                key = (record.pop('app_name'), record.pop('user_id'))
+                loaded += self._indexes.setdefault(key, MemoryIndex()).add(record)
+        logger.info(f"🧠 Loaded {loaded} memories from {path}")
+
+    async def add_session_to_memory(self, session: Any) -> None:
+        key = (session.app_name, session.user_id)
+        added = []
+        with self._lock:
+            index = self._indexes.setdefault(key, MemoryIndex())
+            for event in session.events:
+                text = event_text(event)
+                if not text:
+                    continue
+                memory = {
+                    'id': event.id,
+                    'session_id': session.id,
+                    'author': event.author,
+                    'timestamp': event.timestamp,
+                    'text': text,
+                }
+                if index.add(memory):
+                    added.append(memory)
+
+        if added and self.path:
+            with open(self.path, 'a') as f:
+                for memory in added:
+                    f.write(json.dumps(dict(memory, app_name=key[0], user_id=key[1])) + '\n')
+        if added:
+            logger.info(f"🧠 Indexed {len(added)} memories from session {session.id}")
+
+    async def search_memory(self, *, app_name: str, user_id: str, query: str) -> SearchMemoryResponse:
+        with self._lock:
+            index = self._indexes.get((app_name, user_id))
+            ranked = index.search(query, time.time(), self.max_results) if index else []
+            memories = [index.memories[i] for _, i in ranked]
+
+        response = SearchMemoryResponse()
+        budget = self.max_tokens
+        for memory in memories:
+            text = memory['text']
+            tokens = estimate_tokens(text)
+            if tokens > budget:
+                if response.memories:
+                    continue
+                # Even the best memory is over budget: keep its beginning
+                text = text[:budget * CHARS_PER_TOKEN].rstrip() + '…'
+                tokens = budget
+            budget -= tokens
+            response.memories.append(MemoryEntry(
+                content=types.Content(role='user' if memory['author'] == 'user' else 'model',
+                                      parts=[types.Part(text=text)]),
+                author=memory['author'],
+                timestamp=datetime.fromtimestamp(memory['timestamp']).isoformat(),
+            ))
+            if budget <= 0:
+                break
+        return response
+
+
+_local_memory_service: Optional[LocalMemoryService] = None
+_service_lock = threading.Lock()
+
+
+def get_local_memory_service() -> LocalMemoryService:
+    """Get or create the shared local memory service (LOCAL_MEMORY_PATH, LOCAL_MEMORY_MAX_TOKENS)."""
+    global _local_memory_service
+    with _service_lock:
+        if _local_memory_service is None:
+            _local_memory_service = LocalMemoryService(
+                path=os.getenv('LOCAL_MEMORY_PATH') or None,
+                max_tokens=int(os.getenv('LOCAL_MEMORY_MAX_TOKENS', MAX_MEMORY_TOKENS)),
+            )
+        return _local_memory_service
+
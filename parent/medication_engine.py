@@ -0,0 +1,252 @@
+"""Medication dose calendar and timing-aware compliance.
+
+Prescriptions (as in `generate_medical_documentation()`:
+{'name', 'dosage', 'frequency'}) are expanded into a dose calendar for
+a date range: one scheduled datetime per dose, held as sorted NumPy
+datetime64 arrays per medication. Administered doses
+({'medication_id', 'time'}) are grouped by medication id in one pass,
+and each scheduled dose is matched to the nearest administration with a
+binary search, so a month of doses for every medication is scored in
+O((scheduled + taken) log taken) rather than a scan per dose.
+
+Every scheduled dose is classified:
+- on_time - taken within ON_TIME_MINUTES of the scheduled time
+- late    - taken after that but within LATE_MINUTES
+- missed  - no administration inside the window
+
+Medication ids are the lowercased medication name with spaces replaced
+by underscores ('Metformin' -> 'metformin'), unless a prescription has
+an explicit 'id'. A prescription whose frequency has no fixed dose times
+(e.g. 'as needed') is left out of the calendar and reported as
+unscheduled instead of failing the whole report.
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Sequence
+
+import numpy as np
+
+from team29.mock_engine import parse_date
+
+logger = logging.getLogger('MedicationEngine')
+
+# Dose times of day by frequency
+FREQUENCY_TIMES = {
+    'once daily': ['08:00'],
+    'daily': ['08:00'],
+    'every morning': ['08:00'],
+    'twice daily': ['08:00', '20:00'],
+    'three times daily': ['08:00', '14:00', '20:00'],
+    'four times daily': ['08:00', '12:00', '16:00', '20:00'],
+    'at bedtime': ['21:00'],
+    'every evening': ['20:00'],
+}
+EVERY_N_HOURS = re.compile(r'every\s+(\d+)\s+hours?')
+FIRST_DOSE_HOUR = 8
+
+# Matching windows around each scheduled dose
+EARLY_MINUTES = 60
+ON_TIME_MINUTES = 60
+LATE_MINUTES = 240
+
+
+def medication_id(prescription: Dict[str, Any]) -> str:
+    """Stable id of a prescribed medication."""
+    return prescription.get('id') or prescription['name'].strip().lower().replace(' ', '_')
+
+
+def dose_times(frequency: str) -> List[str]:
+    """
+    Times of day ('HH:MM') for a frequency string.
+
+    Raises:
+        ValueError: If the frequency is not recognised
+    """
+    key = frequency.strip().lower()
+    if key in FREQUENCY_TIMES:
+        return FREQUENCY_TIMES[key]
+    match = EVERY_N_HOURS.fullmatch(key)
+    if match:
+        interval = int(match.group(1))
+        if not 1 <= interval <= 24:
+            raise ValueError(f"Unsupported dose interval: {frequency!r}")
+        hours = sorted(h % 24 for h in range(FIRST_DOSE_HOUR, FIRST_DOSE_HOUR + 24, interval))
+        return [f"{h:02d}:00" for h in hours]
+    raise ValueError(f"Unknown medication frequency: {frequency!r}")
+
+
+def _offsets(times: Sequence[str]) -> np.ndarray:
+    """'HH:MM' strings as timedelta64 minutes after midnight."""
+    return np.array([int(t[:2]) * 60 + int(t[3:5]) for t in times], dtype='timedelta64[m]')
+
+
+class DoseCalendar:
+    """Scheduled doses of a set of prescriptions over a date range."""
+
+    def __init__(self, prescriptions: List[Dict[str, Any]], start_date: Any, days: int):
+        self.start = parse_date(start_date)
+        self.days = days
+        self.medications: Dict[str, Dict[str, Any]] = {}
+        # Sorted datetime64[m] arrays of scheduled doses per medication id
+        self.doses: Dict[str, np.ndarray] = {}
+        # Prescriptions without fixed dose times, with the reason
+        self.unscheduled: List[Dict[str, Any]] = []
+
+        midnights = np.arange(np.datetime64(self.start), np.datetime64(self.start + timedelta(days=days)))
+        midnights = midnights.astype('datetime64[m]')
+        for prescription in prescriptions:
+            med_id = medication_id(prescription)
+            try:
+                offsets = _offsets(prescription.get('times') or dose_times(prescription.get('frequency', '')))
+            except ValueError as e:
+                logger.warning(f"⚠️  Not scheduling {prescription.get('name', med_id)}: {e}")
+                self.unscheduled.append({'medication': prescription.get('name', med_id),
+                                         'frequency': prescription.get('frequency', ''), 'reason': str(e)})
+                continue
+            self.medications[med_id] = prescription
+            self.doses[med_id] = np.sort((midnights[:, None] + offsets[None, :]).ravel())
+
+    def scheduled_count(self) -> int:
+        return int(sum(len(d) for d in self.doses.values()))
+
+    def doses_on(self, date: Any) -> List[Dict[str, Any]]:
+        """Scheduled doses of one day, in time order."""
+        day = np.datetime64(parse_date(date)).astype('datetime64[m]')
+        result = []
+        for med_id, doses in self.doses.items():
+            lo, hi = np.searchsorted(doses, [day, day + np.timedelta64(1, 'D')])
+            prescription = self.medications[med_id]
+            for dose in doses[lo:hi]:
+                result.append({
+                    'medication_id': med_id,
+                    'name': prescription['name'],
+                    'dosage': prescription.get('dosage', ''),
+                    'time': str(dose).replace('T', ' ') + ':00',
+                })
+        return sorted(result, key=lambda d: d['time'])
+
+
+def _parse_time(value: Any) -> np.datetime64:
+    if isinstance(value, datetime):
+        return np.datetime64(value, 'm')
+    return np.datetime64(str(value).replace(' ', 'T'), 'm')
+
+
+def group_administrations(taken: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Administered doses grouped by medication id, as sorted datetime64[m] arrays."""
+    grouped: Dict[str, List[np.datetime64]] = {}
+    for record in taken:
+        if record.get('time') is None:
+            continue
+        grouped.setdefault(record.get('medication_id'), []).append(_parse_time(record['time']))
+    return {med_id: np.sort(np.array(times, dtype='datetime64[m]')) for med_id, times in grouped.items()}
+
+
+def classify_doses(scheduled: np.ndarray, taken: np.ndarray) -> np.ndarray:
+    """
+    Classify sorted scheduled doses against sorted administration times.
+
+    Each administration satisfies at most one dose: the first dose whose
+    window it falls into.
+
+    Returns:
+        Array of 'on_time' / 'late' / 'missed' per scheduled dose
+    """
+    status = np.full(len(scheduled), 'missed', dtype=object)
+    if len(scheduled) == 0 or len(taken) == 0:
+        return status
+
+    # First administration at or after the start of each dose window
+    first = np.searchsorted(taken, scheduled - np.timedelta64(EARLY_MINUTES, 'm'))
+    candidate = np.minimum(first, len(taken) - 1)
+    delay = (taken[candidate] - scheduled).astype(int)
+    matched = (first < len(taken)) & (delay <= LATE_MINUTES)
+
+    window = EARLY_MINUTES + LATE_MINUTES
+    if len(scheduled) < 2 or np.diff(scheduled).astype(int).min() > window:
+        # Disjoint windows: no administration can match two doses
+        status[matched] = np.where(np.abs(delay[matched]) <= ON_TIME_MINUTES, 'on_time', 'late')
+        return status
+
+    # An administration inside two overlapping windows only counts for the first dose
+    used = np.zeros(len(taken), dtype=bool)
+    for i in np.flatnonzero(matched):
+        j = candidate[i]
+        while j < len(taken) and used[j]:
+            j += 1
+        if j == len(taken) or (taken[j] - scheduled[i]).astype(int) > LATE_MINUTES:
+            continue
+        used[j] = True
+        status[i] = 'on_time' if abs(int((taken[j] - scheduled[i]).astype(int))) <= ON_TIME_MINUTES else 'late'
+    return status
+
+
+def compute_compliance(prescriptions: List[Dict[str, Any]], taken: List[Dict[str, Any]],
+                       start_date: Any, days: int, as_of: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    On-time / late / missed compliance for a date range.
+
+    Args:
+        prescriptions: {'name', 'dosage', 'frequency'} dicts (optional 'id', 'times')
+        taken: Administered doses, {'medication_id', 'time': 'YYYY-MM-DD HH:MM:SS'}
+        start_date: First day of the range
+        days: Number of days
+        as_of: Only score doses scheduled up to this time; later doses are
+            reported as upcoming (default: score the whole range)
+
+    Returns:
+        Dict with totals, rates, per-medication counts, the missed doses and
+        the prescriptions that could not be scheduled ('unscheduled')
+    """
+    calendar = DoseCalendar(prescriptions, start_date, days)
+    administered = group_administrations(taken)
+    empty = np.array([], dtype='datetime64[m]')
+    cutoff = np.datetime64(as_of, 'm') if as_of is not None else None
+
+    totals = {'on_time': 0, 'late': 0, 'missed': 0}
+    by_medication = {}
+    missed_doses = []
+    upcoming = 0
+    for med_id, doses in calendar.doses.items():
+        if cutoff is not None:
+            due = np.searchsorted(doses, cutoff, side='right')
+            upcoming += len(doses) - due
+            doses = doses[:due]
+        status = classify_doses(doses, administered.get(med_id, empty))
+        counts = {key: int((status == key).sum()) for key in totals}
+        for key in totals:
+            totals[key] += counts[key]
+        by_medication[calendar.medications[med_id]['name']] = dict(counts, scheduled=len(doses))
+        missed_doses.extend(
+            {'medication': calendar.medications[med_id]['name'], 'scheduled': str(dose).replace('T', ' ') + ':00'}
+            for dose in doses[status == 'missed']
+        )
+
+    scheduled = calendar.scheduled_count() - upcoming
+    taken_rate = (totals['on_time'] + totals['late']) / scheduled * 100 if scheduled else 0
+    on_time_rate = totals['on_time'] / scheduled * 100 if scheduled else 0
+    return {
+        'start_date': str(calendar.start),
+        'days': days,
+        'scheduled': scheduled,
+        **totals,
+        'upcoming': upcoming,
+        'compliance_rate': round(taken_rate, 1),
+        'on_time_rate': round(on_time_rate, 1),
+        'by_medication': by_medication,
+        'missed_doses': sorted(missed_doses, key=lambda d: d['scheduled']),
+        'unscheduled': calendar.unscheduled,
+        'status': 'good' if taken_rate >= 90 else 'needs_attention'
+    }
+
+
+def current_prescriptions(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Medications of the most recent prescription per medication name."""
+    latest: Dict[str, Dict[str, Any]] = {}
+    for doc in sorted(documents, key=lambda d: d.get('date', '')):
+        if doc.get('type') == 'prescription':
+            for med in doc.get('medications', []):
+                latest[medication_id(med)] = med
+    return list(latest.values())
@@ -0,0 +1,243 @@
+"""Incremental, background session-to-memory ingestion.
+
+Submitting the whole session to the memory service after every agent
+turn makes each turn wait for an upload that grows with the
+conversation. `MemoryIngestor` instead:
+
+- keeps a watermark per session (the number of events already
+  submitted) and submits only the events after it, as a copy of the
+  session holding just those events
+- debounces: a turn only schedules a flush; the flush runs once the
+  session has been quiet for `debounce_seconds`, or right away when
+  `max_batch_events` new events are pending, so a burst of turns becomes
+  one submission
+- runs flushes as background asyncio tasks, off the response path; a
+  failed flush keeps the watermark, so its events go out with the next one
+- flushes a session when it ends (`flush_session()`, called by
+  `team29.runner.end_session()`), and drains every pending session on the
+  event loop that scheduled it: `drain()` is registered as that loop's
+  client-pool shutdown hook (run by `close_runner()` / `aclose()`), and a
+  debounce timer cancelled by the loop shutting down flushes instead of
+  dropping its batch
+
+Memory services that replace everything stored for a session id on each
+call (ADK's InMemoryMemoryService) would lose earlier events if given
+only the new ones; they get the whole session, still debounced and in
+the background.
+
+    root_agent = Agent(..., after_agent_callback=ingest_session_to_memory_callback)
+
+Configuration: MEMORY_INGEST_DEBOUNCE_SECONDS (default 2) and
+MEMORY_INGEST_MAX_BATCH (default 50).
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+from team29.client_pool import get_client_pool
+
+logger = logging.getLogger('MemoryIngest')
+
+DEFAULT_DEBOUNCE_SECONDS = 2.0
+DEFAULT_MAX_BATCH_EVENTS = 50
+# Memory services that key stored events by session id and overwrite them
+REPLACING_MEMORY_SERVICES = ('InMemoryMemoryService',)
+
+SessionKey = Tuple[str, str, str]
+
+
+def session_key(session: Any) -> SessionKey:
+    return session.app_name, session.user_id, session.id
+
+
+def session_delta(session: Any, start: int) -> Any:
+    """Copy of a session holding only its events from index `start` on."""
+    return session.model_copy(update={'events': list(session.events[start:])})
+
+
+class MemoryIngestor:
+    """Debounced background submission of new session events to a memory service."""
+
+    def __init__(self, debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+                 max_batch_events: int = DEFAULT_MAX_BATCH_EVENTS):
+        self.debounce_seconds = debounce_seconds
+        self.max_batch_events = max_batch_events
+        # Events of each session already submitted
+        self._watermarks: Dict[SessionKey, int] = {}
+        # Latest (memory service, session) seen for sessions with unsubmitted events
+        self._pending: Dict[SessionKey, Tuple[Any, Any]] = {}
+        # Loop that last scheduled each session; its flushes and drain run there
+        self._loops: Dict[SessionKey, asyncio.AbstractEventLoop] = {}
+        self._timers: Dict[SessionKey, asyncio.Task] = {}
+        self._flushing: Dict[Tuple[asyncio.AbstractEventLoop, SessionKey], asyncio.Lock] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        # Loops whose client-pool shutdown runs drain()
+        self._hooked_loops: Set[asyncio.AbstractEventLoop] = set()
+        self._lock = threading.Lock()
+        self.submissions = 0
+        self.events_submitted = 0
+        self.failures = 0
+
+    def pending_events(self, session: Any) -> int:
+        """Events of a session not yet submitted."""
+        return len(session.events) - self._watermarks.get(session_key(session), 0)
+
+    # ========== SCHEDULING ==========
+
+    def schedule(self, memory_service: Any, session: Any) -> None:
+        """
+        Note that a session has new events and schedule their submission.
+
+        Must be called from a running event loop; returns immediately.
+        """
+        key = session_key(session)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._pending[key] = (memory_service, session)
+            self._loops[key] = loop
+            timer = self._timers.pop(key, None)
+            hook = loop not in self._hooked_loops
+            self._hooked_loops.add(loop)
+        if timer is not None:
+            timer.cancel()
+        if hook:
+            get_client_pool().register_shutdown_hook(self.drain)
+
+        delay = 0 if self.pending_events(session) >= self.max_batch_events else self.debounce_seconds
+        task = loop.create_task(self._flush_after(key, delay))
+        with self._lock:
+            self._timers[key] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_after(self, key: SessionKey, delay: float) -> None:
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            with self._lock:
+                # Still the session's timer: cancelled by the loop shutting down, not rescheduled
+                current = self._timers.get(key) is asyncio.current_task()
+                if current:
+                    del self._timers[key]
+            if current:
+                await self._flush(key)
+            raise
+        with self._lock:
+            if self._timers.get(key) is asyncio.current_task():
+                del self._timers[key]
+        await self._flush(key)
+
+    # ========== FLUSHING ==========
+
+    async def _flush(self, key: SessionKey) -> int:
+        """Submit the pending events of one session. Returns how many were submitted."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # asyncio locks belong to one loop
+            lock = self._flushing.setdefault((loop, key), asyncio.Lock())
+        async with lock:
+            with self._lock:
+                pending = self._pending.pop(key, None)
+            if pending is None:
+                return 0
+            memory_service, session = pending
+            start = self._watermarks.get(key, 0)
+            end = len(session.events)
+            if end <= start:
+                return 0
+
+            replaces = type(memory_service).__name__ in REPLACING_MEMORY_SERVICES
+            try:
+                await memory_service.add_session_to_memory(session if replaces else session_delta(session, start))
+            except asyncio.CancelledError:
+                with self._lock:
+                    self._pending.setdefault(key, pending)
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"⚠️  Memory ingestion failed for session {key[2]} "
+                               f"({end - start} events kept for the next flush): {e}")
+                with self._lock:
+                    self._pending.setdefault(key, pending)
+                return 0
+
+            self._watermarks[key] = end
+            self.submissions += 1
+            self.events_submitted += end - start
+            logger.info(f"🧠 Saved {end - start} new events of session {key[2]} to memory")
+            return end - start
+
+    async def flush_session(self, session: Any, memory_service: Any = None) -> int:
+        """
+        Submit a session's pending events now (e.g. when the session ends).
+
+        Args:
+            session: The session, as current as possible
+            memory_service: Submit to this service even if no turn scheduled the
+                session yet (default: the one its last turn scheduled with)
+        """
+        key = session_key(session)
+        with self._lock:
+            if memory_service is not None:
+                self._pending[key] = (memory_service, session)
+            elif key in self._pending:
+                self._pending[key] = (self._pending[key][0], session)
+            timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        return await self._flush(key)
+
+    async def flush_all(self) -> int:
+        """Submit the pending events of every session scheduled from the running loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # Sessions of this loop, and orphans of loops that have closed
+            keys = [key for key in self._pending
+                    if self._loops.get(key, loop) is loop or self._loops[key].is_closed()]
+            timers = [self._timers.pop(key) for key in keys if key in self._timers]
+        for timer in timers:
+            timer.cancel()
+        results = await asyncio.gather(*(self._flush(key) for key in keys))
+        return sum(results)
+
+    async def drain(self) -> int:
+        """Flush every pending session and wait for this loop's in-flight flushes."""
+        submitted = await self.flush_all()
+        loop = asyncio.get_running_loop()
+        current = asyncio.current_task()
+        running = [task for task in self._tasks if task.get_loop() is loop and task is not current]
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        with self._lock:
+            self._hooked_loops.discard(loop)
+            for stale in [k for k in self._flushing if k[0] is loop]:
+                del self._flushing[stale]
+        return submitted
+
+
+_memory_ingestor: Optional[MemoryIngestor] = None
+_ingestor_lock = threading.Lock()
+
+
+def get_memory_ingestor() -> MemoryIngestor:
+    """Get or create the shared ingestor; it drains each loop's pending sessions at that loop's shutdown."""
+    global _memory_ingestor
+    with _ingestor_lock:
+        if _memory_ingestor is None:
+            _memory_ingestor = MemoryIngestor(
+                debounce_seconds=float(os.getenv('MEMORY_INGEST_DEBOUNCE_SECONDS', DEFAULT_DEBOUNCE_SECONDS)),
+                max_batch_events=int(os.getenv('MEMORY_INGEST_MAX_BATCH', DEFAULT_MAX_BATCH_EVENTS)),
+            )
+        return _memory_ingestor
+
+
+async def ingest_session_to_memory_callback(callback_context) -> None:
+    """after_agent_callback: schedule the turn's new events for background memory ingestion."""
+    invocation = callback_context._invocation_context
+    if invocation.memory_service is None:
+        return None
+    get_memory_ingestor().schedule(invocation.memory_service, invocation.session)
+    return None
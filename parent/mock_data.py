@@ -1,145 +1,96 @@
-"""Mock data generators for testing the workshop management system."""
+"""Mock data generators for testing the workshop management system.
+
+Movement, presence, motion sensor, behavior, irregularity and appointment
+data are views over the seeded NumPy engine in mock_engine.py, so the same
+date always returns the same numbers.
+"""
 
 from datetime import datetime, timedelta
 import random
 from typing import Dict, List, Any, Optional
 
+import numpy as np
 
-def generate_appointments(days_ahead: int = 7) -> List[Dict[str, Any]]:
-    """Generate mock appointments for the next N days."""
-    appointments = []
-    appointment_types = ['doctor', 'therapy', 'social', 'exercise', 'medication_review']
-    titles = {
-        'doctor': ['Dr. Smith - Check-up', 'Dr. Johnson - Follow-up', 'Specialist Consultation'],
-        'therapy': ['Physical Therapy', 'Occupational Therapy', 'Speech Therapy'],
-        'social': ['Community Center Visit', 'Family Gathering', 'Book Club'],
-        'exercise': ['Water Aerobics', 'Walking Group', 'Gentle Yoga'],
-        'medication_review': ['Pharmacy Consultation', 'Medication Adjustment']
-    }
+from team29.medication_engine import DoseCalendar
+from team29.mock_engine import get_mock_engine, parse_date
 
-    base_time = datetime.now()
-    for day in range(days_ahead):
-        num_appointments = random.randint(0, 3)
-        for _ in range(num_appointments):
-            apt_type = random.choice(appointment_types)
-            apt_time = base_time + timedelta(days=day, hours=random.randint(8, 18))
-
-            appointments.append({
-                'id': f'apt_{len(appointments) + 1}',
-                'title': random.choice(titles[apt_type]),
-                'type': apt_type,
-                'time': apt_time.strftime("%Y-%m-%d %H:%M:%S"),
-                'duration_minutes': random.choice([30, 45, 60]),
-                'notes': f'Remember to bring previous records.' if apt_type == 'doctor' else ''
-            })
 
+def generate_appointments(days_ahead: int = 7, start_date: Optional[str] = None,
+                          patient_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Generate mock appointments (0-3 per day) for N days from start_date (default today)."""
+    start = parse_date(start_date or datetime.now().strftime("%Y-%m-%d"))
+    engine = get_mock_engine()
+    appointments = []
+    for day in range(days_ahead):
+        date = (start + timedelta(days=day)).isoformat()
+        appointments.extend(engine.appointment_records(date, patient_id))
     return appointments
 
 
-def generate_movement_data(date: Optional[str] = None) -> Dict[str, Any]:
+def generate_recurring_appointments() -> List[Dict[str, Any]]:
+    """Generate mock recurring appointment rules (see appointment_calendar.py)."""
+    return [
+        {
+            'id': 'physio_weekly',
+            'title': 'Physical Therapy',
+            'type': 'therapy',
+            'weekday': 'tuesday',
+            'time': '10:00',
+            'duration_minutes': 45,
+            'location': 'City Rehab Center',
+            'notes': 'Wear comfortable shoes.'
+        },
+        {
+            'id': 'walking_group',
+            'title': 'Walking Group',
+            'type': 'exercise',
+            'weekday': 'friday',
+            'time': '09:30',
+            'duration_minutes': 60,
+            'location': 'Riverside Park',
+            'notes': ''
+        }
+    ]
+
+
+def generate_movement_data(date: Optional[str] = None, patient_id: Optional[str] = None) -> Dict[str, Any]:
     """Generate mock movement and activity data."""
     if date is None:
         date = datetime.now().strftime("%Y-%m-%d")
 
-    return {
-        'date': date,
-        'total_steps': random.randint(1000, 8000),
-        'active_minutes': random.randint(30, 180),
-        'sedentary_minutes': random.randint(300, 600),
-        'distance_km': round(random.uniform(0.5, 5.0), 2),
-        'calories_burned': random.randint(200, 800),
-        'hourly_activity': [random.randint(0, 500) for _ in range(24)]
-    }
+    return get_mock_engine().movement_record(date, patient_id)
 
 
-def generate_presence_data(date: Optional[str] = None) -> Dict[str, Any]:
+def generate_presence_data(date: Optional[str] = None, patient_id: Optional[str] = None) -> Dict[str, Any]:
     """Generate mock presence and location data."""
     if date is None:
         date = datetime.now().strftime("%Y-%m-%d")
 
-    return {
-        'date': date,
-        'home_hours': round(random.uniform(18, 24), 1),
-        'away_hours': round(random.uniform(0, 6), 1),
-        'outings': [
-            {
-                'time': f'{h:02d}:00',
-                'duration_minutes': random.randint(30, 180),
-                'location': random.choice(['grocery store', 'park', 'community center', 'unknown'])
-            }
-            for h in random.sample(range(8, 18), random.randint(0, 2))
-        ]
-    }
+    return get_mock_engine().presence_record(date, patient_id)
 
 
-def generate_motion_sensor_data(date: Optional[str] = None) -> Dict[str, Any]:
+def generate_motion_sensor_data(date: Optional[str] = None, patient_id: Optional[str] = None) -> Dict[str, Any]:
     """Generate mock motion sensor data from various rooms."""
     if date is None:
         date = datetime.now().strftime("%Y-%m-%d")
 
-    rooms = ['bedroom', 'bathroom', 'kitchen', 'living_room', 'hallway']
-    active_rooms = random.sample(rooms, random.randint(3, 5))
-
-    return {
-        'date': date,
-        'active_rooms': active_rooms,
-        'activity_by_room': {
-            room: {
-                'triggers': random.randint(5, 50),
-                'last_activity': f'{random.randint(0, 23):02d}:{random.randint(0, 59):02d}',
-                'total_minutes': random.randint(30, 300)
-            }
-            for room in active_rooms
-        },
-        'overnight_bathroom_visits': random.randint(0, 4),
-        'unusual_patterns': random.choice([True, False])
-    }
+    return get_mock_engine().motion_sensor_record(date, patient_id)
 
 
-def generate_daily_behavior_data(date: Optional[str] = None) -> Dict[str, Any]:
+def generate_daily_behavior_data(date: Optional[str] = None, patient_id: Optional[str] = None) -> Dict[str, Any]:
     """Generate mock behavioral data for the day."""
     if date is None:
         date = datetime.now().strftime("%Y-%m-%d")
 
-    return {
-        'date': date,
-        'sleep_hours': round(random.uniform(5, 9), 1),
-        'sleep_quality': random.choice(['good', 'fair', 'poor']),
-        'meal_times': [
-            {'meal': 'breakfast', 'time': '08:30', 'eaten': random.choice([True, False])},
-            {'meal': 'lunch', 'time': '12:30', 'eaten': random.choice([True, False])},
-            {'meal': 'dinner', 'time': '18:00', 'eaten': random.choice([True, False])}
-        ],
-        'mood': random.choice(['happy', 'content', 'neutral', 'anxious', 'sad']),
-        'social_interactions': random.randint(0, 5),
-        'medication_compliance': random.choice([True, True, True, False])  # 75% compliant
-    }
+    return get_mock_engine().behavior_record(date, patient_id)
 
 
-def generate_irregularities(date: Optional[str] = None) -> List[Dict[str, Any]]:
-    """Generate mock irregularity alerts."""
+def generate_irregularities(date: Optional[str] = None, patient_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Generate mock irregularity alerts (0-2 per day)."""
     if date is None:
         date = datetime.now().strftime("%Y-%m-%d")
 
-    possible_irregularities = [
-        {'type': 'movement', 'severity': 'medium', 'description': 'Significantly lower activity than usual'},
-        {'type': 'presence', 'severity': 'high', 'description': 'Extended time away from home without notice'},
-        {'type': 'sleep', 'severity': 'low', 'description': 'Slightly different sleep pattern'},
-        {'type': 'medication', 'severity': 'high', 'description': 'Missed medication dose'},
-        {'type': 'bathroom', 'severity': 'medium', 'description': 'Unusual number of overnight bathroom visits'},
-        {'type': 'meals', 'severity': 'medium', 'description': 'Skipped multiple meals'},
-        {'type': 'social', 'severity': 'low', 'description': 'No social interactions today'}
-    ]
-
-    # Return 0-2 irregularities
-    num_irregularities = random.randint(0, 2)
-    irregularities = random.sample(possible_irregularities, num_irregularities)
-
-    for irr in irregularities:
-        irr['date'] = date
-        irr['timestamp'] = f'{random.randint(0, 23):02d}:{random.randint(0, 59):02d}'
-
-    return irregularities
+    return get_mock_engine().irregularity_records(date, patient_id)
 
 
 def generate_caregiver_profile() -> Dict[str, Any]:
@@ -194,3 +145,41 @@ def generate_medical_documentation() -> List[Dict[str, Any]]:
             'summary': 'Patient in good health, continue current medications'
         }
     ]
+
+
+def generate_medication_log(prescriptions: List[Dict[str, Any]], start_date: str, days: int,
+                            patient_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Generate mock administered doses for a date range.
+
+    Each day's doses are drawn from a generator seeded with (seed, patient,
+    date), so a day shows the same doses in every query window. Days the
+    engine marks as medication-compliant have every dose taken; on other
+    days about a third of the doses (at least one) are missed. Taken doses
+    are usually within an hour of the scheduled time, sometimes a few hours late.
+    """
+    engine = get_mock_engine()
+    patient = engine.patient_index(patient_id)
+    compliant = engine.generate(start_date, days)['medication_compliance'][patient] if days > 0 else []
+    start = datetime.combine(parse_date(start_date), datetime.min.time())
+
+    log = []
+    for offset, day_compliant in enumerate(compliant):
+        day = start + timedelta(days=offset)
+        rng = np.random.default_rng([engine.seed, patient, day.toordinal()])
+        calendar = DoseCalendar(prescriptions, day, 1)
+        med_ids = [med_id for med_id, doses in calendar.doses.items() for _ in doses]
+        doses = np.concatenate(list(calendar.doses.values())) if med_ids else np.array([], 'datetime64[m]')
+
+        taken = np.ones(len(doses), dtype=bool)
+        if not day_compliant and len(doses):
+            taken = rng.random(len(doses)) >= 1 / 3
+            if taken.all():
+                taken[rng.integers(len(doses))] = False
+        delay = np.where(rng.random(len(doses)) < 0.85,
+                         rng.normal(10, 20, len(doses)),
+                         rng.uniform(60, 240, len(doses))).astype(int)
+        times = doses + delay.astype('timedelta64[m]')
+        log.extend({'medication_id': med_id, 'time': str(t).replace('T', ' ') + ':00'}
+                   for med_id, t, was_taken in zip(med_ids, times, taken) if was_taken)
+    return log
@@ -0,0 +1,356 @@
+"""Seeded, vectorized engine behind the mock data generators.
+
+`MockDataEngine` generates a whole month of synthetic data for every
+patient in its roster in one pass: NumPy arrays shaped (patients, days)
+or (patients, days, slots) for movement, presence, motion sensors,
+behavior, irregularities and appointments. Each month block is drawn
+from its own generator seeded with (seed, year, month), so the same seed
+and roster always produce the same numbers, no matter which dates are
+requested or in what order.
+
+The `generate_*` functions in mock_data.py are thin views that turn one
+(patient, day) slice of a block back into the familiar dicts. Large
+synthetic populations can use the arrays directly:
+
+    engine = MockDataEngine(seed=7, patient_ids=[f'patient-{i}' for i in range(1000)])
+    year = engine.generate('2025-01-01', 365)
+    year['hourly_activity'].shape  # (1000, 365, 24)
+
+Configuration for the shared engine: MOCK_DATA_SEED (default 29) and
+MOCK_PATIENT_IDS (comma-separated, default 'John').
+"""
+
+import calendar
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import date as date_cls, datetime, timedelta
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger('MockEngine')
+
+DEFAULT_SEED = 29
+DEFAULT_PATIENT_ID = 'John'
+
+ROOMS = ['bedroom', 'bathroom', 'kitchen', 'living_room', 'hallway']
+OUTING_LOCATIONS = ['grocery store', 'park', 'community center', 'unknown']
+OUTING_HOURS = np.arange(8, 18)
+SLEEP_QUALITIES = ['good', 'fair', 'poor']
+MOODS = ['happy', 'content', 'neutral', 'anxious', 'sad']
+MEALS = [('breakfast', '08:30'), ('lunch', '12:30'), ('dinner', '18:00')]
+POSSIBLE_IRREGULARITIES = [
+    {'type': 'movement', 'severity': 'medium', 'description': 'Significantly lower activity than usual'},
+    {'type': 'presence', 'severity': 'high', 'description': 'Extended time away from home without notice'},
+    {'type': 'sleep', 'severity': 'low', 'description': 'Slightly different sleep pattern'},
+    {'type': 'medication', 'severity': 'high', 'description': 'Missed medication dose'},
+    {'type': 'bathroom', 'severity': 'medium', 'description': 'Unusual number of overnight bathroom visits'},
+    {'type': 'meals', 'severity': 'medium', 'description': 'Skipped multiple meals'},
+    {'type': 'social', 'severity': 'low', 'description': 'No social interactions today'}
+]
+APPOINTMENT_TITLES = {
+    'doctor': ['Dr. Smith - Check-up', 'Dr. Johnson - Follow-up', 'Specialist Consultation'],
+    'therapy': ['Physical Therapy', 'Occupational Therapy', 'Speech Therapy'],
+    'social': ['Community Center Visit', 'Family Gathering', 'Book Club'],
+    'exercise': ['Water Aerobics', 'Walking Group', 'Gentle Yoga'],
+    'medication_review': ['Pharmacy Consultation', 'Medication Adjustment']
+}
+APPOINTMENT_TYPES = list(APPOINTMENT_TITLES)
+APPOINTMENT_DURATIONS = [30, 45, 60]
+
+# Relative activity per hour of day: quiet nights, busy mornings and afternoons
+ACTIVITY_SHAPE = np.array([0.03, 0.02, 0.02, 0.02, 0.03, 0.05, 0.2, 0.6, 1.0, 1.0, 1.0, 0.9,
+                           0.8, 0.8, 0.9, 1.0, 1.0, 0.9, 0.7, 0.6, 0.4, 0.2, 0.08, 0.04])
+
+# Month blocks kept in memory by the engine
+MAX_CACHED_BLOCKS = 36
+
+
+# Accepted date spellings besides ISO 8601
+DATE_FORMATS = ("%Y/%m/%d", "%Y.%m.%d", "%Y%m%d", "%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y")
+RELATIVE_DAYS = {'today': 0, 'now': 0, 'yesterday': -1, 'tomorrow': 1}
+
+
+def parse_date(value: Any) -> date_cls:
+    """
+    Accept a date, datetime, None (today) or a date string.
+
+    Strings may be ISO ('2025-10-18', '2025-10-18T09:30'), another common
+    spelling ('2025/10/18', '18-10-2025') or 'today' / 'yesterday' /
+    'tomorrow'. Anything else falls back to today with a warning, as the
+    tools are called with free-form dates.
+    """
+    if value is None:
+        return datetime.now().date()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date_cls):
+        return value
+
+    text = str(value).strip()
+    if text.lower() in RELATIVE_DAYS:
+        return datetime.now().date() + timedelta(days=RELATIVE_DAYS[text.lower()])
+    try:
+        return datetime.fromisoformat(text).date()
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    logger.warning(f"⚠️  Unrecognized date {value!r}, using today")
+    return datetime.now().date()
+
+
+def normalize_date(value: Any) -> str:
+    """parse_date() as a 'YYYY-MM-DD' string."""
+    return str(parse_date(value))
+
+
+def _first_k_of_permutation(rng: np.random.Generator, shape: Tuple[int, ...], n: int) -> np.ndarray:
+    """Random permutations of range(n) along a new last axis (vectorized random.sample)."""
+    return np.argsort(rng.random(shape + (n,)), axis=-1)
+
+
+class MockDataEngine:
+    """Reproducible synthetic data for a roster of patients."""
+
+    def __init__(self, seed: int = DEFAULT_SEED, patient_ids: Sequence[str] = (DEFAULT_PATIENT_ID,)):
+        self.seed = seed
+        self.patient_ids = list(patient_ids)
+        self._patient_index = {patient_id: i for i, patient_id in enumerate(self.patient_ids)}
+        self._blocks: 'OrderedDict[Tuple[int, int], Dict[str, np.ndarray]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def patient_index(self, patient_id: Optional[str]) -> int:
+        """Roster position of a patient (None means the first patient)."""
+        if patient_id is None:
+            return 0
+        try:
+            return self._patient_index[patient_id]
+        except KeyError:
+            raise ValueError(
+                f"Unknown patient {patient_id!r}; mock data is generated for {self.patient_ids}"
+            ) from None
+
+    # ========== BLOCK GENERATION ==========
+
+    def _generate_month(self, year: int, month: int) -> Dict[str, np.ndarray]:
+        """Draw every field for all patients and all days of one month."""
+        rng = np.random.default_rng([self.seed, year, month])
+        days = calendar.monthrange(year, month)[1]
+        pd = (len(self.patient_ids), days)
+
+        block = {}
+
+        # Movement
+        block['total_steps'] = rng.integers(1000, 8001, pd)
+        block['active_minutes'] = rng.integers(30, 181, pd)
+        block['sedentary_minutes'] = rng.integers(300, 601, pd)
+        block['distance_km'] = np.round(rng.uniform(0.5, 5.0, pd), 2)
+        block['calories_burned'] = rng.integers(200, 801, pd)
+        block['hourly_activity'] = (rng.integers(0, 501, pd + (24,)) * ACTIVITY_SHAPE).astype(np.int64)
+
+        # Presence: up to 2 outings at distinct hours between 08:00 and 17:00
+        block['home_hours'] = np.round(rng.uniform(18, 24, pd), 1)
+        block['away_hours'] = np.round(rng.uniform(0, 6, pd), 1)
+        block['outing_count'] = rng.integers(0, 3, pd)
+        block['outing_hour'] = OUTING_HOURS[_first_k_of_permutation(rng, pd, len(OUTING_HOURS))[..., :2]]
+        block['outing_minutes'] = rng.integers(30, 181, pd + (2,))
+        block['outing_location'] = rng.integers(0, len(OUTING_LOCATIONS), pd + (2,))
+
+        # Motion sensors: 3-5 active rooms in random order
+        block['room_order'] = _first_k_of_permutation(rng, pd, len(ROOMS))
+        block['active_room_count'] = rng.integers(3, 6, pd)
+        block['room_triggers'] = rng.integers(5, 51, pd + (len(ROOMS),))
+        block['room_last_hour'] = rng.integers(0, 24, pd + (len(ROOMS),))
+        block['room_last_minute'] = rng.integers(0, 60, pd + (len(ROOMS),))
+        block['room_minutes'] = rng.integers(30, 301, pd + (len(ROOMS),))
+        block['overnight_bathroom_visits'] = rng.integers(0, 5, pd)
+        block['unusual_patterns'] = rng.random(pd) < 0.5
+
+        # Behavior
+        block['sleep_hours'] = np.round(rng.uniform(5, 9, pd), 1)
+        block['sleep_quality'] = rng.integers(0, len(SLEEP_QUALITIES), pd)
+        block['meals_eaten'] = rng.random(pd + (len(MEALS),)) < 0.5
+        block['mood'] = rng.integers(0, len(MOODS), pd)
+        block['social_interactions'] = rng.integers(0, 6, pd)
+        block['medication_compliance'] = rng.random(pd) < 0.75
+
+        # Irregularities: 0-2 distinct alert types per day
+        block['irregularity_count'] = rng.integers(0, 3, pd)
+        block['irregularity_type'] = _first_k_of_permutation(rng, pd, len(POSSIBLE_IRREGULARITIES))[..., :2]
+        block['irregularity_hour'] = rng.integers(0, 24, pd + (2,))
+        block['irregularity_minute'] = rng.integers(0, 60, pd + (2,))
+
+        # Appointments: 0-3 per day between 08:00 and 18:45, in quarter hours
+        block['appointment_count'] = rng.integers(0, 4, pd)
+        block['appointment_type'] = rng.integers(0, len(APPOINTMENT_TYPES), pd + (3,))
+        block['appointment_title'] = rng.random(pd + (3,))
+        block['appointment_hour'] = rng.integers(8, 19, pd + (3,))
+        block['appointment_minute'] = rng.integers(0, 4, pd + (3,)) * 15
+        block['appointment_duration'] = rng.integers(0, len(APPOINTMENT_DURATIONS), pd + (3,))
+
+        return block
+
+    def month_block(self, year: int, month: int) -> Dict[str, np.ndarray]:
+        """Cached arrays for one month, shaped (patients, days_in_month, ...)."""
+        key = (year, month)
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                return block
+        block = self._generate_month(year, month)
+        with self._lock:
+            self._blocks[key] = block
+            while len(self._blocks) > MAX_CACHED_BLOCKS:
+                self._blocks.popitem(last=False)
+        return block
+
+    def generate(self, start_date: Any, days: int) -> Dict[str, np.ndarray]:
+        """
+        Arrays for every patient over a date range.
+
+        Args:
+            start_date: First day ('YYYY-MM-DD', date or datetime)
+            days: Number of days
+
+        Returns:
+            Dict of arrays shaped (patients, days, ...), plus 'dates' (days,);
+            days <= 0 gives empty arrays
+        """
+        start = parse_date(start_date)
+        end = start + timedelta(days=max(days, 0))
+
+        # An empty range still has the arrays' shapes, with zero days
+        pieces = [(self.month_block(start.year, start.month), 0, 0)] if days <= 0 else []
+        current = start
+        while current < end:
+            block = self.month_block(current.year, current.month)
+            last_day = calendar.monthrange(current.year, current.month)[1]
+            stop = min(end, current.replace(day=last_day) + timedelta(days=1))
+            pieces.append((block, current.day - 1, current.day - 1 + (stop - current).days))
+            current = stop
+
+        result = {
+            key: np.concatenate([block[key][:, lo:hi] for block, lo, hi in pieces], axis=1)
+            for key in pieces[0][0]
+        }
+        result['dates'] = np.arange(np.datetime64(start), np.datetime64(end))
+        return result
+
+    def day(self, date: Any, patient_id: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """One (patient, day) slice of the cached month block."""
+        day = parse_date(date)
+        block = self.month_block(day.year, day.month)
+        index = (self.patient_index(patient_id), day.day - 1)
+        return {key: values[index] for key, values in block.items()}
+
+    # ========== RECORD VIEWS ==========
+
+    def movement_record(self, date: str, patient_id: Optional[str] = None) -> Dict[str, Any]:
+        d = self.day(date, patient_id)
+        return {
+            'date': date,
+            'total_steps': int(d['total_steps']),
+            'active_minutes': int(d['active_minutes']),
+            'sedentary_minutes': int(d['sedentary_minutes']),
+            'distance_km': float(d['distance_km']),
+            'calories_burned': int(d['calories_burned']),
+            'hourly_activity': d['hourly_activity'].tolist()
+        }
+
+    def presence_record(self, date: str, patient_id: Optional[str] = None) -> Dict[str, Any]:
+        d = self.day(date, patient_id)
+        return {
+            'date': date,
+            'home_hours': float(d['home_hours']),
+            'away_hours': float(d['away_hours']),
+            'outings': [
+                {
+                    'time': f"{int(d['outing_hour'][i]):02d}:00",
+                    'duration_minutes': int(d['outing_minutes'][i]),
+                    'location': OUTING_LOCATIONS[d['outing_location'][i]]
+                }
+                for i in range(int(d['outing_count']))
+            ]
+        }
+
+    def motion_sensor_record(self, date: str, patient_id: Optional[str] = None) -> Dict[str, Any]:
+        d = self.day(date, patient_id)
+        active = [int(i) for i in d['room_order'][:int(d['active_room_count'])]]
+        return {
+            'date': date,
+            'active_rooms': [ROOMS[i] for i in active],
+            'activity_by_room': {
+                ROOMS[i]: {
+                    'triggers': int(d['room_triggers'][i]),
+                    'last_activity': f"{int(d['room_last_hour'][i]):02d}:{int(d['room_last_minute'][i]):02d}",
+                    'total_minutes': int(d['room_minutes'][i])
+                }
+                for i in active
+            },
+            'overnight_bathroom_visits': int(d['overnight_bathroom_visits']),
+            'unusual_patterns': bool(d['unusual_patterns'])
+        }
+
+    def behavior_record(self, date: str, patient_id: Optional[str] = None) -> Dict[str, Any]:
+        d = self.day(date, patient_id)
+        return {
+            'date': date,
+            'sleep_hours': float(d['sleep_hours']),
+            'sleep_quality': SLEEP_QUALITIES[d['sleep_quality']],
+            'meal_times': [
+                {'meal': meal, 'time': time, 'eaten': bool(d['meals_eaten'][i])}
+                for i, (meal, time) in enumerate(MEALS)
+            ],
+            'mood': MOODS[d['mood']],
+            'social_interactions': int(d['social_interactions']),
+            'medication_compliance': bool(d['medication_compliance'])
+        }
+
+    def irregularity_records(self, date: str, patient_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        d = self.day(date, patient_id)
+        irregularities = []
+        for i in range(int(d['irregularity_count'])):
+            irr = dict(POSSIBLE_IRREGULARITIES[d['irregularity_type'][i]])
+            irr['date'] = date
+            irr['timestamp'] = f"{int(d['irregularity_hour'][i]):02d}:{int(d['irregularity_minute'][i]):02d}"
+            irregularities.append(irr)
+        return irregularities
+
+    def appointment_records(self, date: str, patient_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        d = self.day(date, patient_id)
+        appointments = []
+        for i in range(int(d['appointment_count'])):
+            apt_type = APPOINTMENT_TYPES[d['appointment_type'][i]]
+            titles = APPOINTMENT_TITLES[apt_type]
+            appointments.append({
+                'id': f"apt_{date}_{i + 1}",
+                'title': titles[int(d['appointment_title'][i] * len(titles))],
+                'type': apt_type,
+                'time': f"{date} {int(d['appointment_hour'][i]):02d}:{int(d['appointment_minute'][i]):02d}:00",
+                'duration_minutes': APPOINTMENT_DURATIONS[d['appointment_duration'][i]],
+                'notes': 'Remember to bring previous records.' if apt_type == 'doctor' else ''
+            })
+        return sorted(appointments, key=lambda apt: apt['time'])
+
+
+_mock_engine: Optional[MockDataEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_mock_engine() -> MockDataEngine:
+    """Get or create the shared engine configured from the environment."""
+    global _mock_engine
+    with _engine_lock:
+        if _mock_engine is None:
+            seed = int(os.getenv('MOCK_DATA_SEED', str(DEFAULT_SEED)))
+            patient_ids = [p.strip() for p in os.getenv('MOCK_PATIENT_IDS', DEFAULT_PATIENT_ID).split(',')
+                           if p.strip()]
+            _mock_engine = MockDataEngine(seed=seed, patient_ids=patient_ids)
+        return _mock_engine
@@ -1,94 +1,385 @@
 """Real-time Firestore monitor to see when data changes.
 
 Run this script to watch Firestore activity in real-time.
+
+The monitor attaches an `on_snapshot` listener to every collection, so
+Firestore pushes only the documents that were added, modified or removed
+instead of the monitor re-reading the whole database on a timer. The list
+of collection ids is re-checked every few seconds (a cheap call that reads
+no documents) so collections created after startup are picked up too.
+
+Instead of a full copy of every document, the monitor keeps a compact
+fingerprint per document: its update_time, a 64-bit content hash and a
+64-bit hash per field. Field-level diffs are computed only when the
+fingerprint of a delivered document changes.
+
+With --events-dir, every detected change is also appended as a JSON line
+to size-rotated files (events.jsonl, events.jsonl.1, ...), together with
+one 'rate' record per collection per minute from rolling write-rate
+counters. Analyze the files later with --report:
+
+    python monitor_firestore.py --events-dir ./monitor-events
+    python monitor_firestore.py --report ./monitor-events --collection food
 """
 
+import argparse
+import glob
+import hashlib
+import json
+import logging
 import os
+import threading
 import time
-from datetime import datetime
-from google.cloud import firestore
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import NamedTuple, Tuple
 
-# Connect to Firestore
-project_id = os.getenv('GOOGLE_CLOUD_PROJECT', 'qwiklabs-gcp-04-b310107eab82')
-db = firestore.Client(project=project_id, database='default')
+# How often to look for newly created collections
+COLLECTION_DISCOVERY_INTERVAL = 10
 
-print("=" * 80)
-print("🔍 FIRESTORE REAL-TIME MONITOR")
-print("=" * 80)
-print(f"Project: {project_id}")
-print(f"Database: default")
-print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-print("=" * 80)
-print("\nWatching for changes... (Press Ctrl+C to stop)\n")
+# Minutes of per-collection write counts kept in memory
+RATE_WINDOW_MINUTES = 60
 
 
-# Track document states
-document_cache = {}
+class DocFingerprint(NamedTuple):
+    """Compact summary of a document version."""
+    update_time: str
+    content_hash: int
+    field_hashes: Tuple[Tuple[str, int], ...]
 
 
-def check_collection(collection_name):
-    """Check a collection for changes."""
-    try:
-        docs = db.collection(collection_name).stream()
-
-        for doc in docs:
-            doc_id = doc.id
-            doc_data = doc.to_dict()
-            cache_key = f"{collection_name}/{doc_id}"
-
-            # Check if this is a new document or changed
-            if cache_key not in document_cache:
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] ✨ NEW DOCUMENT")
-                print(f"   📂 {collection_name}/{doc_id}")
-                print(f"   📝 Fields: {list(doc_data.keys())}")
-                for key, value in doc_data.items():
-                    value_str = str(value)
-                    if len(value_str) > 100:
-                        value_str = value_str[:97] + "..."
-                    print(f"      {key}: {value_str}")
-                print()
-                document_cache[cache_key] = doc_data
-            elif document_cache[cache_key] != doc_data:
-                print(f"[{datetime.now().strftime('%H:%M:%S')}] 🔄 UPDATED DOCUMENT")
-                print(f"   📂 {collection_name}/{doc_id}")
-
-                # Show what changed
-                for key in doc_data:
-                    if key not in document_cache[cache_key] or document_cache[cache_key][key] != doc_data[key]:
-                        old_value = document_cache[cache_key].get(key, '(not set)')
-                        new_value = doc_data[key]
-                        print(f"      {key}:")
-                        print(f"         Old: {old_value}")
-                        print(f"         New: {new_value}")
-                print()
-                document_cache[cache_key] = doc_data
-
-    except Exception as e:
-        print(f"Error checking {collection_name}: {e}")
-
-
-# Get all collections
-collections = [col.id for col in db.collections()]
-print(f"Monitoring {len(collections)} collections:")
-for col in collections:
-    print(f"   • {col}")
-print()
-
-# Initial scan
-print("📊 Initial scan...")
-for collection_name in collections:
-    check_collection(collection_name)
-print("✅ Initial scan complete. Watching for changes...\n")
-
-# Monitor loop
-try:
-    while True:
-        for collection_name in collections:
-            check_collection(collection_name)
-
-        time.sleep(2)  # Check every 2 seconds
-
-except KeyboardInterrupt:
-    print("\n\n" + "=" * 80)
-    print("🛑 Monitor stopped")
+# Track document fingerprints (for change detection and field-level diffs)
+fingerprints = {}
+
+
+def hash_value(value):
+    """Stable 64-bit hash of any Firestore value."""
+    encoded = json.dumps(value, sort_keys=True, default=str).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), 'big')
+
+
+def fingerprint(doc):
+    """Fingerprint a DocumentSnapshot."""
+    doc_data = doc.to_dict() or {}
+    field_hashes = tuple(sorted((key, hash_value(value)) for key, value in doc_data.items()))
+    content_hash = hash_value([list(item) for item in field_hashes])
+    return DocFingerprint(str(doc.update_time), content_hash, field_hashes)
+
+
+def diff_fields(old, new):
+    """Return (changed_or_added, removed) field names between two fingerprints."""
+    old_fields = dict(old.field_hashes)
+    new_fields = dict(new.field_hashes)
+    changed = [key for key, h in new.field_hashes if old_fields.get(key) != h]
+    removed = [key for key in old_fields if key not in new_fields]
+    return changed, removed
+
+
+# Active listeners by collection name
+watches = {}
+
+# Listener callbacks run on background threads; keep output lines together
+print_lock = threading.Lock()
+
+# JSONL event logger; has no handlers unless --events-dir is given
+event_log = logging.getLogger('FirestoreMonitorEvents')
+event_log.propagate = False
+
+
+class WriteRateCounter:
+    """Rolling per-collection write counts in one-minute buckets."""
+
+    def __init__(self, window_minutes=RATE_WINDOW_MINUTES):
+        self.window_minutes = window_minutes
+        self.buckets = defaultdict(deque)  # collection -> deque of [minute, count]
+        self.emitted = {}  # collection -> last minute written to the event log
+
+    @staticmethod
+    def minute_of(when):
+        """Minute bucket label in UTC (snapshot read times are UTC)."""
+        return when.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M')
+
+    def record(self, collection_name, when):
+        minute = self.minute_of(when)
+        buckets = self.buckets[collection_name]
+        if buckets and buckets[-1][0] == minute:
+            buckets[-1][1] += 1
+        else:
+            buckets.append([minute, 1])
+            while len(buckets) > self.window_minutes:
+                buckets.popleft()
+
+    def writes_per_minute(self, collection_name, minutes=1):
+        """Average writes per minute over the last N recorded minutes."""
+        recent = list(self.buckets.get(collection_name, ()))[-minutes:]
+        return sum(count for _, count in recent) / minutes if recent else 0.0
+
+    def closed_buckets(self, now):
+        """Completed minutes not yet emitted, as (collection, minute, writes)."""
+        current = self.minute_of(now)
+        closed = []
+        for collection_name, buckets in self.buckets.items():
+            last = self.emitted.get(collection_name, '')
+            for minute, count in buckets:
+                if last < minute < current:
+                    closed.append((collection_name, minute, count))
+                    self.emitted[collection_name] = minute
+        return closed
+
+
+write_rates = WriteRateCounter()
+
+
+def log_event(change_type, collection_name, doc_id, read_time, fields=(), removed_fields=()):
+    """Record a change in the rolling counters and the JSONL event log."""
+    if not event_log.handlers:
+        return
+    write_rates.record(collection_name, read_time)
+    event_log.info(json.dumps({
+        'type': 'change',
+        'ts': read_time.isoformat(),
+        'collection': collection_name,
+        'doc_id': doc_id,
+        'change': change_type,
+        'fields': list(fields),
+        'removed_fields': list(removed_fields),
+    }))
+
+
+def flush_write_rates():
+    """Write one 'rate' record per collection for every completed minute."""
+    if not event_log.handlers:
+        return
+    # Listener threads record into the same buckets while holding print_lock
+    with print_lock:
+        closed = write_rates.closed_buckets(datetime.now(timezone.utc))
+        for collection_name, minute, count in closed:
+            event_log.info(json.dumps({
+                'type': 'rate',
+                'minute': minute,
+                'collection': collection_name,
+                'writes': count,
+            }))
+        if closed:
+            rates = ', '.join(f"{name}: {count}" for name, _, count in closed)
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] 📈 Writes/min: {rates}")
+
+
+def enable_event_log(events_dir, max_bytes, backup_count):
+    """Send change events to size-rotated JSONL files in events_dir."""
+    os.makedirs(events_dir, exist_ok=True)
+    handler = RotatingFileHandler(
+        os.path.join(events_dir, 'events.jsonl'), maxBytes=max_bytes, backupCount=backup_count
+    )
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    event_log.addHandler(handler)
+    event_log.setLevel(logging.INFO)
+
+
+def format_value(value):
+    """Shorten long values for display."""
+    value_str = str(value)
+    if len(value_str) > 100:
+        value_str = value_str[:97] + "..."
+    return value_str
+
+
+def print_added(collection_name, doc_id, doc_data):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] ✨ NEW DOCUMENT")
+    print(f"   📂 {collection_name}/{doc_id}")
+    print(f"   📝 Fields: {list(doc_data.keys())}")
+    for key, value in doc_data.items():
+        print(f"      {key}: {format_value(value)}")
+    print()
+
+
+def print_modified(collection_name, doc_id, changed, removed, doc_data):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] 🔄 UPDATED DOCUMENT")
+    print(f"   📂 {collection_name}/{doc_id}")
+
+    # Show what changed
+    for key in changed:
+        print(f"      {key}:")
+        print(f"         New: {format_value(doc_data[key])}")
+    for key in removed:
+        print(f"      {key}: (removed)")
+    print()
+
+
+def print_removed(collection_name, doc_id):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] 🗑️  DELETED DOCUMENT")
+    print(f"   📂 {collection_name}/{doc_id}")
+    print()
+
+
+def make_listener(collection_name):
+    """Build the on_snapshot callback for one collection."""
+    state = {'initial': True}
+
+    def on_snapshot(col_snapshot, changes, read_time):
+        with print_lock:
+            if state['initial']:
+                # The first snapshot delivers every existing document as ADDED;
+                # record it as the baseline instead of reporting it as new.
+                state['initial'] = False
+                for doc in col_snapshot:
+                    fingerprints[f"{collection_name}/{doc.id}"] = fingerprint(doc)
+                print(f"   📊 {collection_name}: {len(col_snapshot)} documents at startup")
+                return
+
+            for change in changes:
+                doc_id = change.document.id
+                cache_key = f"{collection_name}/{doc_id}"
+
+                if change.type.name == 'ADDED':
+                    doc_data = change.document.to_dict()
+                    print_added(collection_name, doc_id, doc_data)
+                    fingerprints[cache_key] = fingerprint(change.document)
+                    log_event('added', collection_name, doc_id, read_time, fields=doc_data.keys())
+                elif change.type.name == 'MODIFIED':
+                    old = fingerprints.get(cache_key)
+                    if old is not None and old.update_time == str(change.document.update_time):
+                        continue  # Same version delivered again (e.g. after a reconnect)
+                    new = fingerprint(change.document)
+                    fingerprints[cache_key] = new
+                    if old is not None and old.content_hash == new.content_hash:
+                        continue  # Rewritten with identical content
+                    if old is None:
+                        changed, removed = [key for key, _ in new.field_hashes], []
+                    else:
+                        changed, removed = diff_fields(old, new)
+                    print_modified(collection_name, doc_id, changed, removed, change.document.to_dict())
+                    log_event('modified', collection_name, doc_id, read_time,
+                              fields=changed, removed_fields=removed)
+                elif change.type.name == 'REMOVED':
+                    print_removed(collection_name, doc_id)
+                    fingerprints.pop(cache_key, None)
+                    log_event('removed', collection_name, doc_id, read_time)
+
+    return on_snapshot
+
+
+def watch_new_collections(db):
+    """Attach a listener to every collection that is not watched yet."""
+    for col in db.collections():
+        if col.id in watches:
+            continue
+        with print_lock:
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] 👀 Watching collection: {col.id}")
+        watches[col.id] = db.collection(col.id).on_snapshot(make_listener(col.id))
+
+
+def read_events(events_dir):
+    """Yield records from all rotated event files, oldest file first."""
+    paths = glob.glob(os.path.join(events_dir, 'events.jsonl*'))
+    # events.jsonl.N is older than events.jsonl.(N-1); events.jsonl is newest
+    paths.sort(key=lambda p: -int(p.rsplit('.', 1)[1]) if p[-1].isdigit() else 0)
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def print_report(events_dir, collection_filter=None):
+    """Summarize write hot spots from a recorded event log."""
+    changes_by_collection = Counter()
+    changes_by_type = defaultdict(Counter)
+    hot_documents = Counter()
+    writes_by_hour = defaultdict(Counter)
+    rate_series = defaultdict(list)
+
+    for record in read_events(events_dir):
+        if collection_filter and record['collection'] != collection_filter:
+            continue
+        if record['type'] == 'change':
+            changes_by_collection[record['collection']] += 1
+            changes_by_type[record['collection']][record['change']] += 1
+            hot_documents[f"{record['collection']}/{record['doc_id']}"] += 1
+            writes_by_hour[record['collection']][record['ts'][11:13]] += 1
+        elif record['type'] == 'rate':
+            rate_series[record['collection']].append((record['minute'], record['writes']))
+
+    print("=" * 80)
+    print(f"📈 FIRESTORE WRITE REPORT ({events_dir})")
     print("=" * 80)
+    if not changes_by_collection:
+        print("No events recorded.")
+        return
+
+    for collection_name, total in changes_by_collection.most_common():
+        types = ', '.join(f"{t}: {n}" for t, n in sorted(changes_by_type[collection_name].items()))
+        print(f"\n📂 {collection_name} - {total} changes ({types})")
+        series = rate_series.get(collection_name)
+        if series:
+            peak_minute, peak = max(series, key=lambda item: item[1])
+            average = sum(count for _, count in series) / len(series)
+            print(f"   Writes/min: avg {average:.1f} over {len(series)} active minutes, "
+                  f"peak {peak} at {peak_minute}")
+        busiest = writes_by_hour[collection_name].most_common(3)
+        print(f"   Busiest hours: {', '.join(f'{hour}:00 ({n})' for hour, n in busiest)}")
+
+    print("\n🔥 Hottest documents:")
+    for path, count in hot_documents.most_common(10):
+        print(f"   {count:6d}  {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch Firestore changes in real time")
+    parser.add_argument('--events-dir', help="Record changes as JSONL events in this directory")
+    parser.add_argument('--max-bytes', type=int, default=10 * 1024 * 1024,
+                        help="Rotate the event file at this size (default: 10 MB)")
+    parser.add_argument('--backup-count', type=int, default=20,
+                        help="Number of rotated event files to keep (default: 20)")
+    parser.add_argument('--report', metavar='EVENTS_DIR',
+                        help="Print a write report from recorded events and exit")
+    parser.add_argument('--collection', help="Limit --report to one collection")
+    args = parser.parse_args()
+
+    if args.report:
+        print_report(args.report, args.collection)
+        return
+
+    if args.events_dir:
+        enable_event_log(args.events_dir, args.max_bytes, args.backup_count)
+
+    from google.cloud import firestore
+
+    # Connect to Firestore
+    project_id = os.getenv('GOOGLE_CLOUD_PROJECT', 'qwiklabs-gcp-04-b310107eab82')
+    db = firestore.Client(project=project_id, database='default')
+
+    print("=" * 80)
+    print("🔍 FIRESTORE REAL-TIME MONITOR")
+    print("=" * 80)
+    print(f"Project: {project_id}")
+    print(f"Database: default")
+    print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    if args.events_dir:
+        print(f"Event log: {os.path.join(args.events_dir, 'events.jsonl')}")
+    print("=" * 80)
+    print("\nWatching for changes... (Press Ctrl+C to stop)\n")
+
+    watch_new_collections(db)
+
+    try:
+        while True:
+            time.sleep(COLLECTION_DISCOVERY_INTERVAL)
+            flush_write_rates()
+            try:
+                watch_new_collections(db)
+            except Exception as e:
+                with print_lock:
+                    print(f"Error listing collections: {e}")
+
+    except KeyboardInterrupt:
+        for watch in watches.values():
+            watch.unsubscribe()
+        print("\n\n" + "=" * 80)
+        print("🛑 Monitor stopped")
+        print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,22 @@
 """Tools for the Parent Agent to coordinate the workshop management system."""
 
 from typing import Dict, Any, List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import numpy as np
+
 from team29.mock_data import (
-    generate_appointments,
-    generate_movement_data,
-    generate_presence_data,
-    generate_motion_sensor_data,
-    generate_daily_behavior_data,
-    generate_irregularities,
     generate_caregiver_profile,
-    generate_medical_documentation
+    generate_medical_documentation,
+    generate_medication_log
 )
+from team29.appointment_calendar import get_appointment_calendar, time_until
+from team29.circadian_rhythm import get_circadian_analyzer
+from team29.daily_snapshots import build_range_table, get_daily_snapshot
+from team29.medication_engine import compute_compliance, current_prescriptions
+from team29.mock_engine import normalize_date
+from team29.tool_output import compact_irregularities, compact_json, is_compact
+from team29.trend_rollups import get_rollup_engine
 from team29.tools import (
     format_schedule,
     summarize_daily_data,
@@ -102,15 +107,34 @@ def get_daily_summary(date: Optional[str] = None) -> str:
     Returns:
         Comprehensive daily summary
     """
-    if date is None:
-        date = datetime.now().strftime("%Y-%m-%d")
-
-    # Gather all data
-    movement = generate_movement_data(date)
-    presence = generate_presence_data(date)
-    sensors = generate_motion_sensor_data(date)
-    behavior = generate_daily_behavior_data(date)
-    irregularities = generate_irregularities(date)
+    date = normalize_date(date)
+
+    # Gather all data (built once per day, then served from the snapshot cache)
+    snapshot = get_daily_snapshot(date)
+    movement = snapshot['movement']
+    presence = snapshot['presence']
+    sensors = snapshot['sensors']
+    behavior = snapshot['behavior']
+    irregularities = snapshot['irregularities']
+
+    if is_compact():
+        return compact_json({
+            'date': date,
+            'steps': movement['total_steps'],
+            'active_min': movement['active_minutes'],
+            'km': movement['distance_km'],
+            'home_h': presence['home_hours'],
+            'outings': len(presence['outings']),
+            'sleep_h': behavior['sleep_hours'],
+            'sleep_q': behavior['sleep_quality'],
+            'meals': [m['meal'] for m in behavior['meal_times'] if m['eaten']],
+            'med_ok': behavior['medication_compliance'],
+            'mood': behavior['mood'],
+            'social': behavior['social_interactions'],
+            'rooms': len(sensors['active_rooms']),
+            'night_bath': sensors['overnight_bathroom_visits'],
+            'irr': compact_irregularities(irregularities),
+        })
 
     # Create comprehensive summary
     summary = f"""📊 Daily Summary for {date}
@@ -156,6 +180,83 @@ def get_daily_summary(date: Optional[str] = None) -> str:
     return summary
 
 
+def get_range_summary(start_date: Optional[str] = None, days: int = 7) -> str:
+    """
+    Get a summary of several days at once: one row per day plus totals.
+
+    Use this instead of calling get_daily_summary() once per day
+    ("How was this week?", "How were the last 3 days?").
+
+    Args:
+        start_date: First day YYYY-MM-DD (default: so the range ends today)
+        days: Number of days (default: 7, at most 90)
+
+    Returns:
+        Table of per-day numbers and range totals
+    """
+    days = min(max(days, 1), 90)
+    if start_date is None:
+        start_date = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    start_date = normalize_date(start_date)
+
+    table = build_range_table(start_date, days)
+    dates = [str(d) for d in table['dates']]
+    moods, mood_counts = np.unique(table['mood'], return_counts=True)
+    totals = {
+        'steps': int(table['steps'].sum()),
+        'avg_steps': int(table['steps'].mean()),
+        'active_minutes': int(table['active_minutes'].sum()),
+        'distance_km': round(float(table['distance_km'].sum()), 2),
+        'avg_home_hours': round(float(table['home_hours'].mean()), 1),
+        'outings': int(table['outings'].sum()),
+        'avg_sleep_hours': round(float(table['sleep_hours'].mean()), 1),
+        'meals_eaten': int(table['meals_eaten'].sum()),
+        'medication_days': int(table['medication_taken'].sum()),
+        'social_interactions': int(table['social_interactions'].sum()),
+        'overnight_bathroom_visits': int(table['overnight_bathroom_visits'].sum()),
+        'irregularities': int(table['irregularities'].sum()),
+        'usual_mood': str(moods[np.argmax(mood_counts)]),
+    }
+
+    if is_compact():
+        columns = ['date', 'steps', 'active_min', 'km', 'home_h', 'outings', 'sleep_h', 'meals',
+                   'med_ok', 'mood', 'social', 'night_bath', 'irr']
+        rows = [
+            [date, *(v.item() for v in values)]
+            for date, *values in zip(dates, table['steps'], table['active_minutes'], table['distance_km'],
+                                     table['home_hours'], table['outings'], table['sleep_hours'],
+                                     table['meals_eaten'], table['medication_taken'], table['mood'],
+                                     table['social_interactions'], table['overnight_bathroom_visits'],
+                                     table['irregularities'])
+        ]
+        return compact_json({'cols': columns, 'rows': rows, 'total': totals})
+
+    output = f"📊 Summary for {dates[0]} to {dates[-1]} ({days} days)\n\n"
+    output += "Date        Steps  Active  Sleep  Meals  Meds  Mood      Social  Night bath  Alerts\n"
+    for i, date in enumerate(dates):
+        output += (f"{date}  {table['steps'][i]:>5}  {table['active_minutes'][i]:>4} m  "
+                   f"{table['sleep_hours'][i]:>4.1f}h  {table['meals_eaten'][i]:>3}/3  "
+                   f"{'✓' if table['medication_taken'][i] else '✗':>4}  {table['mood'][i]:<8}  "
+                   f"{table['social_interactions'][i]:>6}  {table['overnight_bathroom_visits'][i]:>10}  "
+                   f"{table['irregularities'][i]:>6}\n")
+
+    output += f"\nTOTALS:\n"
+    output += f"- Steps: {totals['steps']} (avg {totals['avg_steps']}/day), "
+    output += f"{totals['distance_km']} km, {totals['active_minutes']} active minutes\n"
+    output += f"- Time at home: {totals['avg_home_hours']} h/day, {totals['outings']} outings\n"
+    output += f"- Sleep: {totals['avg_sleep_hours']} h/night on average\n"
+    output += f"- Meals eaten: {totals['meals_eaten']} of {3 * days}\n"
+    output += f"- Medication on track: {totals['medication_days']} of {days} days\n"
+    output += f"- Social interactions: {totals['social_interactions']} | Usual mood: {totals['usual_mood']}\n"
+    output += f"- Overnight bathroom visits: {totals['overnight_bathroom_visits']}\n"
+    output += f"- Irregularities: {totals['irregularities']}"
+    if table['irregularities'].any():
+        output += f" (use check_irregularities(date) for details on a day)"
+    output += "\n"
+
+    return output
+
+
 def get_upcoming_appointments(days: int = 7) -> str:
     """
     Get upcoming appointments for the next N days.
@@ -164,20 +265,48 @@ def get_upcoming_appointments(days: int = 7) -> str:
         days: Number of days to look ahead (default: 7)
 
     Returns:
-        Formatted list of upcoming appointments
+        Formatted list of upcoming appointments, with any scheduling conflicts
     """
-    appointments = generate_appointments(days_ahead=days)
+    calendar = get_appointment_calendar()
+    now = datetime.now()
+    appointments = calendar.upcoming(days, now)
+    if is_compact():
+        return compact_json({
+            'days': days,
+            'apts': [[apt['time'][:16], apt['title'], apt['type'], apt.get('location', '')]
+                     for apt in appointments[:10]],
+            'more': max(0, len(appointments) - 10),
+            'conflicts': [[c['kind'], c['first']['title'], c['second']['title'], c['second']['time'][:16]]
+                          for c in calendar.conflicts(now, now + timedelta(days=days))],
+        })
     if not appointments:
         return f"No appointments scheduled for the next {days} days."
 
+    shown = appointments[:10]  # Limit to 10 appointments
+    labels = time_until(np.array([apt['time'] for apt in shown], dtype='datetime64[s]'), now)
+
     output = f"📅 Upcoming Appointments (Next {days} days):\n\n"
-    for apt in appointments[:10]:  # Limit to 10 appointments
-        time_until = calculate_time_until_appointment(apt['time'])
-        output += f"• {apt['title']}\n"
-        output += f"  Type: {apt['type']} | Time: {apt['time']} ({time_until})\n"
+    for apt, time_until_label in zip(shown, labels):
+        output += f"• {apt['title']}{' (recurring)' if apt.get('recurring') else ''}\n"
+        output += f"  Type: {apt['type']} | Time: {apt['time']} ({time_until_label})\n"
+        if apt.get('location'):
+            output += f"  Location: {apt['location']}\n"
         if apt.get('notes'):
             output += f"  Notes: {apt['notes']}\n"
         output += "\n"
+    if len(appointments) > len(shown):
+        output += f"...and {len(appointments) - len(shown)} more.\n\n"
+
+    conflicts = calendar.conflicts(now, now + timedelta(days=days))
+    if conflicts:
+        output += "⚠️ SCHEDULING CONFLICTS:\n"
+        for conflict in conflicts:
+            first, second = conflict['first'], conflict['second']
+            if conflict['kind'] == 'overlap':
+                output += f"- {first['title']} ({first['time']}) overlaps {second['title']} ({second['time']})\n"
+            else:
+                output += (f"- Only {conflict['gap_minutes']} min between {first['title']} and "
+                           f"{second['title']} ({second['time']}) to travel\n")
 
     return output
 
@@ -192,10 +321,12 @@ def check_irregularities(date: Optional[str] = None) -> str:
     Returns:
         Report of any irregularities found
     """
-    if date is None:
-        date = datetime.now().strftime("%Y-%m-%d")
+    date = normalize_date(date)
 
-    irregularities = generate_irregularities(date)
+    irregularities = get_daily_snapshot(date)['irregularities']
+
+    if is_compact():
+        return compact_json({'date': date, 'irr': compact_irregularities(irregularities)})
 
     if not irregularities:
         return f"✅ No irregularities detected for {date}. Everything appears normal."
@@ -229,6 +360,18 @@ def get_medical_summary() -> str:
     """
     docs = generate_medical_documentation()
 
+    if is_compact():
+        return compact_json([
+            {
+                'type': doc['type'],
+                'date': doc['date'],
+                'by': doc['provider'],
+                'meds': [f"{m['name']} {m['dosage']} {m['frequency']}" for m in doc.get('medications', [])],
+                'text': doc.get('summary') or doc.get('results'),
+            }
+            for doc in docs
+        ])
+
     output = "📋 Medical Documentation Summary:\n\n"
     output += f"Total documents: {len(docs)}\n\n"
 
@@ -251,6 +394,61 @@ def get_medical_summary() -> str:
     return output
 
 
+def check_medication_adherence(days: int = 7) -> str:
+    """
+    Check whether prescribed medications were taken on time over the past N days.
+
+    Args:
+        days: Number of days to check, ending today (default: 7)
+
+    Returns:
+        On-time / late / missed dose report per medication
+    """
+    days = max(days, 1)
+    start = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    prescriptions = current_prescriptions(generate_medical_documentation())
+    if not prescriptions:
+        return "No current prescriptions on file."
+
+    now = datetime.now()
+    log = [dose for dose in generate_medication_log(prescriptions, start, days)
+           if dose['time'] <= now.strftime("%Y-%m-%d %H:%M:%S")]
+    report = compute_compliance(prescriptions, log, start, days, as_of=now)
+
+    if is_compact():
+        return compact_json({
+            'days': days,
+            'due': report['scheduled'],
+            'on_time': report['on_time'],
+            'late': report['late'],
+            'missed': report['missed'],
+            'by_med': {name: [c['on_time'], c['late'], c['missed']] for name, c in report['by_medication'].items()},
+            'recent_missed': [[d['medication'], d['scheduled'][:16]] for d in report['missed_doses'][-5:]],
+            'unsched': [[u['medication'], u['frequency']] for u in report['unscheduled']],
+        })
+
+    output = f"💊 Medication Adherence (last {days} days):\n\n"
+    output += f"- Doses due so far: {report['scheduled']} ({report['upcoming']} still upcoming today)\n"
+    output += f"- On time: {report['on_time']} | Late: {report['late']} | Missed: {report['missed']}\n"
+    output += f"- Taken: {report['compliance_rate']}% (on time: {report['on_time_rate']}%)\n"
+    output += f"- Status: {'✅ Good' if report['status'] == 'good' else '⚠️ Needs attention'}\n\n"
+
+    for name, counts in report['by_medication'].items():
+        output += f"• {name}: {counts['on_time']} on time, {counts['late']} late, {counts['missed']} missed\n"
+
+    if report['missed_doses']:
+        output += "\nMost recent missed doses:\n"
+        for dose in report['missed_doses'][-5:]:
+            output += f"  - {dose['medication']} at {dose['scheduled']}\n"
+
+    if report['unscheduled']:
+        output += "\nNot scored (no fixed dose times):\n"
+        for med in report['unscheduled']:
+            output += f"  - {med['medication']} ({med['frequency'] or 'no frequency given'})\n"
+
+    return output
+
+
 def analyze_trends(days: int = 7) -> str:
     """
     Analyze trends over the past N days.
@@ -261,38 +459,122 @@ def analyze_trends(days: int = 7) -> str:
     Returns:
         Trend analysis report
     """
-    # Generate data for multiple days
-    from datetime import timedelta
-
-    base_date = datetime.now()
-    daily_data = []
-
-    for i in range(days):
-        date = (base_date - timedelta(days=i)).strftime("%Y-%m-%d")
-        daily_data.append({
-            'date': date,
-            'movement': generate_movement_data(date),
-            'behavior': generate_daily_behavior_data(date),
-            'irregularities': generate_irregularities(date)
+    days = max(days, 1)
+    trend = get_rollup_engine().trend(days)
+    steps = trend['steps']
+    sleep = trend['sleep_hours']
+    irregularities = trend['irregularities']
+
+    if is_compact():
+        def stats(metric: Dict[str, Any]) -> List[Any]:
+            change = round(metric['change'], 2) if metric['change'] is not None else None
+            return [round(metric['mean'], 2), metric['direction'], change]
+
+        # Each metric: [daily mean, direction, relative change vs previous window]
+        return compact_json({
+            'days': days,
+            'steps': stats(steps),
+            'sleep_h': stats(sleep),
+            'meals': stats(trend['meals_eaten']),
+            'med': stats(trend['medication_taken']),
+            'irr_total': int(irregularities['total']),
+            'irr': stats(irregularities),
         })
 
-    # Calculate averages
-    avg_steps = sum(d['movement']['total_steps'] for d in daily_data) / days
-    avg_sleep = sum(d['behavior']['sleep_hours'] for d in daily_data) / days
-    total_irregularities = sum(len(d['irregularities']) for d in daily_data)
+    def direction(stats: Dict[str, Any]) -> str:
+        icon = {'increasing': '↗️ Increasing', 'decreasing': '↘️ Decreasing', 'stable': '➡️ Stable'}
+        text = icon[stats['direction']]
+        if stats['change'] is not None:
+            text += f" ({stats['change']:+.0%} vs previous {days} days)"
+        return text
 
     output = f"📈 {days}-Day Trend Analysis:\n\n"
     output += f"ACTIVITY:\n"
-    output += f"- Average daily steps: {int(avg_steps)}\n"
-    output += f"- Trend: {'↗️ Increasing' if avg_steps > 3000 else '↘️ Decreasing'}\n\n"
+    output += f"- Average daily steps: {int(steps['mean'])}\n"
+    output += f"- Trend: {direction(steps)}\n\n"
 
     output += f"SLEEP:\n"
-    output += f"- Average sleep: {avg_sleep:.1f} hours\n"
-    output += f"- Quality: {'Good' if avg_sleep >= 7 else 'Needs attention'}\n\n"
+    output += f"- Average sleep: {sleep['mean']:.1f} hours\n"
+    output += f"- Quality: {'Good' if sleep['mean'] >= 7 else 'Needs attention'}\n"
+    output += f"- Trend: {direction(sleep)}\n\n"
+
+    output += f"MEALS & MEDICATION:\n"
+    output += f"- Meals eaten: {trend['meals_eaten']['mean']:.1f} of 3 per day\n"
+    output += f"- Medication on track: {trend['medication_taken']['mean']:.0%} of days\n\n"
 
     output += f"IRREGULARITIES:\n"
-    output += f"- Total in {days} days: {total_irregularities}\n"
-    output += f"- Status: {'⚠️ Concerning' if total_irregularities > days else '✅ Normal'}\n\n"
+    output += f"- Total in {days} days: {int(irregularities['total'])}\n"
+    output += f"- Status: {'⚠️ Concerning' if irregularities['total'] > days else '✅ Normal'}\n"
+    output += f"- Trend: {direction(irregularities)}\n\n"
+
+    return output
+
+
+def analyze_daily_rhythm(days: int = 14) -> str:
+    """
+    Check whether the patient's daily rhythm (sleep timing, regularity of days) is changing.
+
+    Compares the last N complete days with the N days before them.
+
+    Args:
+        days: Days per comparison window (default: 14)
+
+    Returns:
+        Sleep onset / wake time, day-to-day regularity and a verdict; timing
+        is withheld when the activity shows no clear day/night pattern
+    """
+    comparison = get_circadian_analyzer().compare(max(days, 3))
+    recent, previous = comparison['recent'], comparison['previous']
+    timed = recent['rhythm_detected'] and previous['rhythm_detected']
+
+    def clock(hour: float) -> str:
+        minutes = int(round(hour * 60)) % (24 * 60)
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+    if is_compact():
+        def window(m: Dict[str, Any]) -> List[Any]:
+            if not m['rhythm_detected']:
+                return [None, None, None, m['interdaily_stability'],
+                        m['intradaily_variability'], m['relative_amplitude']]
+            return [clock(m['onset']), clock(m['offset']), m['rest_duration'],
+                    m['interdaily_stability'], m['intradaily_variability'], m['relative_amplitude']]
+
+        # Each window: [sleep onset, wake time, rest hours, IS, IV, RA]; timing is null without a rhythm
+        return compact_json({
+            'days': comparison['days'],
+            'recent': window(recent),
+            'previous': window(previous),
+            'rhythm': comparison['rhythm_detected'],
+            'changing': comparison['changing'],
+            'reasons': comparison['reasons'],
+        })
+
+    days = comparison['days']
+    output = f"🌙 Daily Rhythm (last {days} days vs the {days} days before):\n\n"
+    if timed:
+        output += f"SLEEP TIMING:\n"
+        output += f"- Falls asleep around {clock(recent['onset'])} "
+        output += f"(was {clock(previous['onset'])}, {comparison['onset_shift']:+.1f} h)\n"
+        output += f"- Wakes up around {clock(recent['offset'])} "
+        output += f"(was {clock(previous['offset'])}, {comparison['offset_shift']:+.1f} h)\n"
+        output += f"- Rest period: {recent['rest_duration']:.1f} hours (was {previous['rest_duration']:.1f})\n\n"
+
+    output += f"DAY STRUCTURE:\n"
+    output += f"- Day-to-day regularity: {recent['interdaily_stability']:.2f} "
+    output += f"(was {previous['interdaily_stability']:.2f}; 1 = same pattern every day)\n"
+    output += f"- Fragmentation: {recent['intradaily_variability']:.2f} "
+    output += f"(was {previous['intradaily_variability']:.2f}; higher = more restless)\n"
+    output += f"- Day/night contrast: {recent['relative_amplitude']:.2f} (was {previous['relative_amplitude']:.2f})\n"
+    if recent['rhythm_detected']:
+        output += f"- Most active from {recent['m10_start']:02d}:00, quietest from {recent['l5_start']:02d}:00\n"
+    output += "\n"
+
+    if comparison['changing']:
+        output += f"⚠️ Rhythm is changing: {', '.join(comparison['reasons'])}\n"
+    elif not recent['rhythm_detected']:
+        output += "ℹ️ No clear day/night pattern in the activity data, so sleep timing can't be judged\n"
+    else:
+        output += "✅ Rhythm is stable\n"
 
     return output
 
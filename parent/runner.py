@@ -0,0 +1,89 @@
+"""Runner setup and session lifecycle for the parent agent.
+
+`adk web` / `adk run` build their own Runner from `agent.root_agent`.
+Programs that host the agent themselves (services, scripts, replays)
+should use this module instead, so the session-end and shutdown work
+happens on the runner's event loop:
+
+    runner = create_runner()
+    ...  # runner.run_async(...) per user message
+    await end_session(runner, user_id, session_id)  # conversation over
+    await close_runner(runner)                      # before the loop ends
+
+- `end_session()` submits the session's events still waiting in the
+  memory ingestor's debounce window.
+- `close_runner()` drains every pending memory submission, runs the
+  client pool's shutdown hooks and closes the async clients of this loop,
+  then closes the runner.
+"""
+
+import logging
+import os
+from typing import Any
+
+from google.adk.memory import InMemoryMemoryService
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+
+from team29.client_pool import get_client_pool
+from team29.memory_ingest import get_memory_ingestor
+
+logger = logging.getLogger('ParentRunner')
+
+APP_NAME = 'team29'
+
+
+def default_memory_service() -> Any:
+    """The local ranked memory service if PARENT_MEMORY_SERVICE=local, else InMemoryMemoryService."""
+    if os.getenv('PARENT_MEMORY_SERVICE') == 'local':
+        from team29.local_memory import get_local_memory_service
+        return get_local_memory_service()
+    return InMemoryMemoryService()
+
+
+def create_runner(agent: Any = None, app_name: str = APP_NAME, session_service: Any = None,
+                  memory_service: Any = None) -> Runner:
+    """
+    Runner for the parent agent with in-memory sessions by default.
+
+    Args:
+        agent: Root agent (default: agent.root_agent)
+        app_name: ADK app name
+        session_service: Session service (default: InMemorySessionService)
+        memory_service: Memory service (default: default_memory_service())
+    """
+    if agent is None:
+        from team29.agent import root_agent as agent
+    return Runner(
+        app_name=app_name,
+        agent=agent,
+        session_service=session_service or InMemorySessionService(),
+        memory_service=memory_service or default_memory_service(),
+    )
+
+
+async def end_session(runner: Runner, user_id: str, session_id: str) -> int:
+    """
+    Submit a finished session's pending events to memory now.
+
+    Returns:
+        Number of events submitted
+    """
+    if runner.memory_service is None:
+        return 0
+    session = await runner.session_service.get_session(
+        app_name=runner.app_name, user_id=user_id, session_id=session_id
+    )
+    if session is None:
+        logger.warning(f"⚠️  Session {session_id} not found, nothing to save to memory")
+        return 0
+    submitted = await get_memory_ingestor().flush_session(session, runner.memory_service)
+    logger.info(f"👋 Session {session_id} ended ({submitted} events saved to memory)")
+    return submitted
+
+
+async def close_runner(runner: Runner) -> None:
+    """Drain pending memory submissions and close this loop's clients, then the runner."""
+    await get_memory_ingestor().drain()
+    await get_client_pool().aclose()
+    await runner.close()
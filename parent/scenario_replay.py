@@ -0,0 +1,381 @@
+"""Accelerated scenario replay for whole-system load tests.
+
+A scenario is a timeline of events, one JSON object per line:
+
+    {"t": 25200.0, "kind": "meal", "patient_id": "patient-3", "shift_id": "shift-898", "meals": "Oatmeal"}
+
+`t` is seconds from the start of the scenario. `ScenarioReplayer` fires
+every event at `t / speedup` seconds of wall time against the tool layer
+and measures per-kind latency, errors, how far behind schedule events
+start (lag), and overall throughput. Kinds and the tools they call:
+
+- note             - caregiver record_note
+- med              - caregiver record_med_note
+- meal             - parent save_patient_food_intake
+- care_instruction - parent add_patient_care_instruction
+- food_preference  - parent save_patient_food_preferences
+- sensor           - SensorAggregator (time-series store, needs TIMESERIES_DIR)
+- appointment      - parent appointment calendar
+- shift_start      - get_shift_start_summary cloud function, plus a
+                     patient_logger handover log
+
+Handlers are imported on first use. A kind whose tools cannot be
+imported here (e.g. the caregiver package without google-adk) is
+reported as unavailable and its events are skipped. Sync tools run on a
+thread pool and async tools on the event loop, with at most
+`concurrency` events in flight.
+
+`synthetic_timeline()` generates realistic handover traffic for many
+patients: each 06:00 / 14:00 / 22:00 shift opens with a shift start and
+a burst of notes, instructions and meds in its first minutes, meals and
+meds around meal times, and a steady stream of sensor events.
+
+    python -m team29.scenario_replay --patients 50 --days 2 --speedup 3600
+    python -m team29.scenario_replay --timeline recorded.jsonl --speedup 0
+"""
+
+import asyncio
+import importlib.util
+import inspect
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from team29.mock_engine import ROOMS, parse_date
+
+logger = logging.getLogger('ScenarioReplay')
+
+KINDS = ('note', 'med', 'meal', 'care_instruction', 'food_preference', 'sensor', 'appointment', 'shift_start')
+SHIFT_STARTS = (6, 14, 22)
+# Handover burst: events in the first minutes of a shift
+BURST_MINUTES = 10
+DEFAULT_CONCURRENCY = 32
+
+SHIFT_SUMMARY_FUNCTION = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), '..', 'cloud_run_functions', 'get_shift_summary', 'main.py')
+
+NOTES = ['Calm and chatty this morning.', 'Needed help with the stairs.', 'Enjoyed the garden walk.',
+         'Seemed tired after lunch.', 'Asked about the family visit.']
+INSTRUCTIONS = ['Encourage water intake in the afternoon.', 'Take medication with food.',
+                'Short walk after lunch if the weather is good.', 'No coffee after 4pm.']
+MEALS = {8: 'Breakfast: oatmeal with berries', 12: 'Lunch: soup and bread', 18: 'Dinner: chicken, rice and vegetables'}
+MEDS = ['Lisinopril 10mg taken', 'Metformin 500mg taken', 'Vitamin D taken']
+
+Handler = Callable[[Dict[str, Any]], Any]
+
+
+# ========== TIMELINES ==========
+
+def synthetic_timeline(patients: int = 10, days: int = 1, start_date: Optional[str] = None,
+                       sensor_events_per_hour: float = 6.0, seed: int = 29) -> List[Dict[str, Any]]:
+    """
+    Generate a multi-patient scenario with bursty shift handovers.
+
+    Returns:
+        Events sorted by 't'
+    """
+    rng = np.random.default_rng(seed)
+    start = datetime.combine(parse_date(start_date or datetime.now().strftime("%Y-%m-%d")), datetime.min.time())
+    patient_ids = [f"patient-{i + 1}" for i in range(patients)]
+    events: List[Dict[str, Any]] = []
+
+    for day in range(days):
+        midnight = day * 86400.0
+        for hour in SHIFT_STARTS:
+            shift_t = midnight + hour * 3600
+            shift_id = f"shift-{(start + timedelta(seconds=shift_t)).strftime('%j')}-{hour:02d}"
+            for p in patient_ids:
+                base = dict(patient_id=p, shift_id=shift_id)
+                # Caregivers hand over at nearly the same moment for every patient
+                events.append(dict(base, t=shift_t + rng.exponential(30), kind='shift_start',
+                                   caregiver=f"caregiver-{rng.integers(1, 6)}",
+                                   current_date=(start + timedelta(seconds=shift_t)).isoformat()))
+                burst = rng.uniform(0, BURST_MINUTES * 60, rng.poisson(4))
+                for t in burst:
+                    kind = rng.choice(['note', 'care_instruction', 'med'], p=[0.5, 0.2, 0.3])
+                    event = dict(base, t=shift_t + t, kind=str(kind))
+                    if kind == 'note':
+                        event['note'] = str(rng.choice(NOTES))
+                    elif kind == 'care_instruction':
+                        event['instruction'] = str(rng.choice(INSTRUCTIONS))
+                    else:
+                        event['note'] = str(rng.choice(MEDS))
+                    events.append(event)
+
+        for p in patient_ids:
+            for hour, meal in MEALS.items():
+                t = midnight + hour * 3600 + rng.normal(0, 900)
+                events.append(dict(t=t, kind='meal', patient_id=p, shift_id=f"day-{day}-{hour:02d}", meals=meal))
+                events.append(dict(t=t + rng.uniform(0, 1800), kind='med', patient_id=p, note=str(rng.choice(MEDS))))
+            if rng.random() < 0.1:
+                events.append(dict(t=midnight + rng.uniform(8, 20) * 3600, kind='food_preference', patient_id=p,
+                                   likes='soup, rice', dislikes='spicy food'))
+            if rng.random() < 0.2:
+                when = start + timedelta(days=day + int(rng.integers(1, 14)), hours=int(rng.integers(9, 17)))
+                events.append(dict(t=midnight + rng.uniform(9, 17) * 3600, kind='appointment', patient_id=p,
+                                   title='Check-up', type='doctor', time=when.strftime("%Y-%m-%d %H:%M:%S"),
+                                   duration_minutes=30))
+            sensor_times = midnight + np.sort(rng.uniform(0, 86400, rng.poisson(sensor_events_per_hour * 24)))
+            rooms = rng.integers(0, len(ROOMS), len(sensor_times))
+            for t, room in zip(sensor_times, rooms):
+                events.append(dict(t=float(t), kind='sensor', patient_id=p, room=ROOMS[room],
+                                   timestamp=(start + timedelta(seconds=float(t))).isoformat(timespec='seconds')))
+
+    for event in events:
+        event['t'] = round(max(0.0, float(event['t'])), 3)
+    events.sort(key=lambda e: e['t'])
+    return events
+
+
+def load_timeline(path: str) -> List[Dict[str, Any]]:
+    """Read a recorded scenario (JSONL), sorted by 't'."""
+    with open(path, encoding='utf-8') as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    events.sort(key=lambda e: e['t'])
+    return events
+
+
+def save_timeline(events: Iterable[Dict[str, Any]], path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        for event in events:
+            f.write(json.dumps(event) + '\n')
+
+
+# ========== HANDLERS ==========
+
+class _JsonRequest:
+    """The part of a Flask request the HTTP cloud functions use."""
+
+    method = 'POST'
+
+    def __init__(self, body: Dict[str, Any]):
+        self._body = body
+
+    def get_json(self, silent: bool = False) -> Dict[str, Any]:
+        return self._body
+
+
+def _load_shift_summary_function() -> Callable:
+    spec = importlib.util.spec_from_file_location('get_shift_summary_main', SHIFT_SUMMARY_FUNCTION)
+    if spec is None or not os.path.exists(SHIFT_SUMMARY_FUNCTION):
+        raise ImportError(f"shift summary function not found at {SHIFT_SUMMARY_FUNCTION}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.get_shift_start_summary
+
+
+def _build_sensor_aggregator() -> Any:
+    """SensorAggregator over the shared time-series store (raises ImportError if unavailable)."""
+    from team29.sensor_ingest import SensorAggregator
+    from team29.timeseries_store import get_timeseries_store
+    store = get_timeseries_store()
+    if store is None:
+        raise ImportError("sensor events need TIMESERIES_DIR")
+    return SensorAggregator(store)
+
+
+def _build_handler(kind: str) -> Handler:
+    """
+    Import the tools behind one event kind (raises ImportError if unavailable).
+
+    'sensor' is built by ScenarioReplayer.handler(), which keeps the aggregator.
+    """
+    if kind == 'note':
+        from caregiver.tools.record_caregiver_note import record_note
+        return lambda e: record_note(e['note'])
+    if kind == 'med':
+        from caregiver.tools.record_meds import record_med_note
+        return lambda e: record_med_note(e['note'])
+    if kind == 'meal':
+        from team29.firestore_agent_tools import save_patient_food_intake
+        return lambda e: save_patient_food_intake(e['patient_id'], e['shift_id'], e['meals'])
+    if kind == 'care_instruction':
+        from team29.firestore_agent_tools import add_patient_care_instruction
+        return lambda e: add_patient_care_instruction(e['patient_id'], e['instruction'])
+    if kind == 'food_preference':
+        from team29.firestore_agent_tools import save_patient_food_preferences
+        return lambda e: save_patient_food_preferences(e['patient_id'], e.get('likes', ''), e.get('dislikes', ''),
+                                                       e.get('allergies', ''), e.get('notes', ''))
+    if kind == 'appointment':
+        from team29.appointment_calendar import get_appointment_calendar
+        return lambda e: get_appointment_calendar(e['patient_id']).add(
+            {k: e[k] for k in ('title', 'type', 'time', 'duration_minutes') if k in e})
+    if kind == 'shift_start':
+        shift_summary = _load_shift_summary_function()
+        from patient_logger.tools import create_log
+
+        def start_shift(e: Dict[str, Any]) -> Any:
+            body = {'patient_name': e['patient_id'], 'caregiver_taking_over': e.get('caregiver', ''),
+                    'current_date': e.get('current_date') or datetime.now().isoformat(timespec='seconds')}
+            response = shift_summary(_JsonRequest(body))
+            create_log(e['patient_id'], e.get('caregiver', ''), '', 'caregiver', f"Handover {e['shift_id']}")
+            return response
+        return start_shift
+    raise ValueError(f"Unknown event kind {kind!r} (expected one of {KINDS})")
+
+
+# ========== REPLAY ==========
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    p50, p95, p99, top = np.percentile(np.array(values) * 1000, [50, 95, 99, 100])
+    return {'p50_ms': round(p50, 2), 'p95_ms': round(p95, 2), 'p99_ms': round(p99, 2), 'max_ms': round(top, 2)}
+
+
+class ScenarioReplayer:
+    """Replays a timeline against the tool layer and measures latency and throughput."""
+
+    def __init__(self, speedup: float = 60.0, concurrency: int = DEFAULT_CONCURRENCY,
+                 handlers: Optional[Dict[str, Handler]] = None):
+        """
+        Args:
+            speedup: Scenario seconds per wall-clock second (0 = as fast as possible)
+            concurrency: Maximum events in flight
+            handlers: Handlers per kind, overriding the default tools
+        """
+        self.speedup = speedup
+        self.concurrency = concurrency
+        self._handlers: Dict[str, Optional[Handler]] = dict(handlers or {})
+        self.unavailable: Dict[str, str] = {}
+        # Built with the 'sensor' handler; its open windows are flushed before timing stops
+        self.sensor_aggregator: Optional[Any] = None
+
+    def handler(self, kind: str) -> Optional[Handler]:
+        if kind not in self._handlers:
+            try:
+                if kind == 'sensor':
+                    aggregator = self.sensor_aggregator = _build_sensor_aggregator()
+                    self._handlers[kind] = lambda e: aggregator.ingest(e) and aggregator.flush()
+                else:
+                    self._handlers[kind] = _build_handler(kind)
+            except ImportError as e:
+                logger.warning(f"⚠️  Skipping '{kind}' events: {e}")
+                self.unavailable[kind] = str(e)
+                self._handlers[kind] = None
+        return self._handlers[kind]
+
+    async def replay(self, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Fire every event at its scaled time.
+
+        Returns:
+            Report with 'events', 'completed', 'skipped', 'errors', 'wall_seconds',
+            'throughput_per_s', 'max_lag_ms', 'latency' (overall) and 'by_kind'
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='replay')
+        slots = asyncio.Semaphore(self.concurrency)
+        latencies: Dict[str, List[float]] = {}
+        errors: Dict[str, int] = {}
+        skipped: Dict[str, int] = {}
+        lags: List[float] = []
+        pending = set()
+
+        async def run(event: Dict[str, Any], handler: Handler, due: float) -> None:
+            kind = event['kind']
+            async with slots:
+                started = time.perf_counter()
+                lags.append(max(0.0, started - due))
+                try:
+                    if inspect.iscoroutinefunction(handler):
+                        await handler(event)
+                    else:
+                        result = await loop.run_in_executor(executor, handler, event)
+                        if inspect.isawaitable(result):
+                            await result
+                except Exception as e:
+                    errors[kind] = errors.get(kind, 0) + 1
+                    if errors[kind] <= 3:
+                        logger.warning(f"⚠️  {kind} event for {event.get('patient_id')} failed: {e}")
+                finally:
+                    latencies.setdefault(kind, []).append(time.perf_counter() - started)
+
+        first_t = events[0]['t'] if events else 0.0
+        wall_start = time.perf_counter()
+        for event in events:
+            handler = self.handler(event['kind'])
+            if handler is None:
+                skipped[event['kind']] = skipped.get(event['kind'], 0) + 1
+                continue
+            due = wall_start + ((event['t'] - first_t) / self.speedup if self.speedup > 0 else 0.0)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(run(event, handler, due))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        if pending:
+            await asyncio.gather(*pending)
+        if self.sensor_aggregator is not None:
+            # Windows still open at the end of the scenario are part of the work
+            await loop.run_in_executor(executor, lambda: self.sensor_aggregator.flush(force=True))
+        wall = time.perf_counter() - wall_start
+        executor.shutdown(wait=False)
+
+        completed = sum(len(v) for v in latencies.values())
+        return {
+            'events': len(events),
+            'completed': completed,
+            'skipped': skipped,
+            'errors': sum(errors.values()),
+            'wall_seconds': round(wall, 3),
+            'throughput_per_s': round(completed / wall, 1) if wall > 0 else 0.0,
+            'max_lag_ms': round(max(lags) * 1000, 2) if lags else 0.0,
+            'latency': _percentiles([x for v in latencies.values() for x in v]),
+            'by_kind': {
+                kind: dict(count=len(values), errors=errors.get(kind, 0), **_percentiles(values))
+                for kind, values in sorted(latencies.items())
+            },
+            'unavailable': dict(self.unavailable),
+        }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\nReplayed {report['completed']} of {report['events']} events in {report['wall_seconds']} s "
+          f"({report['throughput_per_s']} events/s, {report['errors']} errors, "
+          f"max lag {report['max_lag_ms']} ms)\n")
+    print(f"{'kind':<18} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    print("-" * 74)
+    for kind, stats in report['by_kind'].items():
+        print(f"{kind:<18} {stats['count']:>7} {stats['errors']:>7} {stats['p50_ms']:>9} "
+              f"{stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['max_ms']:>9}")
+    for kind, count in report['skipped'].items():
+        print(f"{kind:<18} {count:>7} skipped ({report['unavailable'].get(kind, 'unavailable')})")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay a care scenario against the tool layer")
+    parser.add_argument('--timeline', help="Recorded scenario (JSONL); default: synthetic")
+    parser.add_argument('--patients', type=int, default=10)
+    parser.add_argument('--days', type=int, default=1)
+    parser.add_argument('--start-date', help="First day of the synthetic scenario (default: today)")
+    parser.add_argument('--speedup', type=float, default=3600.0,
+                        help="Scenario seconds per wall second (0 = as fast as possible)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--kinds', help=f"Comma-separated kinds to replay (default: all of {','.join(KINDS)})")
+    parser.add_argument('--record', help="Also write the scenario to this JSONL file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    events = load_timeline(args.timeline) if args.timeline else synthetic_timeline(
+        args.patients, args.days, args.start_date)
+    if args.kinds:
+        wanted = set(args.kinds.split(','))
+        events = [e for e in events if e['kind'] in wanted]
+    if args.record:
+        save_timeline(events, args.record)
+
+    # Tool modules log every call at INFO; keep the report readable
+    logging.getLogger().setLevel(logging.WARNING)
+    print_report(asyncio.run(ScenarioReplayer(args.speedup, args.concurrency).replay(events)))
@@ -0,0 +1,356 @@
+"""Motion-sensor event ingestion with tumbling-window aggregation.
+
+Raw sensor triggers arrive as JSON events, one per line:
+
+    {"patient_id": "John", "room": "bathroom", "timestamp": "2025-01-07T02:14:05", "duration_s": 40}
+
+(`duration_s` is optional and defaults to DEFAULT_TRIGGER_SECONDS;
+timestamps with a UTC offset, e.g. "2025-01-07T01:14:05+00:00", are
+converted to local time, and naive ones are taken as local). The
+`SensorAggregator` folds each event, in O(1), into two levels of tumbling
+windows keyed by event time:
+
+- room windows  - WINDOW_MINUTES per patient and room. When the watermark
+                  (latest event time minus the allowed lateness) passes the
+                  end of a window, it is appended to the time-series store's
+                  'motion' series as one row: last trigger time, room,
+                  trigger count and occupied seconds.
+- shift windows - the 06:00 / 14:00 / 22:00 caregiver shifts, per patient,
+                  with trigger counts and minutes per room. Closed shifts are
+                  passed to `on_shift_closed`.
+
+A quiet source would otherwise keep the watermark, and so the last
+windows, open: with `start_flush_timer()` the watermark also advances
+with the wall-clock time passed since the last event, and closed windows
+are flushed every FLUSH_INTERVAL_SECONDS.
+
+Daily summaries read the materialized window rows through
+`TimeSeriesStore.motion_sensor_record()` (the generate_motion_sensor_data
+shape), so they never rescan raw events. Events that arrive after their
+window was flushed are written as an extra row for that window; sums stay
+correct because rollups add rows up.
+
+Sources: `file_events()` reads a JSONL file (optionally following it like
+`tail -f`), `socket_events()` accepts newline-delimited JSON over TCP.
+
+    python -m team29.sensor_ingest file events.jsonl --follow
+    python -m team29.sensor_ingest socket --port 7070
+
+Requires TIMESERIES_DIR (or --store).
+"""
+
+import json
+import logging
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from team29.mock_engine import DEFAULT_PATIENT_ID, ROOMS
+from team29.timeseries_store import TimeSeriesStore
+
+logger = logging.getLogger('SensorIngest')
+
+WINDOW_MINUTES = 15
+ALLOWED_LATENESS_MINUTES = 5
+DEFAULT_TRIGGER_SECONDS = 60
+FLUSH_INTERVAL_SECONDS = 30.0
+SHIFT_HOURS = 8
+# First shift of the day starts at 06:00; the 22:00 shift runs past midnight
+SHIFT_OFFSET = np.timedelta64(6, 'h')
+SHIFT_NAMES = {6: 'day', 14: 'evening', 22: 'night'}
+
+RoomWindowKey = Tuple[str, int, np.datetime64]
+ShiftKey = Tuple[str, np.datetime64]
+
+
+def parse_event(raw: Any) -> Tuple[str, int, np.datetime64, int]:
+    """
+    Normalize a raw event (dict or JSON string).
+
+    Returns:
+        (patient_id, room index, event time as datetime64[s], duration in seconds)
+
+    Raises:
+        ValueError: For unknown rooms or unparseable events
+    """
+    event = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+    room = str(event['room']).strip().lower().replace(' ', '_')
+    if room not in ROOMS:
+        raise ValueError(f"Unknown room {event['room']!r} (expected one of {ROOMS})")
+    when = parse_timestamp(event['timestamp'])
+    return (event.get('patient_id') or DEFAULT_PATIENT_ID, ROOMS.index(room), when,
+            int(event.get('duration_s') or DEFAULT_TRIGGER_SECONDS))
+
+
+def parse_timestamp(timestamp: Any) -> np.datetime64:
+    """
+    Event time as local wall-clock time.
+
+    Epoch seconds and ISO strings with a UTC offset (or 'Z') are converted
+    to local time; naive ISO strings are taken as local already.
+    """
+    if isinstance(timestamp, (int, float)):
+        when = datetime.fromtimestamp(timestamp)
+    else:
+        text = str(timestamp).strip()
+        when = datetime.fromisoformat(text[:-1] + '+00:00' if text.endswith('Z') else text)
+        if when.tzinfo is not None:
+            when = when.astimezone().replace(tzinfo=None)
+    return np.datetime64(when.replace(microsecond=0), 's')
+
+
+def shift_start(when: np.datetime64) -> np.datetime64:
+    """Start of the caregiver shift containing an event time."""
+    shifted = (when - SHIFT_OFFSET).astype('datetime64[h]')
+    hours = int(shifted.astype(np.int64))
+    return (np.datetime64(hours - hours % SHIFT_HOURS, 'h') + SHIFT_OFFSET).astype('datetime64[s]')
+
+
+class SensorAggregator:
+    """Streaming per-room and per-shift tumbling windows over sensor events."""
+
+    def __init__(self, store: TimeSeriesStore, window_minutes: int = WINDOW_MINUTES,
+                 allowed_lateness_minutes: int = ALLOWED_LATENESS_MINUTES,
+                 on_shift_closed: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.store = store
+        self.window = np.timedelta64(window_minutes, 'm').astype('timedelta64[s]')
+        self.lateness = np.timedelta64(allowed_lateness_minutes, 'm').astype('timedelta64[s]')
+        self.on_shift_closed = on_shift_closed or self._log_shift
+        # (patient, room, window start) -> [triggers, seconds, last event time]
+        self._rooms: Dict[RoomWindowKey, List[Any]] = {}
+        # (patient, shift start) -> (triggers per room, seconds per room)
+        self._shifts: Dict[ShiftKey, Tuple[np.ndarray, np.ndarray]] = {}
+        self._watermark: Optional[np.datetime64] = None
+        # Latest event time and the monotonic clock when the last event arrived
+        self._latest: Optional[np.datetime64] = None
+        self._last_arrival = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+        self.events = 0
+        self.rejected = 0
+        self.rows_written = 0
+
+    @staticmethod
+    def _log_shift(summary: Dict[str, Any]) -> None:
+        logger.info(f"🕒 {summary['patient_id']} {summary['shift']} shift {summary['start']}: "
+                    f"{summary['total_triggers']} triggers in {len(summary['activity_by_room'])} rooms")
+
+    # ========== INGESTION ==========
+
+    def ingest(self, raw: Any) -> bool:
+        """Fold one event into its windows. Returns False if it was rejected."""
+        try:
+            patient_id, room, when, duration = parse_event(raw)
+        except (KeyError, ValueError, TypeError) as e:
+            self.rejected += 1
+            logger.warning(f"⚠️  Rejected sensor event {raw!r}: {e}")
+            return False
+
+        window_start = when - (when - np.datetime64(0, 's')) % self.window
+        with self._lock:
+            state = self._rooms.setdefault((patient_id, room, window_start), [0, 0, when])
+            state[0] += 1
+            state[1] += duration
+            state[2] = max(state[2], when)
+
+            shift_key = (patient_id, shift_start(when))
+            if shift_key not in self._shifts:
+                self._shifts[shift_key] = (np.zeros(len(ROOMS), dtype=np.int64),
+                                           np.zeros(len(ROOMS), dtype=np.int64))
+            triggers, seconds = self._shifts[shift_key]
+            triggers[room] += 1
+            seconds[room] += duration
+
+            self.events += 1
+            if self._latest is None or when > self._latest:
+                self._latest = when
+            self._last_arrival = time.monotonic()
+            if self._watermark is None or when - self.lateness > self._watermark:
+                self._watermark = when - self.lateness
+        return True
+
+    def ingest_many(self, events: Iterable[Any], flush_every: int = 1000) -> int:
+        """Ingest events, flushing closed windows every `flush_every` events."""
+        count = 0
+        for raw in events:
+            if self.ingest(raw):
+                count += 1
+                if count % flush_every == 0:
+                    self.flush()
+        self.flush()
+        return count
+
+    # ========== WINDOW CLOSING ==========
+
+    def flush(self, force: bool = False) -> int:
+        """
+        Write closed room windows to the store and emit closed shifts.
+
+        Args:
+            force: Close every open window regardless of the watermark
+
+        Returns:
+            Number of rows written to the store
+        """
+        with self._lock:
+            watermark = self._watermark
+            closed_rooms = [key for key in self._rooms
+                            if force or (watermark is not None and key[2] + self.window <= watermark)]
+            rooms = {key: self._rooms.pop(key) for key in closed_rooms}
+            shift_length = np.timedelta64(SHIFT_HOURS, 'h')
+            closed_shifts = [key for key in self._shifts
+                             if force or (watermark is not None and key[1] + shift_length <= watermark)]
+            shifts = {key: self._shifts.pop(key) for key in closed_shifts}
+
+        by_patient: Dict[str, List[Tuple[int, np.datetime64, int, int]]] = {}
+        for (patient_id, room, _), (triggers, seconds, last) in rooms.items():
+            by_patient.setdefault(patient_id, []).append((room, last, triggers, seconds))
+        written = 0
+        for patient_id, rows in by_patient.items():
+            room, last, triggers, seconds = (np.array(column) for column in zip(*rows))
+            written += self.store.append(patient_id, 'motion', last.astype('datetime64[s]'),
+                                         room=room, triggers=triggers, duration_s=seconds)
+        self.rows_written += written
+
+        for (patient_id, start), (triggers, seconds) in sorted(shifts.items(), key=lambda item: item[0][1]):
+            self.on_shift_closed(self._shift_summary(patient_id, start, triggers, seconds))
+        return written
+
+    def advance_idle(self) -> None:
+        """
+        Move the watermark forward by the wall-clock time passed since the
+        last event arrived, as if the source had kept sending events.
+        """
+        with self._lock:
+            if self._latest is None:
+                return
+            idle = np.timedelta64(int(time.monotonic() - self._last_arrival), 's')
+            candidate = self._latest + idle - self.lateness
+            if candidate > self._watermark:
+                self._watermark = candidate
+
+    def start_flush_timer(self, interval: float = FLUSH_INTERVAL_SECONDS) -> None:
+        """Advance the watermark and flush closed windows every `interval` seconds in the background."""
+        if self._timer is not None and self._timer.is_alive():
+            return
+        self._stop.clear()
+        self._timer = threading.Thread(target=self._run_timer, args=(interval,),
+                                       name='sensor-flush-timer', daemon=True)
+        self._timer.start()
+
+    def stop_flush_timer(self) -> None:
+        if self._timer is None:
+            return
+        self._stop.set()
+        self._timer.join()
+        self._timer = None
+
+    def _run_timer(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.advance_idle()
+                written = self.flush()
+                if written:
+                    logger.info(f"✅ Flushed {written} window rows")
+            except Exception as e:
+                logger.error(f"❌ ERROR flushing sensor windows: {e}")
+
+    def _shift_summary(self, patient_id: str, start: np.datetime64,
+                       triggers: np.ndarray, seconds: np.ndarray) -> Dict[str, Any]:
+        start_dt = start.astype(datetime)
+        return {
+            'patient_id': patient_id,
+            'shift': SHIFT_NAMES[start_dt.hour],
+            'start': start_dt.strftime("%Y-%m-%d %H:%M:%S"),
+            'total_triggers': int(triggers.sum()),
+            'activity_by_room': {
+                ROOMS[i]: {'triggers': int(triggers[i]), 'total_minutes': int(seconds[i] // 60)}
+                for i in np.flatnonzero(triggers)
+            },
+        }
+
+    def current_shift(self, patient_id: str = DEFAULT_PATIENT_ID) -> Optional[Dict[str, Any]]:
+        """Running totals of the latest open shift of a patient."""
+        with self._lock:
+            keys = [key for key in self._shifts if key[0] == patient_id]
+            if not keys:
+                return None
+            key = max(keys, key=lambda k: k[1])
+            triggers, seconds = (a.copy() for a in self._shifts[key])
+        return self._shift_summary(patient_id, key[1], triggers, seconds)
+
+
+# ========== SOURCES ==========
+
+def file_events(path: str, follow: bool = False, poll_interval: float = 1.0) -> Iterator[str]:
+    """Lines of a JSONL event file; with follow=True, keep waiting for new lines."""
+    with open(path) as f:
+        while True:
+            line = f.readline()
+            if line:
+                if line.strip():
+                    yield line
+            elif follow:
+                time.sleep(poll_interval)
+            else:
+                return
+
+
+def socket_events(host: str = '127.0.0.1', port: int = 7070) -> Iterator[str]:
+    """Newline-delimited JSON events from TCP clients, one connection at a time."""
+    with socket.create_server((host, port)) as server:
+        logger.info(f"📡 Listening for sensor events on {host}:{port}")
+        while True:
+            conn, address = server.accept()
+            logger.info(f"🔌 Sensor source connected from {address[0]}:{address[1]}")
+            with conn, conn.makefile('r') as stream:
+                for line in stream:
+                    if line.strip():
+                        yield line
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Ingest motion-sensor events into the time-series store")
+    parser.add_argument('--store', default=os.getenv('TIMESERIES_DIR'), help="Time-series store directory")
+    parser.add_argument('--window-minutes', type=int, default=WINDOW_MINUTES)
+    parser.add_argument('--flush-interval', type=float, default=FLUSH_INTERVAL_SECONDS,
+                        help="Seconds between timed flushes of live sources")
+    sources = parser.add_subparsers(dest='source', required=True)
+    file_parser = sources.add_parser('file', help="Read a JSONL event file")
+    file_parser.add_argument('path')
+    file_parser.add_argument('--follow', action='store_true', help="Keep reading appended events")
+    socket_parser = sources.add_parser('socket', help="Accept events over TCP")
+    socket_parser.add_argument('--host', default='127.0.0.1')
+    socket_parser.add_argument('--port', type=int, default=7070)
+    args = parser.parse_args()
+
+    if not args.store:
+        parser.error("set TIMESERIES_DIR or pass --store")
+    aggregator = SensorAggregator(TimeSeriesStore(args.store), window_minutes=args.window_minutes)
+
+    if args.source == 'file':
+        events = file_events(args.path, follow=args.follow)
+    else:
+        events = socket_events(args.host, args.port)
+    # Live sources can go quiet; close their windows on a timer too
+    if args.source == 'socket' or args.follow:
+        aggregator.start_flush_timer(args.flush_interval)
+    try:
+        aggregator.ingest_many(events, flush_every=100)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        aggregator.stop_flush_timer()
+        aggregator.flush(force=True)
+        print(f"✅ Ingested {aggregator.events} events ({aggregator.rejected} rejected), "
+              f"wrote {aggregator.rows_written} window rows")
@@ -0,0 +1,519 @@
+"""Pluggable storage backends for FirestoreNativeService.
+
+The service only needs a small slice of Firestore: documents addressed by
+(collection, document id), `set(..., merge=True)` writes and collection /
+document listings. This module defines that slice as `StorageBackend` and
+ships three implementations:
+
+- `FirestoreBackend` - the real Firestore Native database (default)
+- `InMemoryBackend`  - a process-local dict, for tests and benchmarks
+- `SQLiteBackend`    - a single local file, for offline development
+
+Select a backend with the STORAGE_BACKEND environment variable
+('firestore', 'memory' or 'sqlite'). The SQLite file location is taken
+from STORAGE_SQLITE_PATH.
+
+Read-modify-write paths use `run_transaction(func)`: func reads through
+the `Transaction` it is given and buffers its writes, which are committed
+atomically when it returns. Firestore runs it in a client transaction, the
+in-memory store under its lock and SQLite in a `BEGIN IMMEDIATE`
+transaction. A transaction that loses a race with a concurrent writer
+raises `TransactionConflict` without committing anything; retrying is up
+to the caller.
+"""
+
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from bisect import bisect_right
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple, TypeVar
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    from google.cloud import firestore
+except ImportError:  # Offline backends do not need the Firestore client
+    firestore = None
+
+from team29.client_pool import get_client_pool
+
+logger = logging.getLogger('StorageBackends')
+
+DEFAULT_PROJECT_ID = 'qwiklabs-gcp-04-b310107eab82'
+DEFAULT_SQLITE_PATH = 'team29_local.db'
+
+# Firestore rejects batches with more than 500 writes
+MAX_BATCH_WRITES = 500
+
+# One listed document: (doc_id, data). data is None for keys-only queries.
+DocumentRow = Tuple[str, Optional[Dict[str, Any]]]
+
+# One batched write: (collection, doc_id, data)
+DocumentWrite = Tuple[str, str, Dict[str, Any]]
+
+T = TypeVar('T')
+
+
+def project_document(data: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Keep only the requested top-level fields of a document."""
+    if fields is None:
+        return data
+    return {field: data[field] for field in fields if field in data}
+
+
+def merge_document(existing: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply Firestore `set(..., merge=True)` semantics.
+
+    Nested maps are merged field by field; every other value (including
+    lists) replaces the existing one.
+    """
+    merged = dict(existing)
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_document(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+class TransactionConflict(Exception):
+    """A transaction lost a race with a concurrent writer and was not committed."""
+
+
+class Transaction:
+    """Reads and buffered writes of one `run_transaction()` call.
+
+    As in Firestore, reads see the committed state (not this transaction's
+    own writes), so a transaction should do all its reads first.
+    """
+
+    def __init__(self, read: Callable[[str, str], Optional[Dict[str, Any]]]):
+        self._read = read
+        # (collection, doc_id, data, merge), applied in order at commit
+        self.writes: List[Tuple[str, str, Dict[str, Any], bool]] = []
+
+    def get(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        return self._read(collection, doc_id)
+
+    def set(self, collection: str, doc_id: str, data: Dict[str, Any], merge: bool = True) -> None:
+        self.writes.append((collection, doc_id, data, merge))
+
+
+class StorageBackend(ABC):
+    """Interface implemented by every storage backend.
+
+    Every abstract method must be implemented; an incomplete backend fails
+    when it is constructed.
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def get_document(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Return the document data, or None if it does not exist."""
+
+    @abstractmethod
+    def set_document(self, collection: str, doc_id: str, data: Dict[str, Any],
+                     merge: bool = True) -> None:
+        """Create or update a document."""
+
+    @abstractmethod
+    def set_documents(self, writes: List[DocumentWrite], merge: bool = True) -> None:
+        """Apply several writes atomically (all or nothing)."""
+
+    @abstractmethod
+    def delete_documents(self, collection: str, doc_ids: List[str]) -> None:
+        """Delete documents from a collection (missing ones are ignored)."""
+
+    @abstractmethod
+    def run_transaction(self, func: Callable[[Transaction], T]) -> T:
+        """Run func(transaction) once and commit its writes atomically.
+
+        Raises:
+            TransactionConflict: A concurrent writer got in the way; nothing was written
+        """
+
+    @abstractmethod
+    def list_collections(self) -> List[str]:
+        """Return the ids of all top-level collections."""
+
+    @abstractmethod
+    def list_documents(self, collection: str, limit: Optional[int] = None) -> List[str]:
+        """Return document ids in a collection, in id order."""
+
+    @abstractmethod
+    def query_page(self, collection: str, page_size: int, start_after: Optional[str] = None,
+                   keys_only: bool = False, fields: Optional[List[str]] = None) -> List[DocumentRow]:
+        """Return one page of documents ordered by id.
+
+        Args:
+            collection: Collection to read
+            page_size: Maximum number of documents in the page
+            start_after: Cursor - only documents with an id greater than this are returned
+            keys_only: Return ids only (data is None)
+            fields: Projection - top-level fields to return (default: all)
+        """
+
+    def iter_collections(self) -> Iterator[str]:
+        """Yield top-level collection ids lazily."""
+        return iter(self.list_collections())
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class FirestoreBackend(StorageBackend):
+    """Backend for the real Firestore Native database.
+
+    The underlying client comes from the shared client pool, so backends for
+    the same (project, database) reuse one channel and the pool owns closing it.
+    """
+
+    name = 'firestore'
+
+    def __init__(self, project_id: Optional[str] = None, database: str = 'default'):
+        if firestore is None:
+            raise RuntimeError(
+                "google-cloud-firestore is not installed. "
+                "Install it or set STORAGE_BACKEND=memory / sqlite."
+            )
+        if project_id is None:
+            project_id = os.getenv('GOOGLE_CLOUD_PROJECT', DEFAULT_PROJECT_ID)
+        self.project_id = project_id
+        self.database = database
+        self.client = get_client_pool().firestore(project_id, database)
+
+    def get_document(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        doc = self.client.collection(collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def set_document(self, collection: str, doc_id: str, data: Dict[str, Any],
+                     merge: bool = True) -> None:
+        self.client.collection(collection).document(doc_id).set(data, merge=merge)
+
+    def set_documents(self, writes: List[DocumentWrite], merge: bool = True) -> None:
+        if len(writes) > MAX_BATCH_WRITES:
+            raise ValueError(f"Firestore batches are limited to {MAX_BATCH_WRITES} writes, got {len(writes)}")
+        batch = self.client.batch()
+        for collection, doc_id, data in writes:
+            batch.set(self.client.collection(collection).document(doc_id), data, merge=merge)
+        batch.commit()
+
+    def delete_documents(self, collection: str, doc_ids: List[str]) -> None:
+        for start in range(0, len(doc_ids), MAX_BATCH_WRITES):
+            batch = self.client.batch()
+            for doc_id in doc_ids[start:start + MAX_BATCH_WRITES]:
+                batch.delete(self.client.collection(collection).document(doc_id))
+            batch.commit()
+
+    def run_transaction(self, func: Callable[[Transaction], T]) -> T:
+        # One attempt per call: the caller owns retries, backoff and their metrics
+        client_transaction = self.client.transaction(max_attempts=1)
+
+        @firestore.transactional
+        def run(client_transaction):
+            return func(FirestoreTransaction(self.client, client_transaction))
+
+        try:
+            return run(client_transaction)
+        except google_exceptions.Aborted as e:
+            raise TransactionConflict(str(e)) from e
+        except ValueError as e:
+            # Raised once the client's own attempts are used up on an Aborted commit
+            if isinstance(e.__cause__, google_exceptions.Aborted):
+                raise TransactionConflict(str(e.__cause__)) from e
+            raise
+
+    def list_collections(self) -> List[str]:
+        return [col.id for col in self.client.collections()]
+
+    def list_documents(self, collection: str, limit: Optional[int] = None) -> List[str]:
+        query = self.client.collection(collection)
+        if limit is not None:
+            query = query.limit(limit)
+        return [doc.id for doc in query.stream()]
+
+    def query_page(self, collection: str, page_size: int, start_after: Optional[str] = None,
+                   keys_only: bool = False, fields: Optional[List[str]] = None) -> List[DocumentRow]:
+        doc_id_path = firestore.FieldPath.document_id()
+        query = self.client.collection(collection).order_by(doc_id_path)
+        if keys_only:
+            query = query.select([doc_id_path])
+        elif fields is not None:
+            query = query.select(fields)
+        if start_after is not None:
+            query = query.start_after({doc_id_path: start_after})
+        query = query.limit(page_size)
+        return [(doc.id, None if keys_only else doc.to_dict()) for doc in query.stream()]
+
+    def iter_collections(self) -> Iterator[str]:
+        for col in self.client.collections():
+            yield col.id
+
+
+class FirestoreTransaction(Transaction):
+    """Transaction that reads and writes through a Firestore client transaction."""
+
+    def __init__(self, client: Any, client_transaction: Any):
+        super().__init__(self._get)
+        self.client = client
+        self.client_transaction = client_transaction
+
+    def _get(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        doc = self.client.collection(collection).document(doc_id).get(transaction=self.client_transaction)
+        return doc.to_dict() if doc.exists else None
+
+    def set(self, collection: str, doc_id: str, data: Dict[str, Any], merge: bool = True) -> None:
+        super().set(collection, doc_id, data, merge)
+        self.client_transaction.set(self.client.collection(collection).document(doc_id), data, merge=merge)
+
+
+class InMemoryBackend(StorageBackend):
+    """Backend that keeps all documents in a process-local dict."""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        data = self._collections.get(collection, {}).get(doc_id)
+        return copy.deepcopy(data) if data is not None else None
+
+    def _store(self, collection: str, doc_id: str, data: Dict[str, Any], merge: bool) -> None:
+        docs = self._collections.setdefault(collection, {})
+        if merge and doc_id in docs:
+            docs[doc_id] = merge_document(docs[doc_id], data)
+        else:
+            docs[doc_id] = copy.deepcopy(data)
+
+    def get_document(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._load(collection, doc_id)
+
+    def set_document(self, collection: str, doc_id: str, data: Dict[str, Any],
+                     merge: bool = True) -> None:
+        with self._lock:
+            self._store(collection, doc_id, data, merge)
+
+    def set_documents(self, writes: List[DocumentWrite], merge: bool = True) -> None:
+        with self._lock:
+            for collection, doc_id, data in writes:
+                self._store(collection, doc_id, data, merge)
+
+    def delete_documents(self, collection: str, doc_ids: List[str]) -> None:
+        with self._lock:
+            docs = self._collections.get(collection, {})
+            for doc_id in doc_ids:
+                docs.pop(doc_id, None)
+
+    def run_transaction(self, func: Callable[[Transaction], T]) -> T:
+        # Transactions are serialized by the lock, so they never conflict
+        with self._lock:
+            transaction = Transaction(self._load)
+            result = func(transaction)
+            for collection, doc_id, data, merge in transaction.writes:
+                self._store(collection, doc_id, data, merge)
+        return result
+
+    def list_collections(self) -> List[str]:
+        with self._lock:
+            return sorted(name for name, docs in self._collections.items() if docs)
+
+    def list_documents(self, collection: str, limit: Optional[int] = None) -> List[str]:
+        with self._lock:
+            doc_ids = sorted(self._collections.get(collection, {}))
+        return doc_ids[:limit] if limit is not None else doc_ids
+
+    def query_page(self, collection: str, page_size: int, start_after: Optional[str] = None,
+                   keys_only: bool = False, fields: Optional[List[str]] = None) -> List[DocumentRow]:
+        with self._lock:
+            docs = self._collections.get(collection, {})
+            doc_ids = sorted(docs)
+            start = bisect_right(doc_ids, start_after) if start_after is not None else 0
+            page_ids = doc_ids[start:start + page_size]
+            if keys_only:
+                return [(doc_id, None) for doc_id in page_ids]
+            return [(doc_id, copy.deepcopy(project_document(docs[doc_id], fields)))
+                    for doc_id in page_ids]
+
+
+def encode_json_value(value: Any) -> Any:
+    """JSON default hook that keeps datetimes round-trippable."""
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def decode_json_value(obj: Dict[str, Any]) -> Any:
+    """JSON object hook that restores datetimes written by encode_json_value."""
+    if len(obj) == 1 and '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    return obj
+
+
+class SQLiteBackend(StorageBackend):
+    """Backend that stores documents as JSON rows in a local SQLite file."""
+
+    name = 'sqlite'
+
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            path = os.getenv('STORAGE_SQLITE_PATH', DEFAULT_SQLITE_PATH)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            ' collection TEXT NOT NULL,'
+            ' doc_id TEXT NOT NULL,'
+            ' data TEXT NOT NULL,'
+            ' update_time TEXT NOT NULL,'
+            ' PRIMARY KEY (collection, doc_id))'
+        )
+
+    def _load(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            'SELECT data FROM documents WHERE collection = ? AND doc_id = ?',
+            (collection, doc_id)
+        ).fetchone()
+        return json.loads(row[0], object_hook=decode_json_value) if row else None
+
+    def get_document(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._load(collection, doc_id)
+
+    def _store(self, collection: str, doc_id: str, data: Dict[str, Any], merge: bool) -> None:
+        existing = self._load(collection, doc_id) if merge else None
+        if existing is not None:
+            data = merge_document(existing, data)
+        self._conn.execute(
+            'INSERT OR REPLACE INTO documents (collection, doc_id, data, update_time) '
+            'VALUES (?, ?, ?, ?)',
+            (collection, doc_id, json.dumps(data, default=encode_json_value),
+             datetime.utcnow().isoformat())
+        )
+
+    def set_document(self, collection: str, doc_id: str, data: Dict[str, Any],
+                     merge: bool = True) -> None:
+        self.set_documents([(collection, doc_id, data)], merge=merge)
+
+    def set_documents(self, writes: List[DocumentWrite], merge: bool = True) -> None:
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                for collection, doc_id, data in writes:
+                    self._store(collection, doc_id, data, merge)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def delete_documents(self, collection: str, doc_ids: List[str]) -> None:
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.executemany(
+                    'DELETE FROM documents WHERE collection = ? AND doc_id = ?',
+                    [(collection, doc_id) for doc_id in doc_ids]
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def run_transaction(self, func: Callable[[Transaction], T]) -> T:
+        with self._lock:
+            try:
+                # Takes the write lock up front; other processes wait up to the busy timeout
+                self._conn.execute('BEGIN IMMEDIATE')
+            except sqlite3.OperationalError as e:
+                raise TransactionConflict(str(e)) from e
+            try:
+                transaction = Transaction(self._load)
+                result = func(transaction)
+                for collection, doc_id, data, merge in transaction.writes:
+                    self._store(collection, doc_id, data, merge)
+                self._conn.execute('COMMIT')
+            except sqlite3.OperationalError as e:
+                self._conn.execute('ROLLBACK')
+                if 'locked' in str(e) or 'busy' in str(e):
+                    raise TransactionConflict(str(e)) from e
+                raise
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return result
+
+    def list_collections(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT DISTINCT collection FROM documents ORDER BY collection'
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def list_documents(self, collection: str, limit: Optional[int] = None) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT doc_id FROM documents WHERE collection = ? ORDER BY doc_id LIMIT ?',
+                (collection, -1 if limit is None else limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def query_page(self, collection: str, page_size: int, start_after: Optional[str] = None,
+                   keys_only: bool = False, fields: Optional[List[str]] = None) -> List[DocumentRow]:
+        columns = 'doc_id' if keys_only else 'doc_id, data'
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT {columns} FROM documents WHERE collection = ? AND doc_id > ? '
+                'ORDER BY doc_id LIMIT ?',
+                (collection, '' if start_after is None else start_after, page_size)
+            ).fetchall()
+        if keys_only:
+            return [(row[0], None) for row in rows]
+        return [(row[0], project_document(json.loads(row[1], object_hook=decode_json_value), fields))
+                for row in rows]
+
+    def iter_collections(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT DISTINCT collection FROM documents ORDER BY collection'
+            ).fetchall()
+        for row in rows:
+            yield row[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_backend(kind: Optional[str] = None, project_id: Optional[str] = None,
+                   database: str = 'default', sqlite_path: Optional[str] = None) -> StorageBackend:
+    """Create a storage backend by name.
+
+    Args:
+        kind: 'firestore', 'memory' or 'sqlite' (default: STORAGE_BACKEND env var, then 'firestore')
+        project_id: Google Cloud project (Firestore backend only)
+        database: Firestore database id (Firestore backend only)
+        sqlite_path: Database file (SQLite backend only)
+
+    Returns:
+        A ready-to-use StorageBackend
+    """
+    if kind is None:
+        kind = os.getenv('STORAGE_BACKEND', 'firestore')
+    kind = kind.strip().lower()
+
+    if kind == 'firestore':
+        return FirestoreBackend(project_id=project_id, database=database)
+    if kind == 'memory':
+        return InMemoryBackend()
+    if kind == 'sqlite':
+        return SQLiteBackend(path=sqlite_path)
+    raise ValueError(f"Unknown storage backend: {kind!r} (expected 'firestore', 'memory' or 'sqlite')")
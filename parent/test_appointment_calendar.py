@@ -0,0 +1,111 @@
+"""Tests for the appointment calendar index."""
+
+from team29.appointment_calendar import AppointmentCalendar, get_appointment_calendar
+from team29.mock_data import generate_appointments
+
+
+def _apt(apt_id, time, duration=60, location=None):
+    appointment = {'id': apt_id, 'title': apt_id, 'type': 'doctor', 'time': time, 'duration_minutes': duration}
+    if location:
+        appointment['location'] = location
+    return appointment
+
+
+def test_weekly_rule_expands_over_queried_range():
+    calendar = AppointmentCalendar()
+    calendar.add_recurring({'id': 'physio', 'title': 'Physical Therapy', 'type': 'therapy',
+                            'weekday': 'tuesday', 'time': '10:00', 'duration_minutes': 45,
+                            'until': '2025-10-28'})
+
+    occurrences = calendar.between('2025-10-13 00:00:00', '2025-11-30 00:00:00')
+
+    assert [a['time'] for a in occurrences] == [
+        '2025-10-14 10:00:00', '2025-10-21 10:00:00', '2025-10-28 10:00:00']
+    assert [a['id'] for a in occurrences] == ['physio@2025-10-14', 'physio@2025-10-21', 'physio@2025-10-28']
+    assert all(a['recurring'] and a['duration_minutes'] == 45 for a in occurrences)
+    # An occurrence already running at the start of the range overlaps it
+    assert [a['time'] for a in calendar.between('2025-10-14 10:30:00', '2025-10-15 00:00:00')] == [
+        '2025-10-14 10:00:00']
+
+
+def test_interval_rule_is_anchored_on_its_start_date():
+    calendar = AppointmentCalendar()
+    calendar.add_recurring({'id': 'labs', 'title': 'Blood Test', 'type': 'doctor', 'interval_days': 3,
+                            'start_date': '2025-10-02', 'time': '08:15'})
+
+    occurrences = calendar.between('2025-10-01 00:00:00', '2025-10-12 00:00:00')
+
+    assert [a['time'] for a in occurrences] == [
+        '2025-10-02 08:15:00', '2025-10-05 08:15:00', '2025-10-08 08:15:00', '2025-10-11 08:15:00']
+    assert [a['time'] for a in calendar.between('2025-10-06 00:00:00', '2025-10-09 00:00:00')] == [
+        '2025-10-08 08:15:00']
+
+
+def test_conflicts_report_overlaps_and_short_travel_gaps():
+    calendar = AppointmentCalendar()
+    calendar.add_many([
+        _apt('checkup', '2025-10-14 09:00:00', 90, 'Clinic'),
+        _apt('inside', '2025-10-14 09:15:00', 30, 'Clinic'),
+        # 15 minutes after the check-up ends, same place: no buffer needed
+        _apt('pharmacy', '2025-10-14 10:45:00', 30, 'Clinic'),
+        # 10 minutes after the pharmacy, somewhere else
+        _apt('book_club', '2025-10-14 11:25:00', 60, 'Library'),
+        # An hour later: fine
+        _apt('walk', '2025-10-14 13:25:00', 60, 'Park'),
+    ])
+
+    conflicts = calendar.conflicts('2025-10-14 00:00:00', '2025-10-15 00:00:00')
+
+    assert [(c['kind'], c['first']['id'], c['second']['id'], c['gap_minutes']) for c in conflicts] == [
+        ('overlap', 'checkup', 'inside', -75),
+        ('travel_buffer', 'pharmacy', 'book_club', 10),
+    ]
+    assert calendar.conflicts('2025-10-14 00:00:00', '2025-10-15 00:00:00', travel_buffer_minutes=5) == [
+        conflicts[0]]
+
+
+def test_conflicts_compare_with_the_latest_ending_appointment():
+    calendar = AppointmentCalendar()
+    calendar.add_many([
+        _apt('long', '2025-10-14 09:00:00', 180),
+        _apt('short', '2025-10-14 09:30:00', 15),
+        _apt('late', '2025-10-14 11:00:00', 30),
+    ])
+    calendar.add_recurring({'id': 'walk', 'title': 'Walk', 'type': 'exercise', 'weekday': 1,
+                            'time': '12:10', 'duration_minutes': 30})
+
+    conflicts = calendar.conflicts('2025-10-14 00:00:00', '2025-10-15 00:00:00')
+
+    assert [(c['kind'], c['first']['id'], c['second']['id'], c['gap_minutes']) for c in conflicts] == [
+        ('overlap', 'long', 'short', -150),
+        ('overlap', 'long', 'late', -60),
+        ('travel_buffer', 'long', 'walk@2025-10-14', 10),
+    ]
+
+
+def test_source_is_loaded_lazily_as_the_range_moves_forward():
+    loaded = []
+
+    def source(start_date, days):
+        loaded.append((start_date, days))
+        return generate_appointments(days, start_date)
+
+    calendar = AppointmentCalendar(source=source)
+    first = calendar.between('2025-10-10 00:00:00', '2025-10-17 00:00:00')
+    later = calendar.between('2026-03-01 00:00:00', '2026-03-08 00:00:00')
+    calendar.between('2025-10-12 00:00:00', '2025-10-15 00:00:00')
+
+    assert loaded == [('2025-10-09', 9), ('2025-10-18', 142)]
+    expected = generate_appointments(7, '2026-03-01')
+    assert later == expected and expected
+    assert first == generate_appointments(7, '2025-10-10')
+
+
+def test_shared_calendar_follows_the_seeded_engine():
+    calendar = get_appointment_calendar()
+    appointments = [a for a in calendar.between('2027-01-04 00:00:00', '2027-01-11 00:00:00')
+                    if not a.get('recurring')]
+
+    assert appointments == generate_appointments(7, '2027-01-04')
+    assert len([a for a in calendar.between('2027-01-04 00:00:00', '2027-01-11 00:00:00')
+                if a.get('recurring')]) == 2
@@ -0,0 +1,57 @@
+"""Tests for the bulk JSONL importer (in-memory backend, no Firestore needed)."""
+
+import json
+
+import pytest
+
+from team29.bulk_import import import_jsonl, writer_for
+from team29.firestore_native_service import FirestoreNativeService
+from team29.storage_backends import InMemoryBackend
+
+
+def _service():
+    return FirestoreNativeService(backend=InMemoryBackend(), journal_dir='')
+
+
+def _write_jsonl(path, records):
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    return str(path)
+
+
+def test_repeated_document_keeps_last_line(tmp_path):
+    records = []
+    for v in range(200):
+        records.append({'collection': 'versions', 'document_id': 'doc', 'data': {'v': v}})
+        # Unrelated documents spread the other writers' load between the versions
+        records.append({'collection': 'other', 'document_id': f"doc-{v}", 'data': {'v': v}})
+    service = _service()
+
+    report = import_jsonl(_write_jsonl(tmp_path / 'versions.jsonl', records), service=service,
+                          batch_size=3, workers=4, base_delay=0)
+
+    assert report['written'] == 400
+    assert report['failed'] == 0
+    assert service.read_from_collection('versions', 'doc') == {'v': 199}
+    assert service.read_from_collection('other', 'doc-150') == {'v': 150}
+
+
+def test_writer_for_is_stable():
+    assert writer_for('food', 'John', 4) == writer_for('food', 'John', 4)
+    assert all(0 <= writer_for('food', f"p{i}", 3) < 3 for i in range(50))
+
+
+def test_invalid_lines_are_reported(tmp_path):
+    path = tmp_path / 'mixed.jsonl'
+    path.write_text('{"collection": "a", "document_id": "x", "data": {"k": 1}}\nnot json\n'
+                    '{"collection": "a/b", "document_id": "y", "data": {"k": 1}}\n')
+    service = _service()
+
+    report = import_jsonl(str(path), service=service, workers=2, base_delay=0)
+
+    assert report['written'] == 1
+    assert [failure['line'] for failure in report['failures']] == [2, 3]
+
+
+def test_rejects_bad_worker_count(tmp_path):
+    with pytest.raises(ValueError):
+        import_jsonl(str(tmp_path / 'none.jsonl'), service=_service(), workers=0)
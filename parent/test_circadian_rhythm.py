@@ -0,0 +1,22 @@
+"""Tests for the circadian rhythm metrics."""
+
+import numpy as np
+
+from team29.circadian_rhythm import circadian_metrics
+from team29.mock_engine import ACTIVITY_SHAPE
+
+
+def test_random_activity_has_no_rhythm():
+    rng = np.random.default_rng(7)
+    metrics = circadian_metrics(rng.integers(0, 501, (14, 24)).astype(float))
+
+    assert not metrics['rhythm_detected']
+
+
+def test_day_night_activity_has_a_rhythm():
+    rng = np.random.default_rng(7)
+    metrics = circadian_metrics(rng.integers(0, 501, (14, 24)) * ACTIVITY_SHAPE)
+
+    assert metrics['rhythm_detected']
+    assert 7 <= metrics['m10_start'] <= 10
+    assert metrics['l5_start'] in (0, 1, 22, 23)
@@ -0,0 +1,109 @@
+"""Tests for the shared database client pool."""
+
+import asyncio
+
+import pytest
+
+from team29 import client_pool
+from team29.client_pool import ClientPool
+
+
+class FakeAsyncClient:
+    def __init__(self, project, database):
+        self.loop = asyncio.get_running_loop()
+        self.closed_on = None
+
+    async def close(self):
+        self.closed_on = asyncio.get_running_loop()
+
+
+@pytest.fixture(autouse=True)
+def fake_async_factory(monkeypatch):
+    monkeypatch.setitem(client_pool.CLIENT_FACTORIES, 'firestore_async', FakeAsyncClient)
+
+
+async def _two_fetches(pool):
+    return pool.firestore_async(), pool.firestore_async()
+
+
+def test_async_clients_are_shared_per_loop():
+    pool = ClientPool()
+
+    first, again = asyncio.run(_two_fetches(pool))
+    other, _ = asyncio.run(_two_fetches(pool))
+
+    assert first is again
+    assert other is not first
+    assert other.loop is not first.loop
+
+
+def test_async_client_outside_a_loop_is_an_error():
+    with pytest.raises(RuntimeError):
+        ClientPool().firestore_async()
+
+
+def test_aclose_runs_hooks_and_closes_clients_on_the_owning_loop():
+    pool = ClientPool()
+    ran_on = []
+
+    async def scenario():
+        async def hook():
+            ran_on.append(asyncio.get_running_loop())
+
+        client = pool.firestore_async()
+        pool.register_shutdown_hook(hook)
+        await pool.aclose()
+        return client, asyncio.get_running_loop()
+
+    client, loop = asyncio.run(scenario())
+
+    assert ran_on == [loop]
+    assert client.closed_on is loop
+    assert pool.keys() == []
+
+
+def test_close_all_finishes_async_work_on_an_idle_owning_loop():
+    pool = ClientPool()
+    ran_on = []
+    loop = asyncio.new_event_loop()
+    try:
+        async def setup():
+            async def hook():
+                ran_on.append(asyncio.get_running_loop())
+
+            pool.register_shutdown_hook(hook)
+            return pool.firestore_async()
+
+        client = loop.run_until_complete(setup())
+        pool.close_all()
+
+        assert ran_on == [loop]
+        assert client.closed_on is loop
+    finally:
+        loop.close()
+
+
+def test_close_all_never_runs_async_work_on_a_new_loop():
+    pool = ClientPool()
+    ran = []
+
+    async def setup():
+        async def hook():
+            ran.append(True)
+
+        pool.register_shutdown_hook(hook)
+        return pool.firestore_async()
+
+    client = asyncio.run(setup())
+    pool.close_all()
+
+    assert ran == []
+    assert client.closed_on is None
+
+
+def test_async_hook_needs_a_running_loop():
+    async def hook():
+        pass
+
+    with pytest.raises(RuntimeError):
+        ClientPool().register_shutdown_hook(hook)
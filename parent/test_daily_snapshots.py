@@ -0,0 +1,63 @@
+"""Tests for the daily snapshot cache and range table."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from team29.daily_snapshots import DailySnapshotCache, build_range_table
+from team29.timeseries_store import TimeSeriesStore, backfill_from_mock
+
+
+def test_range_table_is_the_same_with_the_store(tmp_path, monkeypatch):
+    monkeypatch.delenv('TIMESERIES_DIR', raising=False)
+    mock_only = build_range_table('2025-09-25', 14)
+
+    backfill_from_mock(TimeSeriesStore(str(tmp_path)), '2025-09-28', 7)
+    monkeypatch.setenv('TIMESERIES_DIR', str(tmp_path))
+    with_store = build_range_table('2025-09-25', 14)
+
+    for column, values in mock_only.items():
+        assert np.array_equal(values, with_store[column]), column
+
+
+def _cache(monkeypatch, tmp_path):
+    monkeypatch.delenv('TIMESERIES_DIR', raising=False)
+    return DailySnapshotCache(str(tmp_path / 'snapshots'))
+
+
+def test_future_snapshots_are_not_rebuilt_on_every_call(tmp_path, monkeypatch):
+    cache = _cache(monkeypatch, tmp_path)
+    future = (datetime.now() + timedelta(days=3)).strftime("%Y-%m-%d")
+
+    cache.get(future)
+    cache.get(future)
+    DailySnapshotCache(cache.directory).get(future)
+
+    assert cache.builds == 1
+    assert cache.hits == 1
+
+
+def test_past_snapshots_are_served_from_disk(tmp_path, monkeypatch):
+    cache = _cache(monkeypatch, tmp_path)
+    cache.get('2025-10-01')
+
+    reloaded = DailySnapshotCache(cache.directory)
+    snapshot = reloaded.get('2025-10-01')
+
+    assert reloaded.builds == 0
+    assert snapshot['date'] == '2025-10-01'
+
+
+def test_today_is_rebuilt_when_samples_arrive(tmp_path, monkeypatch):
+    cache = _cache(monkeypatch, tmp_path)
+    store_dir = tmp_path / 'store'
+    monkeypatch.setenv('TIMESERIES_DIR', str(store_dir))
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    cache.get(today)
+    cache.get(today)
+    TimeSeriesStore(str(store_dir)).append('John', 'movement', np.array([np.datetime64(today, 's') + 3600]),
+                                           steps=[100], active_seconds=[60], distance_m=[75])
+    cache.get(today)
+
+    assert cache.builds == 2
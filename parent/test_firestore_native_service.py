@@ -0,0 +1,62 @@
+"""Tests for collection paging in the Firestore service."""
+
+import pytest
+
+from team29 import firestore_agent_tools
+from team29.firestore_native_service import FirestoreNativeService
+from team29.storage_backends import InMemoryBackend
+
+
+@pytest.fixture
+def service():
+    service = FirestoreNativeService(backend=InMemoryBackend(), journal_dir='')
+    for i in range(5):
+        service.save_to_collection('notes', f"n{i}", {'i': i})
+    return service
+
+
+def test_pages_cover_the_collection(service):
+    first = service.list_documents_page('notes', page_size=3)
+    second = service.list_documents_page('notes', page_size=3, start_after=first['next_page_token'])
+
+    assert first['documents'] == ['n0', 'n1', 'n2']
+    assert second == {'documents': ['n3', 'n4'], 'next_page_token': None}
+    assert list(service.stream_documents('notes', page_size=2)) == ['n0', 'n1', 'n2', 'n3', 'n4']
+
+
+@pytest.mark.parametrize('page_size', [0, -1])
+def test_page_size_below_one_is_rejected(service, page_size):
+    with pytest.raises(ValueError):
+        service.list_documents_page('notes', page_size=page_size)
+    with pytest.raises(ValueError):
+        service.stream_documents('notes', page_size=page_size)
+
+
+def test_list_tool_reports_bad_page_size(service, monkeypatch):
+    monkeypatch.setattr(firestore_agent_tools, 'get_firestore_native_service', lambda: service)
+
+    assert 'at least 1' in firestore_agent_tools.list_firestore_documents('notes', page_size=0)
+
+
+@pytest.mark.parametrize('journaled', [False, True])
+def test_updates_add_to_stored_preference_lists(tmp_path, monkeypatch, journaled):
+    service = FirestoreNativeService(backend=InMemoryBackend(), journal_dir=str(tmp_path) if journaled else '')
+    monkeypatch.setattr(firestore_agent_tools, 'get_firestore_native_service', lambda: service)
+    try:
+        firestore_agent_tools.save_patient_updates('John', likes='soup, tea', allergies='peanuts', notes='Small meals')
+        firestore_agent_tools.save_patient_updates('John', likes='tea, toast', allergies='shellfish',
+                                                   instructions=['Walk after lunch'])
+
+        preferences = service.get_food_preferences('John')
+        assert preferences['likes'] == ['soup', 'tea', 'toast']
+        assert preferences['allergies'] == ['peanuts', 'shellfish']
+        assert preferences['notes'] == 'Small meals'
+        assert service.get_care_instructions('John') == ['Walk after lunch']
+    finally:
+        if service.replayer is not None:
+            assert service.replayer.flush(timeout=10)
+            service.replayer.stop()
+
+    if journaled:
+        stored = service.backend.get_document('food-preferences', 'John')
+        assert stored['allergies'] == ['peanuts', 'shellfish']
@@ -0,0 +1,46 @@
+"""Tests for the caregiver instruction classifier."""
+
+from team29.instruction_classifier import InstructionClassifier
+
+
+def _classify(text):
+    return list(InstructionClassifier().classify(text.splitlines()))
+
+
+def test_keyword_only_lines_are_kept():
+    result = dict(_classify("Insulin\nPhysiotherapy\nEye drops"))
+
+    assert result['Insulin'] == ['medications']
+    assert result['Physiotherapy'] == ['special_notes']
+    assert result['Eye drops'] == ['medications']
+
+
+def test_bullet_lines_are_never_headers():
+    result = _classify("Medications:\n- Eye drops\n- Insulin\n* Morning\n1. Bedtime")
+
+    assert [line for line, _ in result] == ['- Eye drops', '- Insulin', '* Morning', '1. Bedtime']
+    assert result[1][1] == ['medications']
+    assert result[2][1] == ['morning']
+
+
+def test_colon_and_markdown_headers_set_the_section():
+    result = dict(_classify("Morning routine:\nTake pills with water\n# EVENING\nLock the back door"))
+
+    assert 'Morning routine:' not in result
+    assert result['Take pills with water'] == ['morning', 'medications']
+    assert result['Lock the back door'] == ['evening']
+
+
+def test_keyword_line_is_a_header_only_before_items():
+    headed = _classify("MORNING ROUTINE\n  Help with dressing\n  Open the curtains")
+    plain = _classify("MORNING ROUTINE\nHelp with dressing")
+
+    assert headed == [('Help with dressing', ['morning']), ('Open the curtains', ['morning'])]
+    assert plain == [('MORNING ROUTINE', ['morning']), ('Help with dressing', ['special_notes'])]
+
+
+def test_trailing_keyword_line_is_kept():
+    assert _classify("Check blood pressure\nMedications") == [
+        ('Check blood pressure', ['special_notes']),
+        ('Medications', ['medications']),
+    ]
@@ -0,0 +1,84 @@
+"""Tests for the statistical irregularity detector."""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from team29.irregularity_detector import (
+    F, FEATURES, HOURS, MIN_BASELINE_DAYS, MIN_STD, WARMUP_DAYS, IrregularityDetector, evaluate,
+)
+
+ANOMALY = date(2025, 3, 20)
+
+
+def _typical_day(day: date) -> np.ndarray:
+    """A steady routine with a little day-to-day noise."""
+    rng = np.random.default_rng(day.toordinal())
+    x = np.empty(len(FEATURES))
+    x[:HOURS] = 300 + rng.normal(0, 10, HOURS)
+    x[F['steps']] = 6000 + rng.normal(0, 100)
+    x[F['away_hours']] = 2 + rng.normal(0, 0.2)
+    x[F['overnight_bathroom_visits']] = 1
+    x[F['sleep_hours']] = 7.5 + rng.normal(0, 0.1)
+    x[F['meals_eaten']] = 3
+    x[F['social_interactions']] = 3
+    x[F['medication_taken']] = 1
+    return x
+
+
+def _loader(patient_id, start, days):
+    features = np.stack([_typical_day(start + timedelta(days=i)) for i in range(days)])
+    for i in range(days):
+        if start + timedelta(days=i) == ANOMALY:
+            features[i, :HOURS] = 0
+            features[i, F['steps']] = 400
+    return features
+
+
+def test_planted_anomaly_is_flagged():
+    detector = IrregularityDetector('patient', loader=_loader)
+
+    records = detector.detect(ANOMALY)
+    counts = detector.count_range(ANOMALY - timedelta(days=5), 10)
+
+    assert [(r['type'], r['severity']) for r in records] == [('movement', 'high')]
+    assert records[0]['date'] == '2025-03-20'
+    assert '400 steps' in records[0]['description']
+    assert counts.tolist() == [0, 0, 0, 0, 0, 1, 0, 0, 0, 0]
+
+
+def test_nothing_is_flagged_before_min_baseline_days():
+    x = _loader('patient', ANOMALY, 1)
+    mean = _typical_day(ANOMALY)[None, :]
+    var = np.zeros((1, len(FEATURES)))
+
+    early = evaluate(x, mean, var, np.array([MIN_BASELINE_DAYS - 1]))
+    ready = evaluate(x, mean, var, np.array([MIN_BASELINE_DAYS]))
+
+    assert all(early[check][0] == 0 for check in ('movement', 'presence', 'sleep', 'meals', 'social'))
+    assert ready['movement'][0] == 3
+
+
+def test_z_score_uses_the_ewma_baseline_before_the_day():
+    detector = IrregularityDetector('patient', loader=_loader, halflife_days=7)
+    day = date(2025, 3, 10)
+    history = _loader('patient', day - timedelta(days=WARMUP_DAYS), WARMUP_DAYS)
+
+    alpha = 1 - 0.5 ** (1 / 7)
+    mean, var = history[0].copy(), np.zeros(len(FEATURES))
+    for x in history[1:]:
+        diff = x - mean
+        mean = mean + alpha * diff
+        var = (1 - alpha) * (var + diff * alpha * diff)
+
+    baseline = detector.baseline(day)
+    assert baseline['days'] == WARMUP_DAYS
+    np.testing.assert_allclose([baseline['mean'][name] for name in FEATURES], mean)
+    np.testing.assert_allclose([baseline['std'][name] for name in FEATURES], np.sqrt(var))
+
+    x = _loader('patient', day, 1)[0]
+    z = detector._score(day, 1)['z'][0]
+    expected = (x - mean) / np.maximum(np.sqrt(var), MIN_STD)
+    np.testing.assert_allclose(z, expected)
+    assert z[F['steps']] == pytest.approx((x[F['steps']] - mean[F['steps']]) / max(np.sqrt(var[F['steps']]), 250.0))
@@ -0,0 +1,119 @@
+"""Tests for the local relevance-ranked memory service."""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, List
+
+import pytest
+
+from team29.local_memory import (
+    CHARS_PER_TOKEN, MAX_MEMORY_TOKENS, RECENCY_HALFLIFE_DAYS, RECENCY_WEIGHT,
+    LocalMemoryService, MemoryIndex, estimate_tokens,
+)
+
+NOW = 1_760_000_000.0
+DAY = 86400
+
+
+@dataclass
+class FakeSession:
+    id: str = 's1'
+    app_name: str = 'team29'
+    user_id: str = 'parent'
+    events: List[Any] = field(default_factory=list)
+
+
+def _event(event_id, text, timestamp=NOW, author='user'):
+    content = SimpleNamespace(parts=[SimpleNamespace(text=text)])
+    return SimpleNamespace(id=event_id, author=author, timestamp=timestamp, content=content)
+
+
+def _memory(memory_id, text, timestamp=NOW):
+    return {'id': memory_id, 'session_id': 's1', 'author': 'user', 'timestamp': timestamp, 'text': text}
+
+
+def _search(service, query):
+    response = asyncio.run(service.search_memory(app_name='team29', user_id='parent', query=query))
+    return [memory.content.parts[0].text for memory in response.memories]
+
+
+def test_bm25_prefers_dense_matches_and_rare_terms():
+    index = MemoryIndex()
+    index.add(_memory('dense', 'Margaret slept badly, sleep was short and sleep quality poor'))
+    index.add(_memory('sparse', 'Margaret went to the park, had lunch with friends, then a short sleep'))
+    index.add(_memory('rare', 'Margaret started new insulin dose'))
+    index.add(_memory('other', 'Margaret enjoyed the book club'))
+
+    assert [index.memories[i]['id'] for _, i in index.search('sleep', NOW, 10)] == ['dense', 'sparse']
+    # 'insulin' is in one memory, 'margaret' in all of them
+    assert index.memories[index.search('margaret insulin', NOW, 10)[0][1]]['id'] == 'rare'
+    assert index.search('appointment', NOW, 10) == []
+
+
+def test_duplicate_memories_are_indexed_once():
+    index = MemoryIndex()
+
+    assert index.add(_memory('m1', 'sleep issues'))
+    assert not index.add(_memory('m1', 'sleep issues'))
+    assert len(index.search('sleep', NOW, 10)) == 1
+
+
+def test_recency_weighs_equally_relevant_memories():
+    index = MemoryIndex()
+    old_age = 2 * RECENCY_HALFLIFE_DAYS
+    index.add(_memory('old', 'sleep issues at night', NOW - old_age * DAY))
+    index.add(_memory('new', 'sleep issues at night', NOW))
+
+    (new_score, new), (old_score, old) = index.search('sleep issues', NOW, 10)
+
+    assert (index.memories[new]['id'], index.memories[old]['id']) == ('new', 'old')
+    recency = 0.5 ** (old_age / RECENCY_HALFLIFE_DAYS)
+    assert old_score / new_score == pytest.approx(1 - RECENCY_WEIGHT + RECENCY_WEIGHT * recency)
+
+
+def test_search_results_are_capped_at_the_token_budget():
+    service = LocalMemoryService()
+    text = 'sleep ' + 'x' * (100 * CHARS_PER_TOKEN - 6)
+    session = FakeSession(events=[_event(f'e{i}', text, time.time() - i) for i in range(20)])
+    asyncio.run(service.add_session_to_memory(session))
+
+    results = _search(service, 'sleep')
+
+    assert MAX_MEMORY_TOKENS == 800
+    assert len(results) == 8
+    assert sum(estimate_tokens(r) for r in results) <= MAX_MEMORY_TOKENS
+
+
+def test_over_budget_best_memory_is_truncated():
+    service = LocalMemoryService(max_tokens=10)
+    asyncio.run(service.add_session_to_memory(FakeSession(events=[_event('e0', 'sleep ' * 50, time.time())])))
+
+    [result] = _search(service, 'sleep')
+
+    assert result.endswith('…')
+    assert len(result) <= 10 * CHARS_PER_TOKEN + 1
+
+
+def test_jsonl_round_trip(tmp_path):
+    path = str(tmp_path / 'memories.jsonl')
+    now = time.time()
+    session = FakeSession(events=[
+        _event('e0', 'Mom mentioned her knee hurts on the stairs', now - DAY),
+        _event('e1', 'Physical therapy moved to Thursdays', now, author='parent_agent'),
+        SimpleNamespace(id='e2', author='user', timestamp=now, content=None),
+    ])
+    first = LocalMemoryService(path=path)
+    asyncio.run(first.add_session_to_memory(session))
+    asyncio.run(first.add_session_to_memory(session))
+
+    with open(path) as f:
+        assert len(f.readlines()) == 2
+    second = LocalMemoryService(path=path)
+    for query in ('knee stairs', 'therapy thursday'):
+        assert _search(second, query) == _search(first, query)
+    response = asyncio.run(second.search_memory(app_name='team29', user_id='parent', query='therapy'))
+    assert response.memories[0].author == 'parent_agent'
+    assert _search(second, 'knee') and asyncio.run(
+        second.search_memory(app_name='team29', user_id='someone-else', query='knee')).memories == []
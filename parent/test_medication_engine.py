@@ -0,0 +1,57 @@
+"""Tests for the medication dose calendar and compliance scoring."""
+
+import json
+
+import pytest
+
+from team29 import parent_tools
+from team29.medication_engine import DoseCalendar, compute_compliance, dose_times
+from team29.mock_data import generate_medical_documentation
+from team29.tool_output import use_output_mode
+
+PRESCRIPTIONS = [
+    {'name': 'Lisinopril', 'dosage': '10mg', 'frequency': 'Once daily'},
+    {'name': 'Paracetamol', 'dosage': '500mg', 'frequency': 'As needed for pain'},
+    {'name': 'Eye drops', 'dosage': '1 drop'},
+]
+
+
+def test_dose_times_still_reject_unknown_frequencies():
+    assert dose_times('Every 8 hours') == ['00:00', '08:00', '16:00']
+    with pytest.raises(ValueError):
+        dose_times('As needed')
+
+
+def test_unknown_frequencies_are_left_unscheduled():
+    calendar = DoseCalendar(PRESCRIPTIONS, '2025-10-14', 2)
+
+    assert list(calendar.doses) == ['lisinopril']
+    assert [(u['medication'], u['frequency']) for u in calendar.unscheduled] == [
+        ('Paracetamol', 'As needed for pain'), ('Eye drops', '')]
+
+
+def test_compliance_scores_the_scheduled_medications_only():
+    taken = [{'medication_id': 'lisinopril', 'time': '2025-10-14 08:10:00'},
+             {'medication_id': 'paracetamol', 'time': '2025-10-14 13:00:00'}]
+
+    report = compute_compliance(PRESCRIPTIONS, taken, '2025-10-14', 2)
+
+    assert (report['scheduled'], report['on_time'], report['missed']) == (2, 1, 1)
+    assert list(report['by_medication']) == ['Lisinopril']
+    assert [u['medication'] for u in report['unscheduled']] == ['Paracetamol', 'Eye drops']
+
+
+def test_adherence_tool_reports_unscheduled_medications(monkeypatch):
+    documents = generate_medical_documentation()
+    documents[0]['medications'].append({'name': 'Paracetamol', 'dosage': '500mg', 'frequency': 'As needed'})
+    monkeypatch.setattr(parent_tools, 'generate_medical_documentation', lambda: documents)
+
+    with use_output_mode('text'):
+        text = parent_tools.check_medication_adherence(3)
+    with use_output_mode('compact'):
+        data = json.loads(parent_tools.check_medication_adherence(3))
+
+    assert 'Not scored (no fixed dose times):' in text
+    assert '- Paracetamol (As needed)' in text
+    assert set(data['by_med']) == {'Lisinopril', 'Metformin'}
+    assert data['unsched'] == [['Paracetamol', 'As needed']]
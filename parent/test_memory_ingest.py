@@ -0,0 +1,169 @@
+"""Tests for incremental session-to-memory ingestion."""
+
+import asyncio
+from dataclasses import dataclass, field, replace
+from typing import Any, List
+
+import pytest
+
+from team29 import memory_ingest
+from team29.client_pool import ClientPool
+from team29.memory_ingest import MemoryIngestor
+
+
+@dataclass
+class FakeSession:
+    id: str = 's1'
+    app_name: str = 'team29'
+    user_id: str = 'parent'
+    events: List[Any] = field(default_factory=list)
+
+    def model_copy(self, update):
+        return replace(self, **update)
+
+
+class FakeMemoryService:
+    def __init__(self, fail: int = 0):
+        self.fail = fail
+        self.calls: List[List[Any]] = []
+
+    async def add_session_to_memory(self, session):
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("memory service unavailable")
+        self.calls.append(list(session.events))
+
+
+class InMemoryMemoryService(FakeMemoryService):
+    """Named like ADK's service that replaces a session's stored events."""
+
+
+@pytest.fixture(autouse=True)
+def pool(monkeypatch):
+    pool = ClientPool()
+    monkeypatch.setattr(memory_ingest, 'get_client_pool', lambda: pool)
+    return pool
+
+
+def test_burst_of_turns_is_one_delta_submission():
+    async def scenario():
+        ingestor = MemoryIngestor(debounce_seconds=0.01)
+        service, session = FakeMemoryService(), FakeSession(events=['e0'])
+        ingestor._watermarks[('team29', 'parent', 's1')] = 1
+        for event in ('e1', 'e2', 'e3'):
+            session.events.append(event)
+            ingestor.schedule(service, session)
+        await asyncio.sleep(0.05)
+        return ingestor, service
+
+    ingestor, service = asyncio.run(scenario())
+
+    assert service.calls == [['e1', 'e2', 'e3']]
+    assert ingestor.submissions == 1
+    assert ingestor.events_submitted == 3
+
+
+def test_failed_flush_keeps_events_for_the_next_one():
+    async def scenario():
+        ingestor = MemoryIngestor(debounce_seconds=60)
+        service, session = FakeMemoryService(fail=1), FakeSession(events=['e0', 'e1'])
+        ingestor.schedule(service, session)
+        first = await ingestor.flush_session(session)
+        session.events.append('e2')
+        ingestor.schedule(service, session)
+        second = await ingestor.flush_all()
+        return ingestor, service, first, second
+
+    ingestor, service, first, second = asyncio.run(scenario())
+
+    assert (first, second) == (0, 3)
+    assert service.calls == [['e0', 'e1', 'e2']]
+    assert ingestor.failures == 1
+
+
+def test_replacing_service_gets_the_whole_session():
+    async def scenario():
+        ingestor = MemoryIngestor(debounce_seconds=60)
+        service, session = InMemoryMemoryService(), FakeSession(events=['e0'])
+        ingestor.schedule(service, session)
+        await ingestor.flush_session(session)
+        session.events.append('e1')
+        ingestor.schedule(service, session)
+        await ingestor.flush_session(session)
+        return service
+
+    assert asyncio.run(scenario()).calls == [['e0'], ['e0', 'e1']]
+
+
+def test_full_batch_is_flushed_without_waiting():
+    async def scenario():
+        ingestor = MemoryIngestor(debounce_seconds=60, max_batch_events=2)
+        service, session = FakeMemoryService(), FakeSession(events=['e0', 'e1'])
+        ingestor.schedule(service, session)
+        await asyncio.sleep(0.01)
+        return service
+
+    assert asyncio.run(scenario()).calls == [['e0', 'e1']]
+
+
+def test_loop_ending_before_the_debounce_still_submits():
+    ingestor = MemoryIngestor(debounce_seconds=60)
+    service, session = FakeMemoryService(), FakeSession(events=['e0', 'e1'])
+
+    async def last_turn():
+        ingestor.schedule(service, session)
+
+    # asyncio.run() cancels the debounce timer when the loop ends
+    asyncio.run(last_turn())
+
+    assert service.calls == [['e0', 'e1']]
+    assert ingestor.pending_events(session) == 0
+
+
+def test_exit_drains_on_the_idle_owning_loop(pool):
+    ingestor = MemoryIngestor(debounce_seconds=60)
+    service, session = FakeMemoryService(), FakeSession(events=['e0'])
+    loop = asyncio.new_event_loop()
+    try:
+        async def last_turn():
+            ingestor.schedule(service, session)
+
+        loop.run_until_complete(last_turn())
+        assert service.calls == []
+
+        # What the interpreter-exit hook does
+        pool.close_all()
+
+        assert service.calls == [['e0']]
+    finally:
+        loop.close()
+
+
+def test_pool_aclose_drains_pending_sessions(pool):
+    ingestor = MemoryIngestor(debounce_seconds=60)
+    service, session = FakeMemoryService(), FakeSession(events=['e0', 'e1'])
+
+    async def scenario():
+        ingestor.schedule(service, session)
+        await pool.aclose()
+
+    asyncio.run(scenario())
+
+    assert service.calls == [['e0', 'e1']]
+    assert ingestor.submissions == 1
+
+
+def test_flush_session_at_session_end_uses_the_latest_session():
+    async def scenario():
+        ingestor = MemoryIngestor(debounce_seconds=60)
+        service, session = FakeMemoryService(), FakeSession(events=['e0'])
+        ingestor.schedule(service, session)
+        ended = FakeSession(events=['e0', 'e1'])
+        submitted = await ingestor.flush_session(ended)
+        unseen = await ingestor.flush_session(FakeSession(id='s2', events=['x']), service)
+        return service, submitted, unseen
+
+    service, submitted, unseen = asyncio.run(scenario())
+
+    assert (submitted, unseen) == (2, 1)
+    assert service.calls == [['e0', 'e1'], ['x']]
@@ -0,0 +1,53 @@
+"""Tests for the seeded mock data generators."""
+
+from datetime import date, datetime, timedelta
+
+from team29.medication_engine import current_prescriptions
+from team29.mock_data import generate_medical_documentation, generate_medication_log
+from team29.mock_engine import get_mock_engine, parse_date
+
+
+def _doses_on(log, day):
+    return sorted((dose['medication_id'], dose['time']) for dose in log if dose['time'].startswith(day))
+
+
+def test_medication_log_does_not_depend_on_window():
+    prescriptions = current_prescriptions(generate_medical_documentation())
+
+    week = generate_medication_log(prescriptions, '2025-10-12', 7)
+    fortnight = generate_medication_log(prescriptions, '2025-10-05', 14)
+
+    for day in ('2025-10-12', '2025-10-15', '2025-10-18'):
+        assert _doses_on(week, day) == _doses_on(fortnight, day)
+
+
+def test_medication_log_matches_engine_compliance():
+    prescriptions = current_prescriptions(generate_medical_documentation())
+    scheduled_per_day = 3  # Lisinopril once daily, Metformin twice daily
+    compliance = get_mock_engine().generate('2025-10-01', 31)['medication_compliance'][0]
+    log = generate_medication_log(prescriptions, '2025-10-01', 31)
+
+    for day, compliant in enumerate(compliance, 1):
+        taken = len(_doses_on(log, f"2025-10-{day:02d}"))
+        assert (taken == scheduled_per_day) == bool(compliant)
+
+
+def test_parse_date_accepts_free_form_dates():
+    today = datetime.now().date()
+
+    assert parse_date('2025-10-18') == date(2025, 10, 18)
+    assert parse_date('2025/10/18') == date(2025, 10, 18)
+    assert parse_date('18-10-2025') == date(2025, 10, 18)
+    assert parse_date('2025-10-18T09:30:00') == date(2025, 10, 18)
+    assert parse_date('yesterday') == today - timedelta(days=1)
+    assert parse_date('Today') == today
+    assert parse_date(None) == today
+    assert parse_date('next blue moon') == today
+
+
+def test_generate_empty_range():
+    data = get_mock_engine().generate('2025-10-05', 0)
+
+    assert data['total_steps'].shape == (1, 0)
+    assert data['hourly_activity'].shape == (1, 0, 24)
+    assert len(data['dates']) == 0
@@ -0,0 +1,167 @@
+"""Tests for the Firestore monitor's change detection and event log."""
+
+import threading
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from team29 import monitor_firestore
+from team29.monitor_firestore import WriteRateCounter, diff_fields, fingerprint, hash_value, make_listener, read_events
+
+T0 = datetime(2025, 10, 14, 8, 0, 5, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def event_log(tmp_path, monkeypatch):
+    """Event log in tmp_path with tiny files; fresh counters and fingerprints."""
+    monkeypatch.setattr(monitor_firestore, 'write_rates', WriteRateCounter())
+    monkeypatch.setattr(monitor_firestore, 'fingerprints', {})
+    monitor_firestore.enable_event_log(str(tmp_path), max_bytes=400, backup_count=50)
+    yield tmp_path
+    for handler in list(monitor_firestore.event_log.handlers):
+        monitor_firestore.event_log.removeHandler(handler)
+        handler.close()
+
+
+def _doc(doc_id, data, version):
+    return SimpleNamespace(id=doc_id, update_time=f'2025-10-14T08:00:{version:02d}Z', to_dict=lambda: dict(data))
+
+
+def _change(kind, doc):
+    return SimpleNamespace(type=SimpleNamespace(name=kind), document=doc)
+
+
+def _changes(event_log):
+    return [(r['change'], r['doc_id'], r['fields'], r['removed_fields'])
+            for r in read_events(str(event_log)) if r['type'] == 'change']
+
+
+# ========== FINGERPRINTS ==========
+
+def test_diff_fields_reports_changed_added_and_removed_fields():
+    old = fingerprint(_doc('a', {'value': 'Soup', 'notes': 'warm', 'count': 1}, 1))
+    new = fingerprint(_doc('a', {'value': 'Stew', 'count': 1, 'shift': 's1'}, 2))
+
+    assert diff_fields(old, new) == (['shift', 'value'], ['notes'])
+    assert diff_fields(old, old) == ([], [])
+
+
+def test_fingerprint_ignores_field_order_but_not_values():
+    first = fingerprint(_doc('a', {'value': 'Soup', 'tags': ['hot', 'salty']}, 1))
+    reordered = fingerprint(_doc('a', {'tags': ['hot', 'salty'], 'value': 'Soup'}, 2))
+    nested = fingerprint(_doc('a', {'value': 'Soup', 'tags': ['salty', 'hot']}, 3))
+
+    assert first.content_hash == reordered.content_hash
+    assert first.content_hash != nested.content_hash
+    assert dict(first.field_hashes)['value'] == hash_value('Soup')
+    assert hash_value({'b': 1, 'a': datetime(2025, 1, 1)}) == hash_value({'a': datetime(2025, 1, 1), 'b': 1})
+
+
+# ========== LISTENER ==========
+
+def test_initial_snapshot_is_the_baseline(event_log, capsys):
+    listener = make_listener('food')
+    docs = [_doc('a', {'value': 'Soup'}, 1), _doc('b', {'value': 'Tea'}, 1)]
+
+    listener(docs, [_change('ADDED', doc) for doc in docs], T0)
+
+    assert set(monitor_firestore.fingerprints) == {'food/a', 'food/b'}
+    assert _changes(event_log) == []
+    assert 'food: 2 documents at startup' in capsys.readouterr().out
+
+
+def test_changes_after_the_baseline_are_reported_once(event_log):
+    listener = make_listener('food')
+    original = _doc('a', {'value': 'Soup', 'notes': 'warm'}, 1)
+    listener([original], [_change('ADDED', original)], T0)
+
+    added = _doc('b', {'value': 'Tea'}, 2)
+    edited = _doc('a', {'value': 'Stew', 'timestamp': 3}, 3)
+    listener([original, added], [_change('ADDED', added)], T0)
+    listener([edited, added], [_change('MODIFIED', edited)], T0)
+    # The same version delivered again after a reconnect
+    listener([edited, added], [_change('MODIFIED', edited)], T0)
+    # A new version with identical content
+    listener([edited, added], [_change('MODIFIED', _doc('a', {'value': 'Stew', 'timestamp': 3}, 4))], T0)
+    listener([added], [_change('REMOVED', edited)], T0)
+
+    assert _changes(event_log) == [
+        ('added', 'b', ['value'], []),
+        ('modified', 'a', ['timestamp', 'value'], ['notes']),
+        ('removed', 'a', [], []),
+    ]
+    assert set(monitor_firestore.fingerprints) == {'food/b'}
+
+
+def test_identical_rewrite_still_updates_the_fingerprint(event_log):
+    listener = make_listener('food')
+    listener([], [], T0)
+    listener([], [_change('MODIFIED', _doc('a', {'value': 'Soup'}, 1))], T0)
+    listener([], [_change('MODIFIED', _doc('a', {'value': 'Soup'}, 2))], T0)
+
+    assert monitor_firestore.fingerprints['food/a'].update_time == '2025-10-14T08:00:02Z'
+    # An unknown document is reported with all its fields
+    assert _changes(event_log) == [('modified', 'a', ['value'], [])]
+
+
+# ========== WRITE RATES ==========
+
+def test_write_rate_counter_buckets_by_minute():
+    counter = WriteRateCounter(window_minutes=3)
+    for offset in (0, 10, 20, 70, 190, 250):
+        counter.record('food', T0 + timedelta(seconds=offset))
+    counter.record('notes', T0)
+
+    assert list(counter.buckets['food']) == [
+        ['2025-10-14T08:01', 1], ['2025-10-14T08:03', 1], ['2025-10-14T08:04', 1]]
+    assert counter.writes_per_minute('food') == 1.0
+    assert counter.writes_per_minute('food', minutes=3) == 1.0
+    assert counter.writes_per_minute('notes') == 1.0
+    assert counter.writes_per_minute('missing') == 0.0
+
+
+def test_closed_buckets_are_emitted_once_and_only_when_complete():
+    counter = WriteRateCounter()
+    for offset in (0, 30, 65):
+        counter.record('food', T0 + timedelta(seconds=offset))
+
+    assert counter.closed_buckets(T0 + timedelta(seconds=30)) == []
+    assert counter.closed_buckets(T0 + timedelta(seconds=70)) == [('food', '2025-10-14T08:00', 2)]
+    assert counter.closed_buckets(T0 + timedelta(seconds=75)) == []
+    assert counter.closed_buckets(T0 + timedelta(minutes=5)) == [('food', '2025-10-14T08:01', 1)]
+
+
+def test_flush_write_rates_waits_for_the_listeners(event_log):
+    monitor_firestore.write_rates.record('food', datetime.now(timezone.utc) - timedelta(minutes=2))
+    flushed = threading.Event()
+
+    def flush():
+        monitor_firestore.flush_write_rates()
+        flushed.set()
+
+    with monitor_firestore.print_lock:
+        thread = threading.Thread(target=flush)
+        thread.start()
+        assert not flushed.wait(0.1)
+        # Not even the buckets were read while a listener held the lock
+        assert list(read_events(str(event_log))) == []
+        assert monitor_firestore.write_rates.emitted == {}
+    thread.join(5)
+
+    assert flushed.is_set()
+    assert [r['type'] for r in read_events(str(event_log))] == ['rate']
+
+
+# ========== EVENT LOG ==========
+
+def test_read_events_returns_rotated_files_oldest_first(event_log):
+    for i in range(30):
+        monitor_firestore.log_event('modified', 'food', f'doc-{i}', T0 + timedelta(seconds=i), fields=['value'])
+
+    assert len(list(event_log.glob('events.jsonl.*'))) >= 10
+    records = list(read_events(str(event_log)))
+    assert [r['doc_id'] for r in records] == [f'doc-{i}' for i in range(30)]
+    assert records[0] == {'type': 'change', 'ts': T0.isoformat(), 'collection': 'food', 'doc_id': 'doc-0',
+                          'change': 'modified', 'fields': ['value'], 'removed_fields': []}
+
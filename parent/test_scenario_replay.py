@@ -0,0 +1,61 @@
+"""Tests for the accelerated scenario replayer."""
+
+import asyncio
+
+from team29.scenario_replay import ScenarioReplayer
+from team29.timeseries_store import TimeSeriesStore
+
+TIMELINE = [
+    {'t': 0.0, 'kind': 'note', 'patient_id': 'p1', 'note': 'Calm'},
+    {'t': 5.0, 'kind': 'meal', 'patient_id': 'p1', 'shift_id': 's1', 'meals': 'Soup'},
+    {'t': 5.0, 'kind': 'shift_start', 'patient_id': 'p1', 'shift_id': 's1'},
+    {'t': 60.0, 'kind': 'note', 'patient_id': 'p2', 'note': 'Tired'},
+    {'t': 90.0, 'kind': 'med', 'patient_id': 'p2', 'note': 'Vitamin D taken'},
+    {'t': 3600.0, 'kind': 'shift_start', 'patient_id': 'p2', 'shift_id': 's2'},
+]
+
+
+def test_replay_counts_completed_skipped_and_failed_events():
+    calls = []
+
+    async def record_meal(event):
+        calls.append(('meal', event['patient_id']))
+
+    def record_med(event):
+        raise ConnectionError("database unavailable")
+
+    handlers = {
+        'note': lambda e: calls.append(('note', e['patient_id'])),
+        'meal': record_meal,
+        'med': record_med,
+        'shift_start': None,
+    }
+    report = asyncio.run(ScenarioReplayer(speedup=0, handlers=handlers).replay(TIMELINE))
+
+    assert sorted(calls) == [('meal', 'p1'), ('note', 'p1'), ('note', 'p2')]
+    assert report['events'] == 6
+    assert report['completed'] == 4
+    assert report['skipped'] == {'shift_start': 2}
+    assert report['errors'] == 1
+    assert {kind: stats['count'] for kind, stats in report['by_kind'].items()} == {'meal': 1, 'med': 1, 'note': 2}
+    assert report['by_kind']['med']['errors'] == 1
+    # Speedup 0 fires everything at once: an hour of scenario takes no waiting
+    assert 0 <= report['max_lag_ms'] < 1000
+    assert report['wall_seconds'] < 1
+
+
+def test_open_sensor_windows_are_flushed_before_timing_stops(tmp_path, monkeypatch):
+    monkeypatch.setenv('TIMESERIES_DIR', str(tmp_path))
+    events = [
+        {'t': float(i), 'kind': 'sensor', 'patient_id': 'John', 'room': 'kitchen',
+         'timestamp': f'2025-01-07T08:0{i}:00'}
+        for i in range(3)
+    ]
+    replayer = ScenarioReplayer(speedup=0)
+
+    report = asyncio.run(replayer.replay(events))
+
+    assert report['completed'] == 3
+    assert replayer.sensor_aggregator.rows_written == 1
+    record = TimeSeriesStore(str(tmp_path)).motion_sensor_record('John', '2025-01-07')
+    assert record['activity_by_room']['kitchen']['triggers'] == 3
@@ -0,0 +1,52 @@
+"""Tests for motion-sensor event ingestion."""
+
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from team29.sensor_ingest import SensorAggregator, parse_timestamp
+from team29.timeseries_store import TimeSeriesStore
+
+
+def test_aware_timestamps_are_converted_to_local_time():
+    utc = datetime(2025, 1, 7, 1, 14, 5, tzinfo=timezone.utc)
+    local = np.datetime64(utc.astimezone().replace(tzinfo=None), 's')
+
+    assert parse_timestamp('2025-01-07T01:14:05+00:00') == local
+    assert parse_timestamp('2025-01-07T01:14:05Z') == local
+    assert parse_timestamp('2025-01-07T03:14:05+02:00') == local
+    assert parse_timestamp('2025-01-07 02:14:05.250') == np.datetime64('2025-01-07T02:14:05')
+
+
+def test_idle_source_closes_windows(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    aggregator = SensorAggregator(store)
+    aggregator.ingest({'room': 'kitchen', 'timestamp': '2025-01-07T08:01:00'})
+    aggregator.ingest({'room': 'kitchen', 'timestamp': '2025-01-07T08:03:00'})
+
+    assert aggregator.flush() == 0
+
+    # Twenty quiet minutes later the 08:00-08:15 window is past the watermark
+    aggregator._last_arrival -= 20 * 60
+    aggregator.advance_idle()
+
+    assert aggregator.flush() == 1
+    assert store.motion_sensor_record('John', '2025-01-07')['activity_by_room']['kitchen']['triggers'] == 2
+
+
+def test_flush_timer_flushes_in_the_background(tmp_path):
+    aggregator = SensorAggregator(TimeSeriesStore(str(tmp_path)))
+    aggregator.ingest({'room': 'bathroom', 'timestamp': '2025-01-07T08:01:00'})
+    aggregator._last_arrival -= 20 * 60
+
+    aggregator.start_flush_timer(0.01)
+    try:
+        for _ in range(200):
+            if aggregator.rows_written:
+                break
+            time.sleep(0.01)
+    finally:
+        aggregator.stop_flush_timer()
+
+    assert aggregator.rows_written == 1
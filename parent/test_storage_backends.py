@@ -0,0 +1,102 @@
+"""Contract tests every offline storage backend must pass."""
+
+from datetime import datetime
+
+import pytest
+
+from team29.storage_backends import InMemoryBackend, SQLiteBackend, StorageBackend
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    backend = InMemoryBackend() if request.param == 'memory' else SQLiteBackend(str(tmp_path / 'docs.db'))
+    yield backend
+    backend.close()
+
+
+def test_incomplete_backend_fails_at_construction():
+    class Partial(StorageBackend):
+        def get_document(self, collection, doc_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_get_missing_document_is_none(backend):
+    assert backend.get_document('notes', 'missing') is None
+
+
+def test_merge_updates_fields_and_replaces_lists(backend):
+    backend.set_document('prefs', 'John', {'likes': ['soup'], 'meta': {'a': 1, 'b': 2}})
+    backend.set_document('prefs', 'John', {'likes': ['tea'], 'meta': {'b': 3}, 'notes': 'x'})
+
+    assert backend.get_document('prefs', 'John') == {'likes': ['tea'], 'meta': {'a': 1, 'b': 3}, 'notes': 'x'}
+
+
+def test_set_without_merge_replaces_the_document(backend):
+    backend.set_document('prefs', 'John', {'likes': ['soup'], 'notes': 'x'})
+    backend.set_document('prefs', 'John', {'likes': ['tea']}, merge=False)
+
+    assert backend.get_document('prefs', 'John') == {'likes': ['tea']}
+
+
+def test_returned_documents_are_copies(backend):
+    backend.set_document('prefs', 'John', {'likes': ['soup']})
+    backend.get_document('prefs', 'John')['likes'].append('tea')
+
+    assert backend.get_document('prefs', 'John') == {'likes': ['soup']}
+
+
+def test_datetimes_round_trip(backend):
+    when = datetime(2025, 10, 18, 9, 30)
+    backend.set_document('food', 'John_shift-1', {'timestamp': when})
+
+    assert backend.get_document('food', 'John_shift-1')['timestamp'] == when
+
+
+def test_batch_writes_and_deletes(backend):
+    backend.set_documents([('notes', f"n{i}", {'i': i}) for i in range(3)] + [('other', 'x', {'i': 9})])
+    backend.delete_documents('notes', ['n1', 'missing'])
+
+    assert backend.list_documents('notes') == ['n0', 'n2']
+    assert backend.list_collections() == ['notes', 'other']
+    assert list(backend.iter_collections()) == ['notes', 'other']
+
+    backend.delete_documents('other', ['x'])
+    assert backend.list_collections() == ['notes']
+
+
+def test_listing_and_pages_are_in_id_order(backend):
+    backend.set_documents([('notes', doc_id, {'i': i, 'text': doc_id}) for i, doc_id in enumerate('dbeac')])
+
+    assert backend.list_documents('notes') == ['a', 'b', 'c', 'd', 'e']
+    assert backend.list_documents('notes', limit=2) == ['a', 'b']
+    assert backend.query_page('notes', 2, keys_only=True) == [('a', None), ('b', None)]
+    assert backend.query_page('notes', 2, start_after='b', fields=['text']) == [('c', {'text': 'c'}),
+                                                                               ('d', {'text': 'd'})]
+    assert backend.query_page('notes', 2, start_after='e') == []
+
+
+def test_transaction_reads_committed_state_and_commits_writes(backend):
+    backend.set_document('care-instructions', 'John', {'instructions': ['a']})
+
+    def append(transaction):
+        current = transaction.get('care-instructions', 'John')['instructions']
+        transaction.set('care-instructions', 'John', {'instructions': current + ['b']})
+        # Reads do not see the transaction's own buffered writes
+        return transaction.get('care-instructions', 'John')['instructions']
+
+    assert backend.run_transaction(append) == ['a']
+    assert backend.get_document('care-instructions', 'John') == {'instructions': ['a', 'b']}
+
+
+def test_failed_transaction_writes_nothing(backend):
+    def failing(transaction):
+        transaction.set('notes', 'n0', {'i': 0})
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        backend.run_transaction(failing)
+
+    assert backend.get_document('notes', 'n0') is None
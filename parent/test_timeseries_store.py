@@ -0,0 +1,68 @@
+"""Tests for the columnar time-series store."""
+
+import numpy as np
+
+from team29.mock_engine import get_mock_engine
+from team29.timeseries_store import TimeSeriesStore, backfill_from_mock
+
+DAYS = ['2025-09-28', '2025-09-29', '2025-09-30', '2025-10-01', '2025-10-02']
+
+
+def test_backfilled_records_match_mock_records(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    engine = get_mock_engine()
+    backfill_from_mock(store, DAYS[0], len(DAYS))
+
+    for day in DAYS:
+        assert store.movement_record('John', day) == engine.movement_record(day)
+        assert store.presence_record('John', day) == engine.presence_record(day)
+        assert store.motion_sensor_record('John', day) == engine.motion_sensor_record(day)
+
+
+def test_daily_movement_prefers_reported_totals(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    engine = get_mock_engine()
+    backfill_from_mock(store, DAYS[0], len(DAYS))
+
+    movement = store.daily_movement('John', DAYS[0], len(DAYS) + 1)
+
+    expected = engine.generate(DAYS[0], len(DAYS))['total_steps'][0]
+    assert movement['measured'].tolist() == [True] * len(DAYS) + [False]
+    assert np.array_equal(movement['steps'][:len(DAYS)], expected)
+
+
+def test_records_without_report_are_derived_from_samples(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    day = np.datetime64('2025-10-05')
+    store.append('John', 'motion', day + np.array([3600 * 2, 3600 * 9, 3600 * 23], dtype='timedelta64[s]'),
+                 room=[1, 2, 1], triggers=[1, 5, 1], duration_s=[60, 600, 120])
+    store.append('John', 'movement', day + np.array([3600 * 9], dtype='timedelta64[s]'),
+                 steps=[1200], active_seconds=[1800], distance_m=[900])
+
+    sensors = store.motion_sensor_record('John', '2025-10-05')
+    movement = store.movement_record('John', '2025-10-05')
+
+    assert sensors['active_rooms'] == ['bathroom', 'kitchen']
+    assert sensors['overnight_bathroom_visits'] == 2
+    assert movement['total_steps'] == 1200
+    assert movement['active_minutes'] == 30
+    assert movement['distance_km'] == 0.9
+
+
+def test_range_rollups_match_records_without_report(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    day = np.datetime64('2025-10-05')
+    store.append('John', 'motion', day + np.array([3600 * 2, 3600 * 9, 3600 * 23], dtype='timedelta64[s]'),
+                 room=[1, 1, 1], triggers=[1, 5, 1], duration_s=[60, 600, 120])
+    store.append('John', 'presence', day + np.array([0, 3600 * 10], dtype='timedelta64[s]'),
+                 duration_s=[80000, 6400], at_home=[1, 0], location=[-1, 2])
+
+    presence = store.daily_presence('John', '2025-10-04', 2)
+    bathroom = store.daily_overnight_bathroom_visits('John', '2025-10-04', 2)
+    record = store.presence_record('John', '2025-10-05')
+
+    assert presence['measured'].tolist() == [False, True]
+    assert presence['home_hours'][1] == record['home_hours']
+    assert presence['outings'][1] == len(record['outings'])
+    assert bathroom['measured'].tolist() == [False, True]
+    assert bathroom['visits'][1] == store.motion_sensor_record('John', '2025-10-05')['overnight_bathroom_visits']
@@ -0,0 +1,71 @@
+"""Tests for the tool output modes."""
+
+import json
+from types import SimpleNamespace
+
+from team29.parent_tools import get_daily_summary, get_upcoming_appointments
+from team29.tool_output import get_output_mode, is_compact, output_mode_callbacks, use_output_mode
+
+
+def _tool_context(call_id, state=None):
+    return SimpleNamespace(function_call_id=call_id, state=state or {})
+
+
+def test_tool_callbacks_scope_the_mode_to_the_call(monkeypatch):
+    monkeypatch.delenv('TOOL_OUTPUT_MODE', raising=False)
+    before, after = output_mode_callbacks('compact')
+    context = _tool_context('call-1')
+
+    assert before(None, {}, context) is None
+    assert is_compact()
+    assert after(None, {}, context, 'result') is None
+    assert get_output_mode() == 'text'
+
+
+def test_session_state_overrides_the_agent_mode(monkeypatch):
+    monkeypatch.delenv('TOOL_OUTPUT_MODE', raising=False)
+    before, after = output_mode_callbacks('compact')
+    context = _tool_context('call-2', {'tool_output_mode': 'text'})
+
+    with use_output_mode('compact'):
+        before(None, {}, context)
+        assert get_output_mode() == 'text'
+        after(None, {}, context, 'result')
+        assert get_output_mode() == 'compact'
+    assert get_output_mode() == 'text'
+
+
+def test_compact_daily_summary_carries_the_text_data():
+    with use_output_mode('text'):
+        text = get_daily_summary('2025-10-14')
+    with use_output_mode('compact'):
+        data = json.loads(get_daily_summary('2025-10-14'))
+
+    assert data['date'] == '2025-10-14'
+    assert f"Steps: {data['steps']}" in text
+    assert f"Active time: {data['active_min']} minutes" in text
+    assert f"Distance: {data['km']} km" in text
+    assert f"Time at home: {data['home_h']} hours" in text
+    assert f"Outings: {data['outings']}" in text
+    assert f"Sleep duration: {data['sleep_h']} hours" in text
+    assert f"Sleep quality: {data['sleep_q']}" in text
+    for meal in ('breakfast', 'lunch', 'dinner'):
+        assert f"{meal.capitalize()}: {'✓' if meal in data.get('meals', []) else '✗'}" in text
+    for _, _, description, _ in data.get('irr', []):
+        assert description in text
+
+
+def test_compact_appointments_carry_the_text_data():
+    with use_output_mode('text'):
+        text = get_upcoming_appointments(14)
+    with use_output_mode('compact'):
+        data = json.loads(get_upcoming_appointments(14))
+
+    assert data['apts']
+    for time, title, apt_type, *location in data['apts']:
+        assert f"• {title}" in text
+        assert f"Type: {apt_type} | Time: {time}" in text
+        if location and location[0]:
+            assert f"Location: {location[0]}" in text
+    if data.get('more'):
+        assert f"...and {data['more']} more." in text
@@ -0,0 +1,93 @@
+"""Tests for retried read-modify-write transactions."""
+
+import threading
+
+import pytest
+
+from team29 import firestore_native_service
+from team29.firestore_native_service import FirestoreNativeService
+from team29.storage_backends import InMemoryBackend, SQLiteBackend, TransactionConflict
+
+
+class FlakyBackend(InMemoryBackend):
+    """In-memory backend whose first `conflicts` transactions lose a race."""
+
+    def __init__(self, conflicts: int):
+        super().__init__()
+        self.conflicts = conflicts
+        self.attempts = 0
+
+    def run_transaction(self, func):
+        self.attempts += 1
+        if self.conflicts:
+            self.conflicts -= 1
+            raise TransactionConflict("document changed underneath")
+        return super().run_transaction(func)
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(firestore_native_service, 'TRANSACTION_BASE_DELAY', 0.001)
+
+
+def test_conflicts_are_retried_and_counted():
+    backend = FlakyBackend(conflicts=2)
+    service = FirestoreNativeService(backend=backend, journal_dir='')
+
+    assert service.add_care_instructions('John', ['Eye drops at 8']) == 1
+
+    stats = service.transaction_stats()['care-instructions']
+    assert backend.attempts == 3
+    assert (stats['commits'], stats['retries']) == (1, 2)
+    assert service.get_care_instructions('John') == ['Eye drops at 8']
+
+
+def test_transaction_aborts_after_max_attempts():
+    service = FirestoreNativeService(backend=FlakyBackend(conflicts=10), journal_dir='')
+    service.transaction_max_attempts = 3
+
+    with pytest.raises(TransactionConflict):
+        service.add_care_instructions('John', ['Eye drops at 8'])
+
+    stats = service.transaction_stats()['care-instructions']
+    assert stats['aborts'] == 1
+    assert stats.get('commits', 0) == 0
+    assert service.get_care_instructions('John') == []
+
+
+@pytest.mark.parametrize('shared', [False, True])
+def test_concurrent_sqlite_appends_lose_nothing(tmp_path, shared):
+    path = str(tmp_path / 'docs.db')
+    backend = SQLiteBackend(path)
+    # Separate connections race through the database file; a shared one through the backend lock
+    services = [FirestoreNativeService(backend=backend if shared else SQLiteBackend(path), journal_dir='')
+                for _ in range(4)]
+
+    def writer(n, service):
+        for i in range(10):
+            service.add_care_instructions('John', [f"w{n}-{i}"])
+
+    threads = [threading.Thread(target=writer, args=(n, service)) for n, service in enumerate(services)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stored = services[0].get_care_instructions('John')
+    assert sorted(stored) == sorted(f"w{n}-{i}" for n in range(4) for i in range(10))
+
+
+def test_journaled_appends_replay_through_retried_transactions(tmp_path):
+    backend = FlakyBackend(conflicts=1)
+    service = FirestoreNativeService(backend=backend, journal_dir=str(tmp_path))
+    try:
+        assert service.add_care_instructions('John', ['Eye drops at 8']) == 1
+        assert service.add_care_instructions('John', ['Walk after lunch']) == 2
+        assert service.replayer.flush(timeout=10)
+    finally:
+        service.replayer.stop()
+
+    stats = service.transaction_stats()['care-instructions']
+    assert (stats['commits'], stats['retries']) == (2, 1)
+    assert backend.get_document('care-instructions', 'John') == {'instructions': ['Eye drops at 8',
+                                                                                  'Walk after lunch']}
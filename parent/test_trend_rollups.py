@@ -0,0 +1,97 @@
+"""Tests for the incremental trend rollups."""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from team29.trend_rollups import METRICS, TREND_THRESHOLD, WINDOWS, RollupEngine
+
+
+def _value(metric, day):
+    """Deterministic daily value with day-to-day variation."""
+    rng = np.random.default_rng([METRICS.index(metric), day.toordinal()])
+    return float(rng.integers(0, 10000))
+
+
+class Loader:
+    """Serves _value() per day, with optional overrides, and records every call."""
+
+    def __init__(self):
+        self.calls = []
+        self.overrides = {}
+
+    def __call__(self, patient_id, start, days):
+        self.calls.append((start, days))
+        dates = [start + timedelta(days=i) for i in range(days)]
+        return {m: np.array([self.overrides.get((m, d), _value(m, d)) for d in dates]) for m in METRICS}
+
+    def naive_sum(self, metric, end, days):
+        return sum(self.overrides.get((metric, end - timedelta(days=i)), _value(metric, end - timedelta(days=i)))
+                   for i in range(days))
+
+
+END = date(2025, 10, 14)
+
+
+@pytest.mark.parametrize('days', WINDOWS)
+def test_window_sums_match_a_naive_sum(days):
+    loader = Loader()
+    engine = RollupEngine('patient', loader=loader)
+    engine.ensure_through(END)
+
+    for metric in METRICS:
+        stats = engine.window(metric, days)
+        assert stats['total'] == pytest.approx(loader.naive_sum(metric, END, days))
+        assert stats['mean'] == pytest.approx(stats['total'] / days)
+        previous = loader.naive_sum(metric, END - timedelta(days=days), days) / days
+        assert stats['previous_mean'] == pytest.approx(previous)
+        assert engine.latest(days)[metric] == stats
+        # A window ending earlier is the same two lookups
+        earlier = END - timedelta(days=11)
+        assert engine.window(metric, days, earlier)['total'] == pytest.approx(loader.naive_sum(metric, earlier, days))
+
+
+def test_ensure_through_reloads_only_the_last_day():
+    loader = Loader()
+    engine = RollupEngine('patient', loader=loader)
+    engine.ensure_through(END)
+    before = engine.window('steps', 7)['total']
+
+    # More samples land on the latest day, then the next day starts
+    loader.overrides[('steps', END)] = _value('steps', END) + 500
+    engine.ensure_through(END)
+    assert engine.window('steps', 7)['total'] == pytest.approx(before + 500)
+
+    engine.ensure_through(END + timedelta(days=2))
+    assert loader.calls[1:] == [(END, 1), (END, 3)]
+    assert engine.last_date == END + timedelta(days=2)
+    for days in WINDOWS:
+        assert engine.window('steps', days)['total'] == pytest.approx(
+            loader.naive_sum('steps', END + timedelta(days=2), days))
+
+
+def test_days_must_be_added_in_order():
+    engine = RollupEngine('patient', loader=Loader())
+    engine.add_days(END, {m: np.ones(3) for m in METRICS})
+
+    with pytest.raises(ValueError):
+        engine.add_days(END + timedelta(days=5), {m: np.ones(1) for m in METRICS})
+
+
+@pytest.mark.parametrize('recent, direction', [
+    (1.0 + 2 * TREND_THRESHOLD, 'increasing'),
+    (1.0 + TREND_THRESHOLD / 2, 'stable'),
+    (1.0 - TREND_THRESHOLD / 2, 'stable'),
+    (1.0 - 2 * TREND_THRESHOLD, 'decreasing'),
+])
+def test_trend_threshold_classifies_direction(recent, direction):
+    engine = RollupEngine('patient', loader=Loader())
+    # 7 days at 100, then 7 days at 100 * recent
+    engine.add_days(END - timedelta(days=13), {m: np.array([100.0] * 7 + [100.0 * recent] * 7) for m in METRICS})
+
+    stats = engine.window('sleep_hours', 7)
+
+    assert stats['change'] == pytest.approx(recent - 1.0)
+    assert stats['direction'] == direction
+    assert engine.window('sleep_hours', 14)['direction'] == 'stable'  # No window before it
@@ -0,0 +1,101 @@
+"""Tests for the write journal and its replayer (in-memory backend, no Firestore needed)."""
+
+from team29.storage_backends import InMemoryBackend, TransactionConflict
+from team29.write_journal import APPLIED_COLLECTION, JournalReplayer, WriteJournal
+
+
+class RejectingBackend(InMemoryBackend):
+    """Rejects every write whose data has a 'bad' field, like a backend refusing a payload."""
+
+    def _store(self, collection, doc_id, data, merge):
+        if data.get('bad'):
+            raise ValueError('rejected payload')
+        super()._store(collection, doc_id, data, merge)
+
+
+class UnreachableBackend(InMemoryBackend):
+    def run_transaction(self, func):
+        raise TransactionConflict('backend unavailable')
+
+
+def _journal(tmp_path):
+    return WriteJournal(str(tmp_path / 'journal.db'))
+
+
+def test_failing_entry_only_blocks_its_document(tmp_path):
+    journal = _journal(tmp_path)
+    backend = RejectingBackend()
+    journal.append('set', 'care-instructions', 'John', {'bad': True})
+    journal.append('append', 'care-instructions', 'John', {'field': 'instructions', 'values': ['x']})
+    journal.append('set', 'food-preferences', 'Mary', {'likes': ['soup']})
+
+    applied = JournalReplayer(journal, backend, max_attempts=3).replay_once()
+
+    assert applied == 1
+    assert backend.get_document('food-preferences', 'Mary') == {'likes': ['soup']}
+    # The later write to John waits behind the failing one
+    assert backend.get_document('care-instructions', 'John') is None
+    assert journal.pending_count() == 2
+
+
+def test_rejected_entry_is_dead_lettered(tmp_path):
+    journal = _journal(tmp_path)
+    backend = RejectingBackend()
+    journal.append('set', 'food-preferences', 'John', {'bad': True})
+    journal.append('set', 'food-preferences', 'John', {'likes': ['rice']})
+    replayer = JournalReplayer(journal, backend, max_attempts=2)
+
+    replayer.replay_once()
+    replayer.replay_once()
+
+    dead = journal.dead_letters()
+    assert [entry['payload'] for entry in dead] == [{'bad': True}]
+    assert dead[0]['last_error'] == 'rejected payload'
+    assert journal.pending_count() == 0
+    assert journal.pending_for('food-preferences', 'John') == []
+    assert backend.get_document('food-preferences', 'John') == {'likes': ['rice']}
+
+    assert journal.requeue_dead() == 1
+    assert journal.pending_count() == 1
+
+
+def test_transient_errors_never_dead_letter(tmp_path):
+    journal = _journal(tmp_path)
+    journal.append('set', 'food-preferences', 'John', {'likes': ['rice']})
+    replayer = JournalReplayer(journal, UnreachableBackend(), max_attempts=2)
+
+    for _ in range(5):
+        replayer.replay_once()
+
+    assert journal.dead_letters() == []
+    assert journal.pending_count() == 1
+
+
+def test_markers_are_collected_with_compacted_entries(tmp_path):
+    journal = _journal(tmp_path)
+    backend = InMemoryBackend()
+    keys = [journal.append('append', 'care-instructions', 'John', {'field': 'instructions', 'values': [str(i)]})
+            for i in range(3)]
+    replayer = JournalReplayer(journal, backend)
+
+    assert replayer.replay_once() == 3
+    assert sorted(backend.list_documents(APPLIED_COLLECTION)) == sorted(keys)
+
+    assert replayer.collect_markers() == 3
+    assert backend.list_documents(APPLIED_COLLECTION) == []
+    assert backend.get_document('care-instructions', 'John') == {'instructions': ['0', '1', '2']}
+
+
+def test_replay_is_idempotent(tmp_path):
+    journal = _journal(tmp_path)
+    backend = InMemoryBackend()
+    key = journal.append('append', 'care-instructions', 'John', {'field': 'instructions', 'values': ['a']})
+    replayer = JournalReplayer(journal, backend)
+    replayer.replay_once()
+
+    # Same key again (e.g. a client retry) is recorded once and applied once
+    journal.append('append', 'care-instructions', 'John', {'field': 'instructions', 'values': ['a']},
+                   idempotency_key=key)
+    replayer.replay_once()
+
+    assert backend.get_document('care-instructions', 'John') == {'instructions': ['a']}
@@ -0,0 +1,470 @@
+"""Columnar per-patient time-series store for wearable and home-sensor feeds.
+
+Layout on disk (one directory per patient, series and day):
+
+    {root}/{patient_id}/{series}/{YYYY-MM-DD}/{column}.bin
+    {root}/{patient_id}/{series}/{YYYY-MM-DD}/_hourly_{rows}.npy
+
+Every column is a raw little-endian array file. Appends only ever add to
+the end of the column files of a day partition, and reads map them with
+`np.memmap`, so reading a day or a month never parses per-record dicts.
+`ts` (seconds since local midnight of the partition day) is present in
+every series.
+
+Hourly rollups (sum of every numeric column per hour, plus sample
+counts and a few derived sums such as time at home) are computed with one
+`np.bincount` per column and cached next to the partition; the row count
+in the file name invalidates the cache when new samples are appended.
+Daily rollups for any range are the sum of the cached hourly rollups.
+
+Series:
+- movement: steps, active_seconds, distance_m
+- presence: duration_s, at_home (1/0), location (index into OUTING_LOCATIONS, -1 at home)
+- motion:   room (index into ROOMS), triggers, duration_s
+- daily:    totals reported by a device for a whole day (steps, sedentary
+            minutes, calories, hours at home, overnight bathroom visits, ...);
+            the last report of a day wins, and reported values take
+            precedence over the ones derived from samples
+
+Set TIMESERIES_DIR to enable the shared store. `backfill_from_mock()`
+fills it from the seeded mock engine for offline development.
+"""
+
+import glob
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from team29.mock_engine import (
+    MockDataEngine,
+    OUTING_LOCATIONS,
+    ROOMS,
+    get_mock_engine,
+    parse_date,
+)
+
+SERIES = {
+    'movement': {'ts': '<i4', 'steps': '<i4', 'active_seconds': '<i4', 'distance_m': '<f4'},
+    'presence': {'ts': '<i4', 'duration_s': '<i4', 'at_home': '<i1', 'location': '<i1'},
+    'motion': {'ts': '<i4', 'room': '<i1', 'triggers': '<i2', 'duration_s': '<i4'},
+    'daily': {'ts': '<i4', 'total_steps': '<i4', 'active_minutes': '<i4', 'sedentary_minutes': '<i4',
+              'distance_m': '<f4', 'calories_burned': '<i4', 'home_s': '<i4', 'away_s': '<i4',
+              'overnight_bathroom_visits': '<i2', 'unusual_patterns': '<i1'},
+}
+SAMPLE_SERIES = ('movement', 'presence', 'motion')
+
+# Bathroom visits between 22:00 and 06:00 count as overnight
+OVERNIGHT_START_S = 22 * 3600
+OVERNIGHT_END_S = 6 * 3600
+BATHROOM = ROOMS.index('bathroom')
+OVERNIGHT_HOURS = np.r_[22:24, 0:6]
+
+# Extra per-hour sums of the rollups: name -> weights computed from the columns
+DERIVED_SUMS = {
+    'presence': {'home_s': lambda d: d['duration_s'] * (d['at_home'] == 1),
+                 'away_samples': lambda d: d['at_home'] != 1},
+    'motion': {'bathroom_samples': lambda d: d['room'] == BATHROOM},
+}
+# Bumped when the rollup fields change, so older cached rollups are rebuilt
+ROLLUP_VERSION = 2
+
+
+class TimeSeriesStore:
+    """Append-only, memory-mapped, day-partitioned column store."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    # ========== PARTITIONS ==========
+
+    def partition_dir(self, patient_id: str, series: str, day: Any) -> str:
+        if series not in SERIES:
+            raise ValueError(f"Unknown series {series!r} (expected one of {sorted(SERIES)})")
+        return os.path.join(self.root, patient_id, series, str(parse_date(day)))
+
+    def has_day(self, patient_id: str, series: str, day: Any) -> bool:
+        return os.path.isdir(self.partition_dir(patient_id, series, day))
+
+    def row_count(self, patient_id: str, series: str, day: Any) -> int:
+        """Rows readable in a partition (the shortest column wins after a torn append)."""
+        directory = self.partition_dir(patient_id, series, day)
+        counts = []
+        for column, dtype in SERIES[series].items():
+            path = os.path.join(directory, f"{column}.bin")
+            if not os.path.exists(path):
+                return 0
+            counts.append(os.path.getsize(path) // np.dtype(dtype).itemsize)
+        return min(counts)
+
+    # ========== WRITES ==========
+
+    def append(self, patient_id: str, series: str, timestamps: np.ndarray, **columns: np.ndarray) -> int:
+        """
+        Append samples, splitting them into day partitions.
+
+        Args:
+            patient_id: Patient identifier
+            series: 'movement', 'presence' or 'motion'
+            timestamps: datetime64 array (local time), one per sample
+            **columns: One array per non-ts column of the series
+
+        Returns:
+            Number of samples appended
+        """
+        schema = SERIES[series]
+        missing = set(schema) - {'ts'} - set(columns)
+        if missing:
+            raise ValueError(f"Missing columns for {series}: {sorted(missing)}")
+
+        timestamps = np.asarray(timestamps, dtype='datetime64[s]')
+        days = timestamps.astype('datetime64[D]')
+        seconds = (timestamps - days).astype('<i4')
+        unique_days, inverse = np.unique(days, return_inverse=True)
+
+        with self._lock:
+            for i, day in enumerate(unique_days):
+                mask = inverse == i
+                directory = self.partition_dir(patient_id, series, str(day))
+                os.makedirs(directory, exist_ok=True)
+                for column, dtype in schema.items():
+                    values = seconds[mask] if column == 'ts' else np.asarray(columns[column])[mask]
+                    with open(os.path.join(directory, f"{column}.bin"), 'ab') as f:
+                        f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        return len(timestamps)
+
+    # ========== READS ==========
+
+    def read_day(self, patient_id: str, series: str, day: Any) -> Dict[str, np.ndarray]:
+        """Memory-mapped columns of one day partition (empty arrays if missing)."""
+        directory = self.partition_dir(patient_id, series, day)
+        rows = self.row_count(patient_id, series, day)
+        result = {}
+        for column, dtype in SERIES[series].items():
+            if rows == 0:
+                result[column] = np.empty(0, dtype=dtype)
+            else:
+                result[column] = np.memmap(os.path.join(directory, f"{column}.bin"),
+                                           dtype=dtype, mode='r', shape=(rows,))
+        return result
+
+    def hourly_rollup(self, patient_id: str, series: str, day: Any) -> np.ndarray:
+        """
+        Per-hour sums of every column of a day.
+
+        Returns:
+            Structured array of 24 rows with a 'samples' count and one float64
+            sum field per non-ts column
+        """
+        directory = self.partition_dir(patient_id, series, day)
+        value_columns = [c for c in SERIES[series] if c != 'ts']
+        derived = DERIVED_SUMS.get(series, {})
+        dtype = [('samples', '<i8')] + [(c, '<f8') for c in value_columns + list(derived)]
+        rows = self.row_count(patient_id, series, day)
+        if rows == 0:
+            return np.zeros(24, dtype=dtype)
+
+        cached = os.path.join(directory, f"_hourly_v{ROLLUP_VERSION}_{rows}.npy")
+        if os.path.exists(cached):
+            return np.load(cached, mmap_mode='r')
+
+        data = self.read_day(patient_id, series, day)
+        hours = np.minimum(data['ts'] // 3600, 23)
+        rollup = np.zeros(24, dtype=dtype)
+        rollup['samples'] = np.bincount(hours, minlength=24)
+        for column in value_columns:
+            rollup[column] = np.bincount(hours, weights=data[column], minlength=24)
+        for name, weights in derived.items():
+            rollup[name] = np.bincount(hours, weights=weights(data), minlength=24)
+
+        with self._lock:
+            for stale in glob.glob(os.path.join(directory, '_hourly_*.npy')):
+                os.remove(stale)
+            tmp = cached + '.tmp'
+            with open(tmp, 'wb') as f:
+                np.save(f, rollup)
+            os.replace(tmp, cached)
+        return rollup
+
+    def daily_rollup(self, patient_id: str, series: str, start: Any, days: int,
+                     hours: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Per-day sums for a date range, built from the hourly rollups.
+
+        Args:
+            hours: Only sum these hours of each day (default: all 24)
+
+        Returns:
+            Dict with 'dates' (days,), 'samples' and one sum array per column
+        """
+        first = parse_date(start)
+        hourly = np.stack([
+            self.hourly_rollup(patient_id, series, first + timedelta(days=i)) for i in range(days)
+        ])
+        if hours is not None:
+            hourly = hourly[:, hours]
+        result = {name: hourly[name].sum(axis=1) for name in hourly.dtype.names}
+        result['dates'] = np.arange(np.datetime64(first), np.datetime64(first + timedelta(days=days)))
+        return result
+
+    def daily_report(self, patient_id: str, day: Any) -> Optional[Dict[str, Any]]:
+        """The last 'daily' report of a day, or None."""
+        rows = self.row_count(patient_id, 'daily', day)
+        if rows == 0:
+            return None
+        data = self.read_day(patient_id, 'daily', day)
+        return {column: values[rows - 1].item() for column, values in data.items()}
+
+    def daily_reports(self, patient_id: str, start: Any, days: int) -> Dict[str, np.ndarray]:
+        """
+        Last 'daily' report of every day of a range.
+
+        Returns:
+            Dict with 'reported' (days,) bool and one (days,) array per
+            report column (0 where nothing was reported)
+        """
+        first = parse_date(start)
+        columns = [c for c in SERIES['daily'] if c != 'ts']
+        result = {c: np.zeros(days) for c in columns}
+        result['reported'] = np.zeros(days, dtype=bool)
+        for i in range(days):
+            report = self.daily_report(patient_id, first + timedelta(days=i))
+            if report is not None:
+                result['reported'][i] = True
+                for column in columns:
+                    result[column][i] = report[column]
+        return result
+
+    def daily_movement(self, patient_id: str, start: Any, days: int) -> Dict[str, np.ndarray]:
+        """
+        Daily steps, active minutes and distance for a range: reported totals
+        where a day has a report, else sums of its movement samples.
+
+        Returns:
+            Dict with 'measured' (days,) bool (report or samples present),
+            'steps', 'active_minutes' and 'distance_km'
+        """
+        rollup = self.daily_rollup(patient_id, 'movement', start, days)
+        reports = self.daily_reports(patient_id, start, days)
+        reported = reports['reported']
+        return {
+            'measured': reported | (rollup['samples'] > 0),
+            'steps': np.where(reported, reports['total_steps'], rollup['steps']),
+            'active_minutes': np.where(reported, reports['active_minutes'], rollup['active_seconds'] // 60),
+            'distance_km': np.round(np.where(reported, reports['distance_m'], rollup['distance_m']) / 1000, 2),
+        }
+
+    def daily_presence(self, patient_id: str, start: Any, days: int) -> Dict[str, np.ndarray]:
+        """
+        Daily home hours and outing counts for a range, matching presence_record().
+
+        Returns:
+            Dict with 'measured' (days,) bool (report or samples present),
+            'home_hours' and 'outings'
+        """
+        rollup = self.daily_rollup(patient_id, 'presence', start, days)
+        reports = self.daily_reports(patient_id, start, days)
+        reported = reports['reported']
+        return {
+            'measured': reported | (rollup['samples'] > 0),
+            'home_hours': np.round(np.where(reported, reports['home_s'], rollup['home_s']) / 3600, 1),
+            'outings': rollup['away_samples'].astype(np.int64),
+        }
+
+    def daily_overnight_bathroom_visits(self, patient_id: str, start: Any, days: int) -> Dict[str, np.ndarray]:
+        """
+        Overnight bathroom visits for a range, matching motion_sensor_record().
+
+        Returns:
+            Dict with 'measured' (days,) bool (report or samples present) and 'visits'
+        """
+        rollup = self.daily_rollup(patient_id, 'motion', start, days)
+        overnight = self.daily_rollup(patient_id, 'motion', start, days, hours=OVERNIGHT_HOURS)
+        reports = self.daily_reports(patient_id, start, days)
+        reported = reports['reported']
+        return {
+            'measured': reported | (rollup['samples'] > 0),
+            'visits': np.where(reported, reports['overnight_bathroom_visits'],
+                               overnight['bathroom_samples']).astype(np.int64),
+        }
+
+    # ========== SUMMARY RECORDS ==========
+
+    def movement_record(self, patient_id: str, date: str) -> Dict[str, Any]:
+        """Daily movement in the shape of generate_movement_data()."""
+        hourly = self.hourly_rollup(patient_id, 'movement', date)
+        report = self.daily_report(patient_id, date)
+        if report is not None:
+            totals = {
+                'total_steps': int(report['total_steps']),
+                'active_minutes': int(report['active_minutes']),
+                'sedentary_minutes': int(report['sedentary_minutes']),
+                'distance_km': round(float(report['distance_m']) / 1000, 2),
+                'calories_burned': int(report['calories_burned']),
+            }
+        else:
+            # Without a device report, estimate from the samples: waking day of 16 h, ~0.04 kcal per step
+            active_minutes = int(hourly['active_seconds'].sum() // 60)
+            totals = {
+                'total_steps': int(hourly['steps'].sum()),
+                'active_minutes': active_minutes,
+                'sedentary_minutes': max(0, 16 * 60 - active_minutes) if hourly['samples'].sum() else 0,
+                'distance_km': round(float(hourly['distance_m'].sum()) / 1000, 2),
+                'calories_burned': int(hourly['steps'].sum() * 0.04),
+            }
+        return dict({'date': date}, **totals, hourly_activity=hourly['steps'].astype(int).tolist())
+
+    def presence_record(self, patient_id: str, date: str) -> Dict[str, Any]:
+        """Daily presence in the shape of generate_presence_data()."""
+        data = self.read_day(patient_id, 'presence', date)
+        at_home = data['at_home'] == 1
+        away = np.flatnonzero(~at_home)
+        report = self.daily_report(patient_id, date)
+        if report is not None:
+            home_s, away_s = report['home_s'], report['away_s']
+        else:
+            home_s, away_s = data['duration_s'][at_home].sum(), data['duration_s'][~at_home].sum()
+        return {
+            'date': date,
+            'home_hours': round(float(home_s) / 3600, 1),
+            'away_hours': round(float(away_s) / 3600, 1),
+            'outings': [
+                {
+                    'time': f"{int(data['ts'][i]) // 3600:02d}:{int(data['ts'][i]) % 3600 // 60:02d}",
+                    'duration_minutes': int(data['duration_s'][i]) // 60,
+                    'location': OUTING_LOCATIONS[data['location'][i]] if data['location'][i] >= 0 else 'unknown'
+                }
+                for i in away
+            ]
+        }
+
+    def motion_sensor_record(self, patient_id: str, date: str) -> Dict[str, Any]:
+        """Daily motion-sensor aggregates in the shape of generate_motion_sensor_data()."""
+        data = self.read_day(patient_id, 'motion', date)
+        rooms = data['room'].astype(np.intp)
+        triggers = np.bincount(rooms, weights=data['triggers'], minlength=len(ROOMS))
+        minutes = np.bincount(rooms, weights=data['duration_s'], minlength=len(ROOMS)) / 60
+        last_ts = np.full(len(ROOMS), -1)
+        np.maximum.at(last_ts, rooms, data['ts'])
+        # Rooms in order of their first sample
+        seen, first = np.unique(rooms, return_index=True)
+        active = [int(i) for i in seen[np.argsort(first)] if triggers[i] > 0]
+
+        report = self.daily_report(patient_id, date)
+        if report is not None:
+            overnight = int(report['overnight_bathroom_visits'])
+            unusual = bool(report['unusual_patterns'])
+        else:
+            ts = data['ts']
+            overnight = int(((rooms == BATHROOM) & ((ts >= OVERNIGHT_START_S) | (ts < OVERNIGHT_END_S))).sum())
+            unusual = False
+        return {
+            'date': date,
+            'active_rooms': [ROOMS[i] for i in active],
+            'activity_by_room': {
+                ROOMS[i]: {
+                    'triggers': int(triggers[i]),
+                    'last_activity': f"{last_ts[i] // 3600:02d}:{last_ts[i] % 3600 // 60:02d}",
+                    'total_minutes': int(minutes[i])
+                }
+                for i in active
+            },
+            'overnight_bathroom_visits': overnight,
+            'unusual_patterns': unusual
+        }
+
+
+def backfill_from_mock(store: TimeSeriesStore, start_date: str, days: int,
+                       engine: Optional[MockDataEngine] = None) -> int:
+    """
+    Fill the store with samples derived from the mock engine.
+
+    Movement becomes one sample per hour, presence one sample per outing plus
+    one home interval, and motion one sample per active room (in the mock's
+    room order). The mock's day totals go in a 'daily' report, so records
+    read back from the store equal the mock records.
+
+    Returns:
+        Number of samples written
+    """
+    engine = engine or get_mock_engine()
+    data = engine.generate(start_date, days)
+    midnights = data['dates'].astype('datetime64[s]')
+    written = 0
+
+    for p, patient_id in enumerate(engine.patient_ids):
+        # Movement: (days, 24) hourly samples at the middle of each hour
+        steps = data['hourly_activity'][p]
+        ts = (midnights[:, None] + np.arange(24) * 3600 + 1800).ravel()
+        active_share = data['active_minutes'][p][:, None] * 60 * steps / np.maximum(steps.sum(axis=1, keepdims=True), 1)
+        written += store.append(patient_id, 'movement', ts,
+                                steps=steps.ravel(),
+                                active_seconds=active_share.ravel().astype(np.int32),
+                                distance_m=(steps * 0.75).ravel())
+
+        # Presence: outings at their hour, the rest of the day at home
+        outing_slots = np.arange(2)[None, :] < data['outing_count'][p][:, None]
+        day_index, slot = np.nonzero(outing_slots)
+        away_s = (data['outing_minutes'][p] * 60 * outing_slots).sum(axis=1)
+        ts = np.concatenate([midnights[day_index] + data['outing_hour'][p][day_index, slot] * 3600, midnights])
+        written += store.append(patient_id, 'presence', ts,
+                                duration_s=np.concatenate([data['outing_minutes'][p][day_index, slot] * 60,
+                                                           86400 - away_s]),
+                                at_home=np.concatenate([np.zeros(len(day_index)), np.ones(days)]),
+                                location=np.concatenate([data['outing_location'][p][day_index, slot],
+                                                         np.full(days, -1)]))
+
+        # Motion: one sample per active room at its last activity time
+        rank = np.argsort(data['room_order'][p], axis=-1)
+        room_active = rank < data['active_room_count'][p][:, None]
+        day_index, room = np.nonzero(room_active)
+        order = np.lexsort((rank[day_index, room], day_index))
+        day_index, room = day_index[order], room[order]
+        last_s = (data['room_last_hour'][p] * 3600 + data['room_last_minute'][p] * 60)[day_index, room]
+        written += store.append(patient_id, 'motion', midnights[day_index] + last_s,
+                                room=room,
+                                triggers=data['room_triggers'][p][day_index, room],
+                                duration_s=data['room_minutes'][p][day_index, room] * 60)
+
+        # Daily reports: the totals the samples can't reproduce exactly
+        written += store.append(patient_id, 'daily', midnights,
+                                total_steps=data['total_steps'][p],
+                                active_minutes=data['active_minutes'][p],
+                                sedentary_minutes=data['sedentary_minutes'][p],
+                                distance_m=np.round(data['distance_km'][p] * 1000),
+                                calories_burned=data['calories_burned'][p],
+                                home_s=np.round(data['home_hours'][p] * 3600),
+                                away_s=np.round(data['away_hours'][p] * 3600),
+                                overnight_bathroom_visits=data['overnight_bathroom_visits'][p],
+                                unusual_patterns=data['unusual_patterns'][p])
+    return written
+
+
+_timeseries_store: Optional[TimeSeriesStore] = None
+
+
+def get_timeseries_store() -> Optional[TimeSeriesStore]:
+    """Shared store rooted at TIMESERIES_DIR, or None when it is not configured."""
+    global _timeseries_store
+    root = os.getenv('TIMESERIES_DIR')
+    if not root:
+        return None
+    if _timeseries_store is None or _timeseries_store.root != root:
+        _timeseries_store = TimeSeriesStore(root)
+    return _timeseries_store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backfill the time-series store from mock data")
+    parser.add_argument('root', help="Store directory")
+    parser.add_argument('--start', default=(datetime.now() - timedelta(days=89)).strftime("%Y-%m-%d"))
+    parser.add_argument('--days', type=int, default=90)
+    args = parser.parse_args()
+
+    count = backfill_from_mock(TimeSeriesStore(args.root), args.start, args.days)
+    print(f"✅ Wrote {count} samples to {args.root}")
@@ -0,0 +1,119 @@
+"""Output modes for agent tools.
+
+Tools return either the decorated, human-readable text ('text', the
+default) or terse JSON with short keys and no decoration ('compact'),
+which is far cheaper for the model to read and re-quote.
+
+The mode is selected per agent: `output_mode_callbacks(mode)` builds a
+before_tool_callback that sets the mode for each tool call (a session
+can override it with the 'tool_output_mode' state key) and an
+after_tool_callback that resets it, so the mode never outlives the call.
+Outside an agent the TOOL_OUTPUT_MODE environment variable applies, and
+`use_output_mode()` switches it for a block of code.
+
+    before_tool, after_tool = output_mode_callbacks('compact')
+    root_agent = Agent(..., before_tool_callback=before_tool, after_tool_callback=after_tool)
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+OUTPUT_MODES = ('text', 'compact')
+SEVERITY_CODES = {'high': 'H', 'medium': 'M', 'low': 'L'}
+
+_output_mode: ContextVar[Optional[str]] = ContextVar('tool_output_mode', default=None)
+
+
+def _check_mode(mode: str) -> str:
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown tool output mode {mode!r} (expected one of {OUTPUT_MODES})")
+    return mode
+
+
+def get_output_mode() -> str:
+    """The output mode of the current agent turn, or TOOL_OUTPUT_MODE."""
+    return _output_mode.get() or _check_mode(os.getenv('TOOL_OUTPUT_MODE', 'text'))
+
+
+def is_compact() -> bool:
+    return get_output_mode() == 'compact'
+
+
+def set_output_mode(mode: str) -> None:
+    """Set the output mode for the current context (agent turn or thread)."""
+    _output_mode.set(_check_mode(mode))
+
+
+@contextmanager
+def use_output_mode(mode: str) -> Iterator[None]:
+    """Temporarily switch the output mode."""
+    token = _output_mode.set(_check_mode(mode))
+    try:
+        yield
+    finally:
+        _output_mode.reset(token)
+
+
+def output_mode_callbacks(mode: str) -> Tuple[Callable[..., None], Callable[..., None]]:
+    """
+    before_tool_callback and after_tool_callback that run the agent's tools in `mode`.
+
+    The before callback sets the mode (or the session's 'tool_output_mode')
+    and keeps the ContextVar token per function call; the after callback
+    resets it, so the next turn or another agent in the same context starts
+    from its own mode again.
+    """
+    _check_mode(mode)
+    tokens: Dict[Any, Token] = {}
+
+    def _call_key(tool_context) -> Any:
+        return getattr(tool_context, 'function_call_id', None) or id(tool_context)
+
+    def _set_output_mode(tool, args, tool_context):
+        state = getattr(tool_context, 'state', None)
+        selected = (state.get('tool_output_mode') if state is not None else None) or mode
+        tokens[_call_key(tool_context)] = _output_mode.set(_check_mode(selected))
+        return None
+
+    def _reset_output_mode(tool, args, tool_context, tool_response):
+        token = tokens.pop(_call_key(tool_context), None)
+        if token is not None:
+            _output_mode.reset(token)
+        return None
+
+    return _set_output_mode, _reset_output_mode
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, (str, list, dict)) and not value)
+
+
+def _prune(value: Any) -> Any:
+    """Drop empty values so they cost no tokens."""
+    if isinstance(value, dict):
+        pruned = {k: _prune(v) for k, v in value.items()}
+        return {k: v for k, v in pruned.items() if not _is_empty(v)}
+    if isinstance(value, (list, tuple)):
+        return [_prune(v) for v in value]
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        # NumPy scalars
+        value = value.item()
+    if isinstance(value, float):
+        return round(value, 2)
+    return value
+
+
+def compact_json(data: Any) -> str:
+    """Serialize tool output as minimal JSON (no whitespace, empty fields dropped)."""
+    return json.dumps(_prune(data), separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def compact_irregularities(irregularities: List[Dict[str, Any]]) -> List[List[str]]:
+    """Irregularity records as [type, severity code, description, time] rows."""
+    return [
+        [irr['type'], SEVERITY_CODES.get(irr['severity'], irr['severity']), irr['description'], irr['timestamp']]
+        for irr in irregularities
+    ]
@@ -0,0 +1,120 @@
+"""Token-count comparison of the text and compact tool output modes.
+
+Runs the parent tools and the Firestore agent tools in both output modes
+against the mock data and an in-memory storage backend, and prints the
+characters and tokens each output costs the model.
+
+Tokens are counted with tiktoken's cl100k_base encoding when tiktoken is
+installed. Otherwise an approximation is used: one token per 4 characters
+of a word, one per 2 characters of a punctuation run (BPE vocabularies
+merge common runs such as '":"'), and two per non-ASCII character (emoji
+and bullets usually split into several tokens).
+Absolute numbers differ between tokenizers; the ratio between the modes
+is what this harness is for.
+
+    python -m team29.tool_output_benchmark
+"""
+
+import math
+import os
+import re
+from typing import Callable, Dict, List, Tuple
+
+# Firestore tools run against the in-memory backend unless told otherwise
+os.environ.setdefault('STORAGE_BACKEND', 'memory')
+
+from team29 import firestore_agent_tools as fs_tools  # noqa: E402
+from team29 import parent_tools  # noqa: E402
+from team29.tool_output import OUTPUT_MODES, use_output_mode  # noqa: E402
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+WORD = re.compile(r"[A-Za-z0-9_]+|[^\sA-Za-z0-9_]+")
+
+PATIENT_ID = 'John'
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in text (tiktoken if available, otherwise approximate)."""
+    if tiktoken is not None:
+        return len(tiktoken.get_encoding('cl100k_base').encode(text))
+    tokens = 0
+    for piece in WORD.findall(text):
+        if not piece.isascii():
+            tokens += 2 * len(piece)
+        elif piece[0].isalnum() or piece[0] == '_':
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            tokens += math.ceil(len(piece) / 2)
+    return tokens
+
+
+def benchmark_calls() -> List[Tuple[str, Callable[[], str]]]:
+    """(label, call) pairs covering every tool with an output mode."""
+    return [
+        ('save_patient_food_preferences', lambda: fs_tools.save_patient_food_preferences(
+            PATIENT_ID, 'grilled chicken, steamed vegetables, brown rice', 'spicy food, seafood',
+            'peanuts', 'Prefers smaller, frequent meals')),
+        ('get_patient_food_preferences', lambda: fs_tools.get_patient_food_preferences(PATIENT_ID)),
+        ('add_patient_care_instruction', lambda: fs_tools.add_patient_care_instruction(
+            PATIENT_ID, 'Take medication with food')),
+        ('get_patient_care_instructions', lambda: fs_tools.get_patient_care_instructions(PATIENT_ID)),
+        ('save_patient_food_intake', lambda: fs_tools.save_patient_food_intake(
+            PATIENT_ID, 'shift-897', 'Oatmeal with banana, tea')),
+        ('list_firestore_collections', fs_tools.list_firestore_collections),
+        ('list_firestore_documents', lambda: fs_tools.list_firestore_documents('food-preferences')),
+        ('check_firestore_document', lambda: fs_tools.check_firestore_document('food-preferences', PATIENT_ID)),
+        ('get_daily_summary', parent_tools.get_daily_summary),
+        ('get_upcoming_appointments', parent_tools.get_upcoming_appointments),
+        ('check_irregularities', parent_tools.check_irregularities),
+        ('get_medical_summary', parent_tools.get_medical_summary),
+        ('check_medication_adherence', parent_tools.check_medication_adherence),
+        ('analyze_trends', lambda: parent_tools.analyze_trends(30)),
+    ]
+
+
+def run_benchmark() -> List[Dict[str, object]]:
+    """
+    Call every tool in each output mode.
+
+    Returns:
+        One row per tool: {'tool', '<mode>_chars', '<mode>_tokens'} for each mode
+    """
+    rows = []
+    for label, call in benchmark_calls():
+        row = {'tool': label}
+        for mode in OUTPUT_MODES:
+            with use_output_mode(mode):
+                output = call()
+            row[f'{mode}_chars'] = len(output)
+            row[f'{mode}_tokens'] = count_tokens(output)
+        rows.append(row)
+    return rows
+
+
+def print_report(rows: List[Dict[str, object]]) -> None:
+    tokenizer = 'tiktoken cl100k_base' if tiktoken is not None else 'approximate'
+    print(f"\nTool output size by mode (tokens: {tokenizer})\n")
+    print(f"{'tool':<32} {'text tok':>9} {'compact tok':>12} {'saved':>7}")
+    print("-" * 63)
+    total_text = total_compact = 0
+    for row in rows:
+        text, compact = row['text_tokens'], row['compact_tokens']
+        total_text += text
+        total_compact += compact
+        saved = 1 - compact / text if text else 0
+        print(f"{row['tool']:<32} {text:>9} {compact:>12} {saved:>7.0%}")
+    print("-" * 63)
+    saved = 1 - total_compact / total_text if total_text else 0
+    print(f"{'total':<32} {total_text:>9} {total_compact:>12} {saved:>7.0%}")
+
+
+if __name__ == "__main__":
+    import logging
+
+    # Tool modules log every call at INFO; keep the report readable
+    logging.getLogger().setLevel(logging.WARNING)
+    print_report(run_benchmark())
@@ -4,6 +4,9 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any
 import random
 
+from team29.instruction_classifier import get_instruction_classifier
+from team29.medication_engine import classify_doses, group_administrations
+
 
 def get_current_time() -> str:
     """Get the current date and time."""
@@ -24,37 +27,15 @@ def format_schedule(appointments: List[Dict[str, Any]]) -> str:
 
 
 def parse_caregiver_instructions(instructions: str) -> Dict[str, List[str]]:
-    """Parse caregiver instructions into categories."""
-    categories = {
-        'morning': [],
-        'afternoon': [],
-        'evening': [],
-        'medications': [],
-        'special_notes': []
-    }
+    """
+    Parse caregiver instructions into categories.
 
-    # Simple parsing logic - can be enhanced with NLP
-    lines = instructions.split('\n')
-    current_category = 'special_notes'
-
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-
-        lower_line = line.lower()
-        if 'morning' in lower_line:
-            current_category = 'morning'
-        elif 'afternoon' in lower_line:
-            current_category = 'afternoon'
-        elif 'evening' in lower_line:
-            current_category = 'evening'
-        elif 'medication' in lower_line or 'medicine' in lower_line:
-            current_category = 'medications'
-        else:
-            categories[current_category].append(line)
-
-    return categories
+    Lines are matched against the keyword vocabulary of instruction_classifier
+    in a single pass and may land in several categories (e.g. a morning
+    medication). Header lines such as "Morning:" set the time of day for the
+    lines below them.
+    """
+    return get_instruction_classifier().parse(instructions)
 
 
 def calculate_time_until_appointment(appointment_time: str) -> str:
@@ -116,21 +97,38 @@ def summarize_daily_data(data: Dict[str, Any]) -> str:
 
 
 def check_medication_compliance(schedule: List[Dict], taken: List[Dict]) -> Dict[str, Any]:
-    """Check if medications were taken as scheduled."""
+    """
+    Check if medications were taken as scheduled.
+
+    Doses are joined to administrations by medication id through a hash index.
+    When schedule entries and administrations both carry a 'time'
+    ('YYYY-MM-DD HH:MM:SS'), 'timing' also counts doses taken on time, late
+    or missed (see medication_engine for the windows).
+    """
     scheduled_count = len(schedule)
     taken_count = len(taken)
 
     compliance_rate = (taken_count / scheduled_count * 100) if scheduled_count > 0 else 0
 
-    missed = []
-    for med in schedule:
-        if not any(t.get('medication_id') == med.get('id') for t in taken):
-            missed.append(med.get('name', 'Unknown medication'))
+    taken_ids = {t.get('medication_id') for t in taken}
+    missed = [med.get('name', 'Unknown medication') for med in schedule if med.get('id') not in taken_ids]
 
-    return {
+    result = {
         'compliance_rate': compliance_rate,
         'scheduled': scheduled_count,
         'taken': taken_count,
         'missed': missed,
         'status': 'good' if compliance_rate >= 90 else 'needs_attention'
     }
+
+    if schedule and all(med.get('time') for med in schedule):
+        administered = group_administrations(taken)
+        doses = group_administrations([{'medication_id': med.get('id'), 'time': med['time']} for med in schedule])
+        timing = {'on_time': 0, 'late': 0, 'missed': 0}
+        for med_id, times in doses.items():
+            status = classify_doses(times, administered.get(med_id, times[:0]))
+            for key in timing:
+                timing[key] += int((status == key).sum())
+        result['timing'] = timing
+
+    return result
@@ -0,0 +1,220 @@
+"""Incrementally maintained daily aggregates and rolling trend windows.
+
+`RollupEngine` keeps one value per day for each metric in METRICS and a
+running prefix sum per metric. Loading a new day appends one entry to
+each, so the mean or total over any window - and the change against the
+window before it - is two lookups, no matter how long the window is.
+The 7/30/90-day windows ending at the latest day are recomputed whenever
+a day lands and served directly by `latest()`.
+
+The most recent day is kept open: `ensure_through()` reloads it on every
+call so samples that arrive during the day are picked up, while older
+days are loaded exactly once.
+
+Daily values come from `load_daily_metrics()`: steps from the time-series
+store where it covers a day, irregularity counts from the statistical
+detector, everything else from the mock engine arrays.
+"""
+
+import threading
+from datetime import date as date_cls, datetime, timedelta
+from typing import Callable, Dict, List, Any, Optional
+
+import numpy as np
+
+from team29.irregularity_detector import get_irregularity_detector
+from team29.mock_engine import DEFAULT_PATIENT_ID, get_mock_engine, parse_date
+from team29.timeseries_store import get_timeseries_store
+
+METRICS = ('steps', 'sleep_hours', 'irregularities', 'meals_eaten', 'medication_taken')
+WINDOWS = (7, 30, 90)
+
+# Relative change against the previous window that counts as a trend
+TREND_THRESHOLD = 0.05
+
+MetricsLoader = Callable[[str, date_cls, int], Dict[str, np.ndarray]]
+
+
+def load_daily_metrics(patient_id: str, start: date_cls, days: int) -> Dict[str, np.ndarray]:
+    """
+    Daily metric arrays for a date range, shaped (days,).
+
+    Steps come from the time-series store for days it holds samples or a
+    daily report for, and from the mock engine otherwise; irregularities
+    are the detector's daily counts.
+    """
+    engine = get_mock_engine()
+    data = engine.generate(start, days)
+    p = engine.patient_index(patient_id)
+
+    steps = data['total_steps'][p].astype(float)
+    store = get_timeseries_store()
+    if store is not None:
+        movement = store.daily_movement(patient_id, start, days)
+        steps = np.where(movement['measured'], movement['steps'], steps)
+
+    return {
+        'steps': steps,
+        'sleep_hours': data['sleep_hours'][p].astype(float),
+        'irregularities': get_irregularity_detector(patient_id).count_range(start, days).astype(float),
+        'meals_eaten': data['meals_eaten'][p].sum(axis=-1).astype(float),
+        'medication_taken': data['medication_compliance'][p].astype(float),
+    }
+
+
+def _direction(change: Optional[float]) -> str:
+    if change is None or abs(change) < TREND_THRESHOLD:
+        return 'stable'
+    return 'increasing' if change > 0 else 'decreasing'
+
+
+class RollupEngine:
+    """Daily aggregates with O(1) window queries for one patient."""
+
+    def __init__(self, patient_id: str = DEFAULT_PATIENT_ID, loader: MetricsLoader = load_daily_metrics):
+        self.patient_id = patient_id
+        self.loader = loader
+        self.first_date: Optional[date_cls] = None
+        self._values: Dict[str, List[float]] = {m: [] for m in METRICS}
+        # _prefix[m][i] is the sum of the first i daily values
+        self._prefix: Dict[str, List[float]] = {m: [0.0] for m in METRICS}
+        self._latest: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def last_date(self) -> Optional[date_cls]:
+        if self.first_date is None:
+            return None
+        return self.first_date + timedelta(days=len(self._values[METRICS[0]]) - 1)
+
+    # ========== UPDATES ==========
+
+    def _reset(self, first_date: date_cls) -> None:
+        self.first_date = first_date
+        self._values = {m: [] for m in METRICS}
+        self._prefix = {m: [0.0] for m in METRICS}
+
+    def _append(self, values: Dict[str, np.ndarray]) -> None:
+        for metric in METRICS:
+            column = values[metric].tolist()
+            self._values[metric].extend(column)
+            prefix = self._prefix[metric]
+            for value in column:
+                prefix.append(prefix[-1] + value)
+
+    def _drop_last(self) -> None:
+        for metric in METRICS:
+            self._values[metric].pop()
+            self._prefix[metric].pop()
+
+    def add_days(self, start: Any, values: Dict[str, np.ndarray]) -> None:
+        """
+        Add daily values starting at `start`.
+
+        `start` must be the day after the last loaded day, or the last day
+        itself (which is then replaced).
+        """
+        start = parse_date(start)
+        with self._lock:
+            if self.first_date is None:
+                self._reset(start)
+            elif start == self.last_date:
+                self._drop_last()
+            elif start != self.last_date + timedelta(days=1):
+                raise ValueError(f"Days must be added in order: expected {self.last_date + timedelta(days=1)}, "
+                                 f"got {start}")
+            self._append(values)
+            self._refresh_latest()
+
+    def ensure_through(self, end: Any, history_days: int = 2 * max(WINDOWS)) -> None:
+        """
+        Make sure every day up to `end` is loaded, with at least `history_days` of history.
+
+        Only days after the last loaded day are read, plus the last day itself,
+        which may still be receiving data.
+        """
+        end = parse_date(end)
+        wanted_start = end - timedelta(days=history_days - 1)
+        with self._lock:
+            if self.first_date is None or wanted_start < self.first_date:
+                self.first_date = None
+                self.add_days(wanted_start, self.loader(self.patient_id, wanted_start, history_days))
+                return
+
+            start = self.last_date
+            if end >= start:
+                self.add_days(start, self.loader(self.patient_id, start, (end - start).days + 1))
+
+    # ========== QUERIES ==========
+
+    def _index(self, day: date_cls) -> int:
+        return (day - self.first_date).days
+
+    def _sum(self, metric: str, lo: int, hi: int) -> float:
+        prefix = self._prefix[metric]
+        return prefix[hi] - prefix[lo]
+
+    def window(self, metric: str, days: int, end: Any = None) -> Dict[str, Any]:
+        """
+        Stats for the `days`-day window ending at `end` (default: latest day).
+
+        Returns:
+            Dict with total, mean, previous_mean (the window before it, or
+            None), change (relative change of the mean, or None) and direction
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r} (expected one of {list(METRICS)})")
+        # A reload from an earlier date replaces the lists; read them in one go
+        with self._lock:
+            hi = len(self._values[metric]) if end is None else self._index(parse_date(end)) + 1
+            lo = hi - days
+            if lo < 0 or hi > len(self._values[metric]):
+                raise ValueError(f"Window of {days} days ending {end or self.last_date} is outside loaded history")
+
+            total = self._sum(metric, lo, hi)
+            previous_total = self._sum(metric, lo - days, lo) if lo - days >= 0 else None
+        mean = total / days
+        previous_mean = previous_total / days if previous_total is not None else None
+        change = None
+        if previous_mean is not None:
+            change = (mean - previous_mean) / previous_mean if previous_mean else (1.0 if mean else 0.0)
+        return {
+            'days': days,
+            'total': total,
+            'mean': mean,
+            'previous_mean': previous_mean,
+            'change': change,
+            'direction': _direction(change),
+        }
+
+    def _refresh_latest(self) -> None:
+        loaded = len(self._values[METRICS[0]])
+        self._latest = {
+            days: {metric: self.window(metric, days) for metric in METRICS}
+            for days in WINDOWS if days <= loaded
+        }
+
+    def latest(self, days: int) -> Dict[str, Dict[str, Any]]:
+        """Precomputed stats for a standard window (7, 30 or 90) ending at the latest day."""
+        return self._latest[days]
+
+    def trend(self, days: int, end: Any = None) -> Dict[str, Dict[str, Any]]:
+        """Stats for every metric over `days` days ending at `end` (default: today)."""
+        end = parse_date(end or datetime.now())
+        with self._lock:
+            self.ensure_through(end, history_days=max(2 * max(WINDOWS), 2 * days))
+            if end == self.last_date and days in self._latest:
+                return self.latest(days)
+            return {metric: self.window(metric, days, end) for metric in METRICS}
+
+
+_rollup_engines: Dict[str, RollupEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_rollup_engine(patient_id: str = DEFAULT_PATIENT_ID) -> RollupEngine:
+    """Get or create the shared rollup engine for a patient."""
+    with _engines_lock:
+        if patient_id not in _rollup_engines:
+            _rollup_engines[patient_id] = RollupEngine(patient_id)
+        return _rollup_engines[patient_id]
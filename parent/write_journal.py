@@ -0,0 +1,506 @@
+"""Durable local write journal with background replay to Firestore.
+
+When the journal is enabled, FirestoreNativeService writers append each
+write to a local SQLite file and return as soon as it is on disk. A
+background `JournalReplayer` thread applies the entries to the storage
+backend in order, retrying with jittered exponential backoff, so a slow
+or unreachable Firestore delays writes instead of losing them.
+
+The service passes its retrying `run_transaction(collection, func)` to the
+replayer, so replayed writes get the same conflict backoff and
+per-collection transaction metrics as direct ones.
+
+Every entry carries an idempotency key. When an entry is applied, a
+marker document `write-journal-applied/<key>` is written in the same
+atomic batch; replay skips entries whose marker already exists, so a
+crash between the remote write and the local bookkeeping never applies
+a write twice. Once an applied entry is compacted out of the journal its
+marker is no longer needed and is deleted from the backend.
+
+A failing entry only holds back later entries for the same document;
+other documents keep replaying. An entry rejected with a non-transient
+error MAX_ATTEMPTS times is moved to the dead-letter state: it is logged,
+no longer replayed or overlaid on reads, and listed by `dead_letters()`
+until `requeue_dead()` retries it. Transient errors (conflicts, timeouts,
+an unreachable backend) never dead-letter an entry.
+
+Supported operations:
+- 'set'    - set(payload, merge=True)
+- 'append' - append payload['values'] to the list field payload['field']
+- 'union'  - add the payload['values'] not yet in the list field
+             payload['field'] (like Firestore's ArrayUnion)
+
+Enable it with the WRITE_JOURNAL_DIR environment variable; each
+(project, database) gets its own journal file in that directory.
+"""
+
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Any, Optional
+
+from team29.storage_backends import (
+    StorageBackend,
+    Transaction,
+    TransactionConflict,
+    merge_document,
+    encode_json_value,
+    decode_json_value,
+)
+
+try:
+    from google.api_core import exceptions as google_exceptions
+except ImportError:
+    google_exceptions = None
+
+logger = logging.getLogger('WriteJournal')
+
+# run_transaction(collection, func): runs func in a transaction on the contended collection
+TransactionRunner = Callable[[str, Callable[[Transaction], Any]], Any]
+
+APPLIED_COLLECTION = 'write-journal-applied'
+OPERATIONS = ('set', 'append', 'union')
+# Operations that read the current list field and extend it
+LIST_OPERATIONS = ('append', 'union')
+
+# Non-transient failures before an entry is dead-lettered
+MAX_ATTEMPTS = 5
+# Applied entries (and their markers) removed per compaction round
+COMPACT_BATCH = 500
+
+TRANSIENT_ERRORS = (TransactionConflict, ConnectionError, TimeoutError)
+if google_exceptions is not None:
+    TRANSIENT_ERRORS += (
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+        google_exceptions.TooManyRequests,
+        google_exceptions.Aborted,
+        google_exceptions.RetryError,
+    )
+
+
+def is_transient(error: Exception) -> bool:
+    """True for failures worth retrying indefinitely (the backend may recover)."""
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def extend_list(op: str, current: List[Any], values: List[Any]) -> List[Any]:
+    """The list field after an 'append' or 'union' of values."""
+    if op == 'append':
+        return list(current) + list(values)
+    result = list(current)
+    for value in values:
+        if value not in result:
+            result.append(value)
+    return result
+
+
+def apply_operation(backend: StorageBackend, op: str, collection: str, doc_id: str,
+                    payload: Dict[str, Any], idempotency_key: Optional[str] = None,
+                    run_transaction: Optional[TransactionRunner] = None) -> bool:
+    """
+    Apply one journaled write to a backend.
+
+    Args:
+        backend: Backend to write to
+        op: 'set', 'append' or 'union'
+        collection: Target collection
+        doc_id: Target document ID
+        payload: Data for 'set', or {'field', 'values'} for 'append' / 'union'
+        idempotency_key: If given, skip the write when its marker exists and
+            write the marker atomically with the data
+        run_transaction: Runs the transaction, e.g. with retries and metrics
+            (default: one backend.run_transaction attempt)
+
+    Returns:
+        True if the write was applied, False if it had already been applied
+    """
+    if op not in OPERATIONS:
+        raise ValueError(f"Unknown journal operation: {op!r}")
+
+    def apply(transaction: Transaction) -> bool:
+        if idempotency_key is not None and transaction.get(APPLIED_COLLECTION, idempotency_key) is not None:
+            return False
+        if op == 'set':
+            data = payload
+        else:
+            existing = transaction.get(collection, doc_id) or {}
+            data = {payload['field']: extend_list(op, existing.get(payload['field'], []), payload['values'])}
+        transaction.set(collection, doc_id, data)
+        if idempotency_key is not None:
+            transaction.set(APPLIED_COLLECTION, idempotency_key, {
+                'path': f"{collection}/{doc_id}",
+                'applied_at': datetime.utcnow(),
+            })
+        return True
+
+    if run_transaction is not None:
+        return run_transaction(collection, apply)
+    # A conflict fails the replay attempt; the replayer backs off and retries it
+    return backend.run_transaction(apply)
+
+
+def overlay_operation(data: Optional[Dict[str, Any]], op: str,
+                      payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a pending write to a locally read copy of a document."""
+    data = dict(data or {})
+    if op == 'set':
+        return merge_document(data, payload)
+    data[payload['field']] = extend_list(op, data.get(payload['field'], []), payload['values'])
+    return data
+
+
+class WriteJournal:
+    """Append-only journal of pending writes stored in a local SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # Entries must survive power loss once append() returns
+        self._conn.execute('PRAGMA synchronous=FULL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS journal ('
+            ' seq INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' idempotency_key TEXT NOT NULL UNIQUE,'
+            ' op TEXT NOT NULL,'
+            ' collection TEXT NOT NULL,'
+            ' doc_id TEXT NOT NULL,'
+            ' payload TEXT NOT NULL,'
+            ' created_at TEXT NOT NULL,'
+            ' attempts INTEGER NOT NULL DEFAULT 0,'
+            ' last_error TEXT,'
+            ' applied_at TEXT,'
+            ' dead_at TEXT)'
+        )
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(journal)')}
+        if 'dead_at' not in columns:
+            # Journals created before dead-lettering
+            self._conn.execute('ALTER TABLE journal ADD COLUMN dead_at TEXT')
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS journal_pending ON journal (applied_at, seq)'
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS journal_document ON journal (collection, doc_id, applied_at)'
+        )
+        self._new_entry = threading.Event()
+
+    def append(self, op: str, collection: str, doc_id: str, payload: Dict[str, Any],
+               idempotency_key: Optional[str] = None) -> str:
+        """
+        Durably record a write.
+
+        Appending the same idempotency key twice records the write once.
+
+        Returns:
+            The idempotency key of the entry
+        """
+        return self.append_many([(op, collection, doc_id, payload, idempotency_key)])[0]
+
+    def append_many(self, entries: List[tuple]) -> List[str]:
+        """
+        Durably record several writes in one local transaction.
+
+        Args:
+            entries: (op, collection, doc_id, payload, idempotency_key or None) tuples
+
+        Returns:
+            The idempotency keys, in entry order
+        """
+        keys = []
+        rows = []
+        created_at = datetime.utcnow().isoformat()
+        for op, collection, doc_id, payload, idempotency_key in entries:
+            if op not in OPERATIONS:
+                raise ValueError(f"Unknown journal operation: {op!r}")
+            if idempotency_key is None:
+                idempotency_key = uuid.uuid4().hex
+            keys.append(idempotency_key)
+            rows.append((idempotency_key, op, collection, doc_id,
+                         json.dumps(payload, default=encode_json_value), created_at))
+
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO journal '
+                    '(idempotency_key, op, collection, doc_id, payload, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        self._new_entry.set()
+        return keys
+
+    def _rows_to_entries(self, rows) -> List[Dict[str, Any]]:
+        return [
+            {
+                'seq': row[0],
+                'idempotency_key': row[1],
+                'op': row[2],
+                'collection': row[3],
+                'doc_id': row[4],
+                'payload': json.loads(row[5], object_hook=decode_json_value),
+                'attempts': row[6],
+            }
+            for row in rows
+        ]
+
+    def pending(self, limit: int = 100, after_seq: int = 0) -> List[Dict[str, Any]]:
+        """Oldest unapplied, live entries after `after_seq`, in append order."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT seq, idempotency_key, op, collection, doc_id, payload, attempts '
+                'FROM journal WHERE applied_at IS NULL AND dead_at IS NULL AND seq > ? '
+                'ORDER BY seq LIMIT ?',
+                (after_seq, limit)
+            ).fetchall()
+        return self._rows_to_entries(rows)
+
+    def pending_for(self, collection: str, doc_id: str) -> List[Dict[str, Any]]:
+        """Unapplied entries for one document, in append order."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT seq, idempotency_key, op, collection, doc_id, payload, attempts '
+                'FROM journal WHERE applied_at IS NULL AND dead_at IS NULL '
+                'AND collection = ? AND doc_id = ? ORDER BY seq',
+                (collection, doc_id)
+            ).fetchall()
+        return self._rows_to_entries(rows)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM journal WHERE applied_at IS NULL AND dead_at IS NULL'
+            ).fetchone()[0]
+
+    def mark_applied(self, seq: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                'UPDATE journal SET applied_at = ?, last_error = NULL WHERE seq = ?',
+                (datetime.utcnow().isoformat(), seq)
+            )
+
+    def mark_failed(self, seq: int, error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                'UPDATE journal SET attempts = attempts + 1, last_error = ? WHERE seq = ?',
+                (error, seq)
+            )
+
+    def mark_dead(self, seq: int) -> None:
+        with self._lock:
+            self._conn.execute('UPDATE journal SET dead_at = ? WHERE seq = ?',
+                               (datetime.utcnow().isoformat(), seq))
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        """Dead-lettered entries with their last error, in append order."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT seq, idempotency_key, op, collection, doc_id, payload, attempts, last_error, dead_at '
+                'FROM journal WHERE dead_at IS NOT NULL ORDER BY seq'
+            ).fetchall()
+        entries = self._rows_to_entries([row[:7] for row in rows])
+        for entry, row in zip(entries, rows):
+            entry['last_error'] = row[7]
+            entry['dead_at'] = row[8]
+        return entries
+
+    def requeue_dead(self, seq: Optional[int] = None) -> int:
+        """Put one (or every) dead-lettered entry back in the queue with a fresh attempt count."""
+        with self._lock:
+            if seq is None:
+                cursor = self._conn.execute(
+                    'UPDATE journal SET dead_at = NULL, attempts = 0 WHERE dead_at IS NOT NULL')
+            else:
+                cursor = self._conn.execute(
+                    'UPDATE journal SET dead_at = NULL, attempts = 0 WHERE seq = ? AND dead_at IS NOT NULL',
+                    (seq,))
+        self._new_entry.set()
+        return cursor.rowcount
+
+    def applied_keys(self, limit: int = COMPACT_BATCH) -> List[str]:
+        """Idempotency keys of applied entries still in the journal."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT idempotency_key FROM journal WHERE applied_at IS NOT NULL ORDER BY seq LIMIT ?',
+                (limit,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def compact(self, keys: Optional[List[str]] = None) -> int:
+        """Delete applied entries (only those with `keys` if given). Returns the number removed."""
+        with self._lock:
+            if keys is None:
+                cursor = self._conn.execute('DELETE FROM journal WHERE applied_at IS NOT NULL')
+            else:
+                cursor = self._conn.executemany(
+                    'DELETE FROM journal WHERE applied_at IS NOT NULL AND idempotency_key = ?',
+                    [(key,) for key in keys])
+            return cursor.rowcount
+
+    def wait_for_entries(self, timeout: float) -> None:
+        """Block until a new entry is appended or timeout elapses."""
+        self._new_entry.wait(timeout)
+        self._new_entry.clear()
+
+    def wake(self) -> None:
+        """Release any thread blocked in wait_for_entries()."""
+        self._new_entry.set()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JournalReplayer:
+    """Background thread that replays a WriteJournal into a storage backend."""
+
+    def __init__(self, journal: WriteJournal, backend: StorageBackend,
+                 batch_size: int = 100, base_delay: float = 0.5, max_delay: float = 60.0,
+                 idle_interval: float = 5.0, max_attempts: int = MAX_ATTEMPTS,
+                 run_transaction: Optional[TransactionRunner] = None):
+        self.journal = journal
+        self.backend = backend
+        self.run_transaction = run_transaction
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.idle_interval = idle_interval
+        self._failures = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Held from applying an entry until it is marked applied, so readers
+        # that overlay pending entries on a backend read see each write once
+        self.lock = threading.Lock()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='journal-replayer', daemon=True)
+        self._thread.start()
+        logger.info(f"▶️  Journal replayer started ({self.journal.pending_count()} pending)")
+
+    def replay_once(self) -> int:
+        """
+        Make one pass over the pending entries, in order.
+
+        A failed entry holds back the later entries for its document until
+        the next pass; entries for other documents are still applied.
+
+        Returns:
+            Number of entries applied
+        """
+        applied = 0
+        failed = False
+        blocked = set()
+        after_seq = 0
+        while not self._stop.is_set():
+            entries = self.journal.pending(self.batch_size, after_seq=after_seq)
+            if not entries:
+                break
+            for entry in entries:
+                after_seq = entry['seq']
+                document = (entry['collection'], entry['doc_id'])
+                if document in blocked:
+                    continue
+                try:
+                    with self.lock:
+                        apply_operation(self.backend, entry['op'], entry['collection'], entry['doc_id'],
+                                        entry['payload'], idempotency_key=entry['idempotency_key'],
+                                        run_transaction=self.run_transaction)
+                        self.journal.mark_applied(entry['seq'])
+                except Exception as e:
+                    self.journal.mark_failed(entry['seq'], str(e))
+                    attempts = entry['attempts'] + 1
+                    if not is_transient(e) and attempts >= self.max_attempts:
+                        self.journal.mark_dead(entry['seq'])
+                        logger.error(f"❌ Dead-lettered journal entry {entry['seq']} for "
+                                     f"{entry['collection']}/{entry['doc_id']} after {attempts} attempts: {e}")
+                        continue
+                    # Later writes to this document must wait so they stay in order
+                    blocked.add(document)
+                    failed = True
+                    logger.warning(f"⚠️  Replay of {entry['collection']}/{entry['doc_id']} failed "
+                                   f"(attempt {attempts}): {e}")
+                    continue
+                applied += 1
+        self._failures = self._failures + 1 if failed else 0
+        return applied
+
+    def collect_markers(self) -> int:
+        """
+        Compact applied entries and delete their idempotency markers.
+
+        Markers are deleted before the entries, so a crash in between only
+        leaves entries that are already applied and will never be replayed.
+
+        Returns:
+            Number of entries compacted
+        """
+        removed = 0
+        while not self._stop.is_set():
+            keys = self.journal.applied_keys(COMPACT_BATCH)
+            if not keys:
+                break
+            try:
+                self.backend.delete_documents(APPLIED_COLLECTION, keys)
+            except Exception as e:
+                logger.warning(f"⚠️  Could not delete {len(keys)} applied markers, will retry: {e}")
+                break
+            removed += self.journal.compact(keys)
+        return removed
+
+    def _backoff(self) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** (self._failures - 1)))
+        return random.uniform(delay / 2, delay)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            applied = self.replay_once()
+            if applied:
+                logger.info(f"✅ Replayed {applied} journaled writes")
+            if self._failures:
+                self._stop.wait(self._backoff())
+            else:
+                self.collect_markers()
+                self.journal.wait_for_entries(self.idle_interval)
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Wait until the journal is drained. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self.journal.pending_count():
+            if time.monotonic() >= deadline:
+                return False
+            if self._thread is None or not self._thread.is_alive():
+                self.replay_once()
+                if self._failures:
+                    return False
+            else:
+                time.sleep(0.05)
+        return True
+
+    def stop(self, flush_timeout: float = 5.0) -> None:
+        """Try to drain the journal, then stop the thread. Undrained entries stay on disk."""
+        if self._thread is None:
+            return
+        drained = self.flush(flush_timeout)
+        self._stop.set()
+        self.journal.wake()
+        self._thread.join(timeout=flush_timeout)
+        self._thread = None
+        if not drained:
+            logger.warning(f"⚠️  Journal replayer stopped with {self.journal.pending_count()} "
+                           f"pending writes; they will be replayed on next start")
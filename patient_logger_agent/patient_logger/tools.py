@@ -1,6 +1,24 @@
 from google.cloud import datastore
 from datetime import datetime
 
+try:
+    # Share one channel per database with the other agents in this process
+    from team29.client_pool import get_client_pool
+except ImportError:  # patient_logger deployed on its own
+    get_client_pool = None
+
+DATABASE = 'patient-logs'
+_client = None
+
+def _get_client() -> datastore.Client:
+    """Returns the shared Datastore client for the patient-logs database."""
+    global _client
+    if get_client_pool is not None:
+        return get_client_pool().datastore(database=DATABASE)
+    if _client is None:
+        _client = datastore.Client(database=DATABASE)
+    return _client
+
 def read_log(log_id: str) -> dict:
     """Reads a patient log from Datastore given a log ID.
 
@@ -10,7 +28,7 @@ def read_log(log_id: str) -> dict:
     Returns:
         A dictionary representing the log.
     """
-    client = datastore.Client(database='patient-logs')
+    client = _get_client()
     key = client.key('PatientLog', int(log_id))
     entity = client.get(key)
     return entity
@@ -26,7 +44,7 @@ def load_all_logs(patient_id: str, limit: int = 10, offset: int = 0) -> list[dic
     Returns:
         A list of dictionaries representing the logs.
     """
-    client = datastore.Client(database='patient-logs')
+    client = _get_client()
     query = client.query(kind='PatientLog')
     query.add_filter('patient_id', '=', patient_id)
     query.order = ['-timestamp']
@@ -46,7 +64,7 @@ def create_log(patient_id: str, caregiver_name: str, caregiver_surname: str, rel
     Returns:
         The ID of the newly created log entry as a string.
     """
-    client = datastore.Client(database='patient-logs')
+    client = _get_client()
     key = client.key('PatientLog')
     entity = datastore.Entity(key=key)
     entity.update({
@@ -74,7 +92,7 @@ def create_patient_profile(patient_id: str, name: str, surname: str, email: str,
     Returns:
         A string confirming the creation of the patient profile.
     """
-    client = datastore.Client(database='patient-logs')
+    client = _get_client()
     key = client.key('PatientProfile', patient_id)
     entity = datastore.Entity(key=key)
     entity.update({
@@ -97,7 +115,7 @@ def check_patient_exists(patient_id: str) -> bool:
     Returns:
         True if the patient exists, False otherwise.
     """
-    client = datastore.Client(database='patient-logs')
+    client = _get_client()
     key = client.key('PatientProfile', patient_id)
     entity = client.get(key)
     return entity is not None
@@ -111,7 +129,7 @@ def delete_patient_profile(patient_id: str) -> str:
     Returns:
         A string confirming the deletion of all patient data.
     """
-    client = datastore.Client(database='patient-logs')
+    client = _get_client()
 
     # Delete all logs for the patient
     log_query = client.query(kind='PatientLog')
@@ -139,7 +157,7 @@ def get_patient_profile(patient_id: str) -> dict:
     Returns:
         A dictionary representing the patient profile, or None if not found.
     """
-    client = datastore.Client(database='patient-logs')
+    client = _get_client()
     key = client.key('PatientProfile', patient_id)
     entity = client.get(key)
     return entity
\ No newline at end of file